@@ -23,7 +23,6 @@ from ...models.responses import (
 from ...core.exceptions import ProcessingError, SessionError, ValidationError
 from ...config import Settings
 from ...services.dom_extraction_service import dom_extraction_service
-from ...services.component_detector import ComponentDetector
 from ...services.llm_service import llm_service
 from ...services.screenshot_service import screenshot_service, ViewportType
 from ...utils.logger import get_logger
@@ -294,7 +293,6 @@ async def process_clone_request(
         
         asset_downloader = AssetDownloaderService(session_id)
         download_results = await asset_downloader.download_assets(dom_result.assets, base_url)
-        await asset_downloader.close()
         
         # Get download statistics
         download_stats = asset_downloader.get_stats()
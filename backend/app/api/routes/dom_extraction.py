@@ -7,6 +7,7 @@ import time
 from ...dependencies import (
     get_app_state,
     get_browser_manager,
+    get_ready_browser_manager,
     get_logger,
     get_request_id,
     validate_session_id,
@@ -26,8 +27,7 @@ from ...models.dom_extraction import (
     DOMExtractionInfoResponse,
     DOMExtractionSessionInfo,
     DOMExtractionFileInfo,
-    DOMRegenerationRequest,
-    DOMExtractionResultModel
+    DOMRegenerationRequest
 )
 from ...core.exceptions import ValidationError, ProcessingError
 import logging
@@ -39,7 +39,7 @@ router = APIRouter()
 async def extract_dom_structure(
     request: DOMExtractionRequest,
     background_tasks: BackgroundTasks,
-    browser_manager: BrowserManager = Depends(get_browser_manager),
+    browser_manager: BrowserManager = Depends(get_ready_browser_manager),
     app_state: ApplicationState = Depends(get_app_state),
     logger: logging.Logger = Depends(get_logger),
     request_id: str = Depends(get_request_id),
@@ -61,7 +61,9 @@ async def extract_dom_structure(
             max_depth=request.max_depth
         )
 
-        result_model = DOMExtractionResultModel(**result.__dict__) if result.success else None
+        # The service already returns a validated DOMExtractionResultModel;
+        # rebuilding it from __dict__ would only re-run validation
+        result_model = result if result.success else None
             
         saved_file_path = None
         if request.save_result and result.success:
@@ -147,7 +149,7 @@ async def get_extraction_status(
 @router.post("/analyze-complexity", response_model=DOMComplexityResponse)
 async def analyze_page_complexity(
     request: DOMExtractionRequest,
-    browser_manager: BrowserManager = Depends(get_browser_manager),
+    browser_manager: BrowserManager = Depends(get_ready_browser_manager),
     logger: logging.Logger = Depends(get_logger),
     _: None = Depends(check_rate_limit)
 ):
@@ -177,7 +179,7 @@ async def analyze_page_complexity(
         if not result.success:
             raise ProcessingError(f"Failed to extract page for analysis: {result.error_message}")
         
-        result_model = DOMExtractionResultModel(**result.__dict__)
+        result_model = result
 
         # Analyze complexity
         complexity_analysis = await analyzer.analyze_page_complexity(result_model)
@@ -299,7 +301,7 @@ async def regenerate_extraction(
     extraction_request: DOMRegenerationRequest,
     session_id: str = Depends(validate_session_id),
     app_state: ApplicationState = Depends(get_app_state),
-    browser_manager: BrowserManager = Depends(get_browser_manager),
+    browser_manager: BrowserManager = Depends(get_ready_browser_manager),
     logger: logging.Logger = Depends(get_logger),
     _: None = Depends(check_rate_limit)
 ):
@@ -354,15 +356,11 @@ async def regenerate_extraction(
             max_depth=new_request.max_depth
         )
         
-        if result.success:
-            result_dict = result.__dict__
-        else:
-            result_dict = None
+        result_model = result if result.success else None
         # Save result if requested
 
         saved_file_path = None
         if new_request.save_result and result.success:
-            result_model = DOMExtractionResultModel(**result_dict)
             saved_file_path = await storage.save_extraction_result(
                 result_model, 
                 output_format=new_request.output_format.value
@@ -372,7 +370,7 @@ async def regenerate_extraction(
             success=result.success,
             message=f"Regenerated extraction with {result.total_elements} elements" if result.success
                    else f"Regeneration failed: {result.error_message}",
-            extraction_result=result_dict,
+            extraction_result=result_model,
             saved_file_path=saved_file_path,
             session_id=session_id,
             timestamp=datetime.now(UTC)
@@ -7,6 +7,7 @@ import time
 from ...dependencies import (
     get_app_state,
     get_browser_manager,
+    get_ready_browser_manager,
     get_logger,
     get_request_id,
     validate_session_id,
@@ -78,7 +79,7 @@ async def get_viewport_presets():
 async def capture_screenshots(
     request: ScreenshotRequest,
     background_tasks: BackgroundTasks,
-    browser_manager: BrowserManager = Depends(get_browser_manager),
+    browser_manager: BrowserManager = Depends(get_ready_browser_manager),
     app_state: ApplicationState = Depends(get_app_state),
     logger: logging.Logger = Depends(get_logger),
     request_id: str = Depends(get_request_id),
@@ -353,7 +354,7 @@ async def regenerate_session_screenshots(
     session_id: str = Depends(validate_session_id),
     viewport_types: Optional[List[ViewportType]] = Query(default=None),
     app_state: ApplicationState = Depends(get_app_state),
-    browser_manager: BrowserManager = Depends(get_browser_manager),
+    browser_manager: BrowserManager = Depends(get_ready_browser_manager),
     logger: logging.Logger = Depends(get_logger),
     _: None = Depends(check_rate_limit)
 ):
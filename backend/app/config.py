@@ -39,6 +39,9 @@ class Settings(BaseSettings):
     # File storage
     temp_storage_path: str = "./data"
     max_file_size: int = 10 * 1024 * 1024
+    asset_cache_enabled: bool = True
+    asset_cache_ttl: int = 24 * 60 * 60
+    asset_cache_max_bytes: int = 512 * 1024 * 1024
 
     # Scraping settings
     request_timeout: int = 30
@@ -54,10 +57,16 @@ class Settings(BaseSettings):
     BROWSER_USER_AGENT: Optional[str] = None
     MAX_BROWSER_INSTANCES: int = 5
     BROWSER_POOL_SIZE: int = 3
+    BROWSER_MAX_CONCURRENT_CONTEXTS: int = 8
     BROWSER_MAX_RETRIES: int = 3
     BROWSER_RETRY_DELAY: int = 2
+    BROWSER_INIT_RETRIES: int = 3
     BROWSER_DEBUG: bool = False
     BROWSER_SLOW_MO: int = 0
+    BROWSER_HEALTH_CACHE_TTL: float = 10.0
+    BROWSER_DEEP_HEALTH_INTERVAL: float = 60.0
+    BROWSER_BLOCK_IMAGES: bool = False
+    BROWSER_BLOCK_RESOURCES: Optional[List[str]] = None
     USE_CLOUD_BROWSER: bool = False
     BROWSERBASE_API_KEY: Optional[str] = None
     BROWSERBASE_PROJECT_ID: Optional[str] = None
@@ -75,4 +84,5 @@ os.makedirs(settings.temp_storage_path, exist_ok=True)
 os.makedirs(f"{settings.temp_storage_path}/screenshots", exist_ok=True)
 os.makedirs(f"{settings.temp_storage_path}/generated", exist_ok=True)
 os.makedirs(f"{settings.temp_storage_path}/assets", exist_ok=True)
-os.makedirs(f"{settings.temp_storage_path}/extractions", exist_ok=True)
\ No newline at end of file
+os.makedirs(f"{settings.temp_storage_path}/extractions", exist_ok=True)
+os.makedirs(f"{settings.temp_storage_path}/asset_cache", exist_ok=True)
\ No newline at end of file
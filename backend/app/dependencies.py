@@ -7,7 +7,7 @@ import logging
 from datetime import datetime, UTC
 
 from .config import Settings, settings
-from .services.browser_manager import BrowserManager, browser_manager
+from .services.browser_manager import BrowserManager, get_browser_manager as get_global_browser_manager
 from .services.screenshot_service import ScreenshotService, screenshot_service
 from .services.dom_extraction_service import DOMExtractionService, dom_extraction_service
 
@@ -73,7 +73,37 @@ def get_browser_manager() -> BrowserManager:
     Returns:
         BrowserManager: Global browser manager
     """
-    return browser_manager
+    return get_global_browser_manager()
+
+
+async def get_ready_browser_manager(
+    manager: BrowserManager = Depends(get_browser_manager)
+) -> BrowserManager:
+    """
+    Get the global browser manager with a running browser.
+    
+    Startup only kicks off the browser prewarm, so a request can arrive while
+    Chromium is still launching. initialize() waits for that prewarm and only
+    launches a browser itself if the prewarm did not leave one running.
+    
+    Returns:
+        BrowserManager: Initialized browser manager
+        
+    Raises:
+        HTTPException: If the browser cannot be started
+    """
+    if not manager._is_initialized:
+        try:
+            await manager.initialize()
+        except Exception as e:
+            logger = get_logger()
+            logger.error(f"Failed to initialize browser manager: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Browser service unavailable"
+            )
+    
+    return manager
 
 
 def get_logger(name: str = "website_cloner") -> logging.Logger:
@@ -305,6 +335,7 @@ LoggerDeps = Depends(get_logger)
 RequestIdDeps = Depends(get_request_id)
 RateLimitDeps = Depends(check_rate_limit)
 BrowserManagerDeps = Depends(get_browser_manager)
+ReadyBrowserManagerDeps = Depends(get_ready_browser_manager)
 BrowserServiceDeps = Depends(get_browser_service)
 ScreenshotServiceDeps = Depends(get_screenshot_service)
 DOMExtractionServiceDeps = Depends(get_dom_extraction_service)
\ No newline at end of file
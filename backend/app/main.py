@@ -24,6 +24,7 @@ from .core.exceptions import (
 from .models.responses import ErrorResponse, HealthResponse
 from .utils.logger import setup_logging, get_logger
 from .dependencies import get_browser_manager
+from .services.asset_downloader_service import close_shared_client, shutdown_image_pool
 
 # Initialize logging
 setup_logging()
@@ -58,15 +59,10 @@ async def lifespan(app: FastAPI):
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"Debug mode: {settings.debug}")
     
-    # Initialize browser manager with error handling
-    try:
-        browser_manager = get_browser_manager()
-        await browser_manager.initialize()
-        logger.info("Browser manager initialized successfully")
-    except Exception as e:
-        logger.warning(f"Browser manager initialization failed: {str(e)}")
-        logger.info("Browser will be initialized on first use")
-        # Don't fail startup - browser will be initialized on demand
+    # Launch the browser in the background so startup is not blocked on it;
+    # the first request awaits the prewarm instead of starting its own launch
+    get_browser_manager().start_prewarm()
+    logger.info("Browser manager prewarm started")
     
     yield
     
@@ -74,11 +70,18 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down application")
     try:
         browser_manager = get_browser_manager()
-        if browser_manager._is_initialized:
+        if browser_manager._is_initialized or browser_manager._prewarm_task is not None:
             await browser_manager.cleanup()
             logger.info("Browser manager cleaned up")
     except Exception as e:
         logger.warning(f"Browser cleanup error: {str(e)}")
+    
+    try:
+        await close_shared_client()
+    except Exception as e:
+        logger.warning(f"Asset HTTP client cleanup error: {str(e)}")
+    
+    shutdown_image_pool()
 
 
 
@@ -34,6 +34,20 @@ class DetectedComponent(BaseModel):
     # Optional fields
     label: Optional[str] = Field(None, description="A descriptive label for the component (e.g., button text).")
     asset_url: Optional[str] = Field(None, description="The URL for an image or other external asset.")
+
+    @classmethod
+    def from_extractor(cls, data: Dict[str, Any]) -> 'DetectedComponent':
+        """
+        Build a component tree from the blueprint extractor's output.
+
+        The extractor script emits exactly this shape, so nodes are built with
+        model_construct instead of validating every node of a large tree; only
+        the enum and the nested children need converting.
+        """
+        values = dict(data)
+        values['component_type'] = ComponentType(data['component_type'])
+        values['children'] = [cls.from_extractor(child) for child in data.get('children') or []]
+        return cls.model_construct(**values)
 DetectedComponent.model_rebuild()
 
 class ComponentDetectionResult(BaseModel):
@@ -41,4 +55,6 @@ class ComponentDetectionResult(BaseModel):
     session_id: str = Field(..., description="The session ID for the detection.")
     # The 'components' field will now hold the root of the blueprint tree
     blueprint: Optional[DetectedComponent] = Field(None, description="The root of the component blueprint.")
+    components: List[DetectedComponent] = Field(default_factory=list, description="Flat list of components found by the ComponentDetector.")
+    total_components: int = Field(0, description="Number of detected components.")
     detection_time_seconds: float = Field(..., description="Time taken for the detection process.")
\ No newline at end of file
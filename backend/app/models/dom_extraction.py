@@ -35,7 +35,7 @@ class DOMExtractionRequest(BaseModel):
     )
     
     max_depth: int = Field(
-        default=10,
+        default=6,
         description="Maximum DOM depth to extract",
         ge=1,
         le=20
@@ -66,6 +66,12 @@ class ExtractedElementModel(BaseModel):
     is_visible: bool = Field(default=True, description="Whether element is visible")
     z_index: Optional[int] = Field(None, description="CSS z-index value")
 
+    @field_validator('tag_name')
+    @classmethod
+    def normalize_tag_name(cls, v):
+        """Store tag names lowercased so consumers can compare them directly."""
+        return v.lower()
+
 
 class ExtractedStylesheetModel(BaseModel):
     """Model for extracted stylesheet."""
@@ -152,6 +158,10 @@ class DOMExtractionResultModel(BaseModel):
     success: bool = Field(default=True, description="Whether extraction was successful")
     error_message: Optional[str] = Field(None, description="Error message if extraction failed")
 
+    def to_bytes(self, indent: Optional[int] = None) -> bytes:
+        """Serialize to UTF-8 JSON bytes, skipping model_dump_json()'s decode to str."""
+        return self.__pydantic_serializer__.to_json(self, indent=indent)
+
 
 class DOMExtractionFileInfo(BaseModel):
     """Model for DOM extraction file information."""
@@ -233,7 +243,7 @@ class DOMRegenerationRequest(BaseModel):
     url: Optional[HttpUrl] = Field(None, description="URL to extract (uses session URL if not provided)")
     wait_for_load: bool = Field(default=True, description="Wait for page load")
     include_computed_styles: bool = Field(default=True, description="Include computed styles")
-    max_depth: int = Field(default=10, description="Maximum DOM depth", ge=1, le=20)
+    max_depth: int = Field(default=6, description="Maximum DOM depth", ge=1, le=20)
     save_result: bool = Field(default=True, description="Save result to file")
     output_format: OutputFormat = Field(default=OutputFormat.JSON, description="Output format")
 
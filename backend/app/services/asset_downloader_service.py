@@ -1,13 +1,22 @@
 import asyncio
+import aiofiles
 import httpx
 import hashlib
+import os
+import json
+import time
+import random
+import struct
+import tempfile
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import re
 from urllib.parse import urljoin, urlparse, unquote
 import mimetypes
 import base64
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
 
 # Only import PIL if available
 try:
@@ -16,37 +25,689 @@ try:
 except ImportError:
     PIL_AVAILABLE = False
 
+# BLAKE3 is faster for filename hashing; BLAKE2b is the stdlib fallback
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# orjson serializes the session manifest faster when installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from ..models.dom_extraction import ExtractedAssetModel
 from ..config import settings
 from ..utils.logger import get_logger
+from ..utils.http import HTTP2_AVAILABLE, parse_retry_after
 
 logger = get_logger(__name__)
 
+# Shared HTTP client so the connection pool survives across clone sessions
+_shared_client: Optional[httpx.AsyncClient] = None
+_shared_client_lock = asyncio.Lock()
+
+
+async def get_shared_client() -> httpx.AsyncClient:
+    """Get the process-wide asset HTTP client, creating it on first use."""
+    global _shared_client
+    
+    if _shared_client is not None and not _shared_client.is_closed:
+        return _shared_client
+    
+    async with _shared_client_lock:
+        if _shared_client is None or _shared_client.is_closed:
+            # Enhanced HTTP client with better headers and timeout handling
+            _shared_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                follow_redirects=True,
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                    'Accept': 'image/*,*/*;q=0.8',
+                    'Accept-Language': 'en-US,en;q=0.5',
+                    'Accept-Encoding': 'gzip, deflate',
+                    'DNT': '1',
+                    'Connection': 'keep-alive',
+                    'Upgrade-Insecure-Requests': '1',
+                }
+            )
+            logger.info(f"Created shared asset HTTP client (http2={HTTP2_AVAILABLE})")
+    
+    return _shared_client
+
+
+async def close_shared_client() -> None:
+    """Close the shared asset HTTP client. Called on application shutdown."""
+    global _shared_client
+    
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+        logger.info("Shared asset HTTP client closed")
+
+
+def short_hash(data: bytes) -> str:
+    """Return an 8 hex character digest used to build asset filenames."""
+    if BLAKE3_AVAILABLE:
+        return blake3.blake3(data).hexdigest(length=4)
+    return hashlib.blake2b(data, digest_size=4).hexdigest()
+
+
+# Images larger than this on either axis are downscaled
+MAX_IMAGE_DIMENSION = 2048
+
+# Re-encoded images from sources above this size get optimize/progressive JPEG
+OPTIMIZE_MIN_BYTES = 100 * 1024
+
+# ISO-BMFF major brands identifying AVIF images and sequences
+_AVIF_BRANDS = (b'avif', b'avis')
+
+# JPEG start-of-frame markers carrying the image dimensions
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def peek_image_size(content: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read image dimensions from the file header without decoding pixels.
+    
+    Supports PNG, GIF, JPEG and WebP (VP8, VP8L, VP8X).
+    
+    Returns:
+        (width, height), or None if the format is unknown or the header is truncated
+    """
+    try:
+        # PNG: IHDR is always the first chunk
+        if content[:8] == b'\x89PNG\r\n\x1a\n':
+            return struct.unpack('>II', content[16:24])
+        
+        # GIF: logical screen descriptor follows the signature
+        if content[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', content[6:10])
+        
+        # WebP: RIFF container with a VP8/VP8L/VP8X first chunk
+        if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+            chunk = content[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', content[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b'VP8L':
+                b0, b1, b2, b3 = content[21:25]
+                width = (b0 | (b1 & 0x3F) << 8) + 1
+                height = (b1 >> 6 | b2 << 2 | (b3 & 0x0F) << 10) + 1
+                return width, height
+            if chunk == b'VP8X':
+                width = int.from_bytes(content[24:27], 'little') + 1
+                height = int.from_bytes(content[27:30], 'little') + 1
+                return width, height
+            return None
+        
+        # JPEG: walk segments until a start-of-frame marker
+        if content[:2] == b'\xff\xd8':
+            i = 2
+            length = len(content)
+            while i + 9 <= length:
+                if content[i] != 0xFF:
+                    return None
+                marker = content[i + 1]
+                if marker == 0xFF:
+                    # Fill byte before the marker
+                    i += 1
+                    continue
+                if marker in _JPEG_SOF_MARKERS:
+                    height, width = struct.unpack('>HH', content[i + 5:i + 9])
+                    return width, height
+                if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                    # Standalone markers carry no length
+                    i += 2
+                    continue
+                segment_length = struct.unpack('>H', content[i + 2:i + 4])[0]
+                i += 2 + segment_length
+            return None
+    
+    except (struct.error, ValueError):
+        return None
+    
+    return None
+
+
+# SVG sanitization patterns, compiled once at import
+_SCRIPT_RE = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL | re.IGNORECASE)
+_ONEVT_RE = re.compile(r'on\w+\s*=\s*["\'][^"\']*["\']', re.IGNORECASE)
+_JS_RE = re.compile(r'javascript:', re.IGNORECASE)
+
+# Byte-level twins of the patterns above (all ASCII) for downloaded SVGs
+_SVG_BYTES_PATTERNS = tuple(
+    re.compile(pattern.pattern.encode('ascii'), pattern.flags & ~re.UNICODE)
+    for pattern in (_SCRIPT_RE, _ONEVT_RE, _JS_RE)
+)
+
+def sanitize_svg(svg_content: str) -> str:
+    """Basic SVG sanitization."""
+    # Remove script tags and event handlers
+    svg_content = _SCRIPT_RE.sub('', svg_content)
+    svg_content = _ONEVT_RE.sub('', svg_content)
+    return _JS_RE.sub('', svg_content)
+
+
+def sanitize_svg_bytes(svg_content: bytes) -> bytes:
+    """Basic SVG sanitization on raw bytes, avoiding a UTF-8 decode/encode round-trip."""
+    for pattern in _SVG_BYTES_PATTERNS:
+        svg_content = pattern.sub(b'', svg_content)
+    return svg_content
+
+
+def decode_data_url_payload(data: str, is_base64: bool) -> bytes:
+    """Decode the payload part of a data URL."""
+    if is_base64:
+        return base64.b64decode(data)
+    return unquote(data).encode('utf-8')
+
+
+def needs_image_processing(content: bytes, content_type: str, asset_type: str) -> bool:
+    """Check whether content is a raster image that may need a PIL decode."""
+    if not PIL_AVAILABLE or 'svg' in content_type or asset_type == 'svg':
+        return False
+    if not (content_type.startswith('image/') or asset_type == 'image'):
+        return False
+    return needs_resize(content)
+
+
+def needs_resize(content: bytes) -> bool:
+    """
+    Header sniff deciding whether an image is worth handing to PIL.
+    
+    Images that fit within MAX_IMAGE_DIMENSION and AVIF files (already
+    compact, and not decodable by the bundled Pillow) are passed through.
+    Unknown formats still go to PIL, which decides for itself.
+    """
+    if content[4:8] == b'ftyp' and content[8:12] in _AVIF_BRANDS:
+        return False
+    
+    size = peek_image_size(content)
+    return size is None or max(size) > MAX_IMAGE_DIMENSION
+
+
+def process_asset_content(content: bytes, content_type: str, asset_type: str) -> bytes:
+    """
+    Process and validate asset content.
+    
+    Module-level and limited to bytes/str arguments so it can be shipped to
+    the image process pool. Always returns bytes.
+    """
+    try:
+        # SVG processing
+        if 'svg' in content_type or asset_type == 'svg':
+            # Basic SVG sanitization
+            return sanitize_svg_bytes(content)
+        
+        # Image processing (only if PIL is available)
+        elif needs_image_processing(content, content_type, asset_type):
+            try:
+                img = Image.open(BytesIO(content))
+                
+                # Resize if too large (max 2048px)
+                max_size = MAX_IMAGE_DIMENSION
+                if max(img.size) > max_size:
+                    # Let the JPEG decoder downscale during IDCT before resampling
+                    if img.format == 'JPEG':
+                        img.draft('RGB', (max_size, max_size))
+                    
+                    # Output is q85 JPEG, where BICUBIC is indistinguishable from LANCZOS
+                    img.thumbnail((max_size, max_size), Image.Resampling.BICUBIC)
+                    
+                    # Save back to bytes
+                    output = BytesIO()
+                    # Convert to RGB if needed for JPEG
+                    if img.mode in ('RGBA', 'LA', 'P'):
+                        background = Image.new('RGB', img.size, (255, 255, 255))
+                        if img.mode == 'P':
+                            img = img.convert('RGBA')
+                        if img.mode in ('RGBA', 'LA'):
+                            background.paste(img, mask=img.split()[-1])
+                        else:
+                            background.paste(img)
+                        img = background
+                    
+                    # Huffman optimization only pays off on larger files
+                    if len(content) > OPTIMIZE_MIN_BYTES:
+                        img.save(output, format='JPEG', quality=85, optimize=True, progressive=True)
+                    else:
+                        img.save(output, format='JPEG', quality=85)
+                    return output.getvalue()
+                
+            except Exception as e:
+                logger.warning(f"Image processing failed: {e}")
+                # Return original content if processing fails
+                pass
+        
+        return content
+        
+    except Exception as e:
+        logger.warning(f"Content processing failed: {e}")
+        return content
+
+
+# Process pool for CPU-bound image decoding, created on first use
+_image_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """Get the shared image processing pool."""
+    global _image_pool
+    
+    if _image_pool is None:
+        _image_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _image_pool
+
+
+def shutdown_image_pool() -> None:
+    """Shut down the image processing pool. Called on application shutdown."""
+    global _image_pool
+    
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=False, cancel_futures=True)
+        _image_pool = None
+        logger.info("Image processing pool shut down")
+
+
+_MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)', re.IGNORECASE)
+
+
+class AssetCache:
+    """
+    On-disk cache of processed assets shared across sessions.
+    
+    Entries live under ``<temp_storage_path>/asset_cache`` as a ``<key>.bin``
+    payload plus a ``<key>.meta`` JSON sidecar, keyed by a BLAKE2b hash of
+    the URL. Session files are hardlinked to the payload, so a cache hit
+    costs no network traffic and no copy.
+    
+    Payloads are capped at ``max_bytes`` in total; the oldest entries by
+    ``fetched_at`` are evicted first. Hardlinked session copies keep their
+    data until the session itself is cleaned up.
+    """
+    
+    def __init__(self, cache_dir: Path, default_ttl: int, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Guards the running payload total; store() runs in worker threads
+        self._lock = threading.Lock()
+        self._total_bytes = self.prune()
+    
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        """Get the payload and metadata paths for a URL."""
+        key = hashlib.blake2b(url.encode('utf-8', 'ignore')).hexdigest()
+        return self.cache_dir / f"{key}.bin", self.cache_dir / f"{key}.meta"
+    
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached metadata for a URL.
+        
+        Returns:
+            Metadata dict with an added ``fresh`` flag, or None on a miss
+        """
+        bin_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        
+        if not bin_path.exists():
+            return None
+        
+        meta['fresh'] = time.time() - meta.get('fetched_at', 0) < meta.get('max_age', 0)
+        if not meta['fresh'] and not (meta.get('etag') or meta.get('last_modified')):
+            # Expired with nothing to revalidate against: it can never be served again
+            with self._lock:
+                self._total_bytes -= self._remove(bin_path, meta_path)
+            return None
+        return meta
+    
+    def _max_age(self, headers: Dict[str, str]) -> Optional[int]:
+        """Get the cache lifetime from response headers, or None if uncacheable."""
+        cache_control = headers.get('cache-control', '').lower()
+        if 'no-store' in cache_control:
+            return None
+        if 'no-cache' in cache_control:
+            return 0
+        
+        match = _MAX_AGE_RE.search(cache_control)
+        return int(match.group(1)) if match else self.default_ttl
+    
+    def store(self, url: str, content: bytes, content_type: str, headers: Dict[str, str]) -> bool:
+        """
+        Atomically store processed content for a URL.
+        
+        Returns:
+            True if the content was cached
+        """
+        max_age = self._max_age(headers)
+        if max_age is None:
+            return False
+        
+        bin_path, meta_path = self._paths(url)
+        meta = {
+            'url': url,
+            'content_type': content_type,
+            'size': len(content),
+            'fetched_at': time.time(),
+            'max_age': max_age,
+            # Validators for conditional revalidation once the entry goes stale
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+        }
+        
+        try:
+            replaced = bin_path.stat().st_size
+        except OSError:
+            replaced = 0
+        
+        try:
+            self._atomic_write(bin_path, content)
+            self._atomic_write(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            logger.debug(f"Failed to cache asset {url}: {e}")
+            return False
+        
+        with self._lock:
+            self._total_bytes += len(content) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._total_bytes = self.prune()
+        return bin_path.exists()
+    
+    def prune(self) -> int:
+        """
+        Evict the oldest entries until the payloads fit in max_bytes.
+        
+        Entries whose metadata is unreadable or whose payload is missing are
+        removed as well.
+        
+        Returns:
+            Total payload bytes left in the cache
+        """
+        entries = []
+        for meta_path in self.cache_dir.glob('*.meta'):
+            bin_path = meta_path.with_suffix('.bin')
+            try:
+                fetched_at = json.loads(meta_path.read_bytes()).get('fetched_at', 0)
+                size = bin_path.stat().st_size
+            except (OSError, ValueError):
+                self._remove(bin_path, meta_path)
+                continue
+            entries.append((fetched_at, size, bin_path, meta_path))
+        
+        total = sum(size for _, size, _, _ in entries)
+        entries.sort(key=lambda entry: entry[0])
+        evicted = 0
+        for _, size, bin_path, meta_path in entries:
+            if total <= self.max_bytes:
+                break
+            total -= self._remove(bin_path, meta_path)
+            evicted += 1
+        
+        if evicted:
+            logger.info(f"Evicted {evicted} asset cache entries, {total} bytes remain")
+        return total
+    
+    @staticmethod
+    def _remove(bin_path: Path, meta_path: Path) -> int:
+        """Delete an entry; returns the payload bytes freed."""
+        try:
+            size = bin_path.stat().st_size
+            bin_path.unlink()
+        except OSError:
+            size = 0
+        try:
+            meta_path.unlink()
+        except OSError:
+            pass
+        return size
+    
+    def revalidate(self, url: str, meta: Dict[str, Any], headers: Dict[str, str]) -> bool:
+        """
+        Refresh a stale entry after a 304 Not Modified response.
+        
+        Returns:
+            True if the entry may be served again
+        """
+        max_age = self._max_age(headers)
+        if max_age is None:
+            return False
+        
+        _, meta_path = self._paths(url)
+        meta = {key: value for key, value in meta.items() if key != 'fresh'}
+        meta['fetched_at'] = time.time()
+        meta['max_age'] = max_age
+        meta['etag'] = headers.get('etag') or meta.get('etag')
+        meta['last_modified'] = headers.get('last-modified') or meta.get('last_modified')
+        
+        try:
+            self._atomic_write(meta_path, json.dumps(meta).encode('utf-8'))
+            return True
+        except OSError as e:
+            logger.debug(f"Failed to revalidate cached asset {url}: {e}")
+            return False
+    
+    @staticmethod
+    def conditional_headers(meta: Dict[str, Any]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from cached validators."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+    
+    def link_into(self, url: str, dest: Path) -> bool:
+        """
+        Hardlink the cached payload for a URL to dest.
+        
+        Returns:
+            True if dest now holds the cached content
+        """
+        bin_path, _ = self._paths(url)
+        try:
+            if dest.exists():
+                dest.unlink()
+            os.link(bin_path, dest)
+            return True
+        except OSError as e:
+            logger.debug(f"Failed to link cached asset {url}: {e}")
+            return False
+    
+    def _atomic_write(self, path: Path, content: bytes) -> None:
+        """Write via a temp file and os.replace so readers never see partial data."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+# One cache per directory so the startup scan runs once per process, not per session
+_asset_caches: Dict[Path, AssetCache] = {}
+_asset_caches_lock = threading.Lock()
+
+
+def get_asset_cache(cache_dir: Path) -> AssetCache:
+    """Get the process-wide asset cache for a directory, creating it on first use."""
+    with _asset_caches_lock:
+        cache = _asset_caches.get(cache_dir)
+        if cache is None:
+            cache = AssetCache(cache_dir, settings.asset_cache_ttl, settings.asset_cache_max_bytes)
+            _asset_caches[cache_dir] = cache
+        return cache
+
+
+# URL prefix classifier; match.lastindex identifies which group matched
+_URL_PREFIX_RE = re.compile(r'(data:)|(https?://)|(//)|(/)')
+_URL_DATA = 1
+_URL_ABSOLUTE = 2
+_URL_PROTOCOL_RELATIVE = 3
+_URL_RELATIVE = 4
+
+
+def classify_url(url: str) -> Optional[int]:
+    """Classify a URL by prefix in a single regex match, or None if unsupported."""
+    match = _URL_PREFIX_RE.match(url)
+    return match.lastindex if match else None
+
+
+# Bodies up to this size with a known length are read into a preallocated buffer
+STREAM_PREALLOC_LIMIT = 5 * 1024 * 1024
+
+
+async def read_response_body(response: httpx.Response) -> bytes:
+    """
+    Read a streamed response body.
+    
+    When the server declares an uncompressed Content-Length under
+    STREAM_PREALLOC_LIMIT, chunks are copied into one preallocated bytearray
+    through a memoryview instead of being accumulated and joined. Returns a
+    bytearray in that case, which every downstream consumer accepts.
+    """
+    content_length = response.headers.get('content-length', '')
+    content_encoding = response.headers.get('content-encoding', 'identity').lower()
+    if not content_length.isdigit() or content_encoding != 'identity':
+        return await response.aread()
+    
+    expected = int(content_length)
+    if expected > STREAM_PREALLOC_LIMIT:
+        return await response.aread()
+    
+    buffer = bytearray(expected)
+    view: Optional[memoryview] = memoryview(buffer)
+    received = 0
+    
+    async for chunk in response.aiter_bytes():
+        end = received + len(chunk)
+        if view is not None and end <= expected:
+            view[received:end] = chunk
+        else:
+            # Server sent more than it declared; fall back to growing the buffer
+            if view is not None:
+                view.release()
+                view = None
+                del buffer[received:]
+            buffer += chunk
+        received = end
+    
+    if view is not None:
+        view.release()
+    if received < expected:
+        del buffer[received:]
+    return buffer
+
+
+# Retry policy for asset downloads
+RETRY_BACKOFF_CAP = 4.0
+RETRY_TOTAL_WAIT_CAP = 10.0
+RETRIABLE_CLIENT_ERRORS = frozenset({408, 429})
+
+
+# Files at or below this size are handed to the background writer
+SMALL_FILE_THRESHOLD = 64 * 1024
+
+
+class AsyncArtifactWriter:
+    """
+    Background writer for small asset files.
+    
+    Writes are queued and drained by a single worker that hands each batch to
+    one thread, so many tiny files (icons, inline SVGs) cost one executor hop
+    instead of a blocking open/write/close on the event loop per file.
+    """
+    
+    def __init__(self, max_batch_size: int = 64):
+        self.max_batch_size = max_batch_size
+        self.files_written = 0
+        # Path -> error for every write that failed
+        self.failed: Dict[Path, str] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+    
+    def write_nowait(self, path: Path, content: bytes) -> None:
+        """Queue a file write. Must be called from within the event loop."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        self._queue.put_nowait((path, content))
+    
+    async def flush(self) -> Dict[Path, str]:
+        """
+        Wait until every queued write has been attempted.
+        
+        Returns:
+            Path -> error message for each write that failed
+        """
+        if self._worker is not None:
+            await self._queue.join()
+        return dict(self.failed)
+    
+    async def close(self) -> Dict[Path, str]:
+        """Flush pending writes and stop the worker; returns (and resets) the failed writes."""
+        failed = await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self.failed = {}
+        return failed
+    
+    async def _run(self) -> None:
+        """Drain the queue in batches."""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _write_batch(self, batch: List[tuple]) -> None:
+        """Write a batch of files with raw os.write, skipping buffered file objects."""
+        for path, content in batch:
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    view = memoryview(content)
+                    while view:
+                        view = view[os.write(fd, view):]
+                finally:
+                    os.close(fd)
+                self.files_written += 1
+            except Exception as e:
+                self.failed[path] = str(e)
+                logger.warning(f"Failed to write artifact {path}: {e}")
+
+
 # Keep the original class for backward compatibility
 class AssetDownloaderService:
     """
     Enhanced asset downloader that handles images, SVGs, and creates fallbacks.
     """
     
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, client: Optional[httpx.AsyncClient] = None):
         self.session_id = session_id
         self.output_dir = Path(settings.temp_storage_path) / "assets" / self.session_id
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Enhanced HTTP client with better headers and timeout handling
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(30.0, connect=10.0),
-            follow_redirects=True,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'image/*,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-        )
+        # Optional injected client; falls back to the shared client
+        self._client = client
         
         self.download_stats = {
             'total': 0,
@@ -54,8 +715,26 @@ class AssetDownloaderService:
             'failed': 0,
             'skipped': 0,
             'data_urls': 0,
-            'inline_content': 0
+            'inline_content': 0,
+            'deduplicated': 0,
+            'cached': 0,
+            'revalidated': 0
         }
+        
+        # Cross-session cache of processed assets
+        self._cache: Optional[AssetCache] = None
+        if settings.asset_cache_enabled:
+            self._cache = get_asset_cache(Path(settings.temp_storage_path) / "asset_cache")
+        
+        # Batched writer for small files; flushed before results are returned
+        self._writer = AsyncArtifactWriter()
+        
+        # Inline SVG filenames already queued; repeated icons are written once
+        self._inline_paths: set = set()
+        
+        # Content digest -> file already written this session, so identical
+        # bytes served from different URLs are linked instead of rewritten
+        self._content_paths: Dict[str, Path] = {}
 
     async def download_assets(self, assets: List[ExtractedAssetModel], base_url: str = None) -> List[Dict[str, Any]]:
         """
@@ -77,9 +756,10 @@ class AssetDownloaderService:
             if hasattr(asset, 'content') and asset.content:
                 inline_assets.append(asset)
             elif hasattr(asset, 'url') and asset.url:
-                if asset.url.startswith('data:'):
+                url_kind = classify_url(asset.url)
+                if url_kind == _URL_DATA:
                     data_url_assets.append(asset)
-                elif asset.url.startswith(('http://', 'https://', '//', '/')):
+                elif url_kind is not None:
                     # Clean the URL (this will handle relative URLs)
                     cleaned_url = self._clean_url(asset.url, base_url)
                     if cleaned_url:
@@ -100,28 +780,69 @@ class AssetDownloaderService:
         
         # Process external assets with limited concurrency
         if external_assets:
+            # Group assets by URL so each unique URL is fetched only once
+            unique_assets: Dict[str, List[ExtractedAssetModel]] = {}
+            for asset in external_assets:
+                unique_assets.setdefault(asset.url, []).append(asset)
+            
+            self.download_stats['deduplicated'] = len(external_assets) - len(unique_assets)
+            if self.download_stats['deduplicated']:
+                logger.info(f"Deduplicated {self.download_stats['deduplicated']} repeated asset URLs")
+            
+            # Per-asset errors are handled inside _download_single_asset; anything
+            # escaping it is fatal and cancels the remaining downloads, and
+            # outside cancellation propagates instead of being swallowed
             semaphore = asyncio.Semaphore(3)  # Limit concurrent downloads
-            tasks = [self._download_single_asset_with_semaphore(asset, semaphore) for asset in external_assets]
-            external_results = await asyncio.gather(*tasks, return_exceptions=True)
+            tasks = []
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [
+                        tg.create_task(self._download_single_asset_with_semaphore(aliases[0], semaphore))
+                        for aliases in unique_assets.values()
+                    ]
+            except ExceptionGroup as eg:
+                logger.error(f"Asset downloads aborted: {eg.exceptions[0]}")
             
-            for result in external_results:
-                if isinstance(result, Exception):
-                    logger.error(f"Download task failed: {result}")
+            for aliases, task in zip(unique_assets.values(), tasks):
+                if task.cancelled():
                     self.download_stats['failed'] += 1
-                    results.append(self._create_error_result(str(result)))
+                    result = self._create_error_result("Download cancelled", aliases[0])
+                elif task.exception() is not None:
+                    logger.error(f"Download task failed: {task.exception()}")
+                    self.download_stats['failed'] += 1
+                    result = self._create_error_result(str(task.exception()), aliases[0])
                 else:
-                    results.append(result)
+                    result = task.result()
+                
+                # Fan the single result back out to every asset sharing the URL
+                results.append(result)
+                for alias in aliases[1:]:
+                    results.append({**result, "asset_type": alias.asset_type, "original_asset": alias})
         
-        # Process data URLs
-        for asset in data_url_assets:
-            result = await self._handle_data_url_asset(asset)
-            results.append(result)
+        # Process data URLs concurrently; errors are captured per asset
+        if data_url_assets:
+            results.extend(await asyncio.gather(
+                *(self._handle_data_url_asset(asset) for asset in data_url_assets)
+            ))
         
         # Process inline content
         for asset in inline_assets:
             result = self._handle_inline_asset(asset)
             results.append(result)
         
+        # Make sure every queued file is on disk before handing back paths. A
+        # failed write leaves nothing behind the result's path, so those
+        # results fail (and get fallbacks) like any other download error.
+        failed_writes = await self._writer.close()
+        if failed_writes:
+            write_errors = {str(path): error for path, error in failed_writes.items()}
+            for index, result in enumerate(results):
+                error = write_errors.get(result.get('local_file_path'))
+                if error is not None and result.get('success', False):
+                    results[index] = self._create_error_result(
+                        f"Failed to write file: {error}", result.get('original_asset')
+                    )
+        
         # Create fallbacks for failed downloads
         failed_results = [r for r in results if not r.get('success', False)]
         for failed_result in failed_results:
@@ -135,9 +856,33 @@ class AssetDownloaderService:
         self.download_stats['total'] = len(results)
         self.download_stats['successful'] = len([r for r in results if r.get('success', False)])
         
+        await self._write_manifest(results)
+        
         logger.info(f"Asset processing completed: {self.download_stats}")
         return results
 
+    async def _write_manifest(self, results: List[Dict[str, Any]]) -> None:
+        """Write all results and stats for the session as one manifest.json."""
+        manifest = {
+            "session_id": self.session_id,
+            "stats": self.download_stats,
+            # Inline content and asset models are already on disk or in the DOM extraction
+            "assets": [
+                {key: value for key, value in result.items() if key not in ('original_asset', 'content')}
+                for result in results
+            ]
+        }
+        
+        if ORJSON_AVAILABLE:
+            data = orjson.dumps(manifest)
+        else:
+            data = json.dumps(manifest, separators=(',', ':')).encode('utf-8')
+        
+        try:
+            await asyncio.to_thread((self.output_dir / "manifest.json").write_bytes, data)
+        except OSError as e:
+            logger.warning(f"Failed to write asset manifest: {e}")
+
     async def _download_single_asset_with_semaphore(self, asset: ExtractedAssetModel, semaphore: asyncio.Semaphore):
         """Download single asset with concurrency control."""
         async with semaphore:
@@ -155,34 +900,44 @@ class AssetDownloaderService:
             filename = self._generate_filename(url, asset)
             local_path = self.output_dir / filename
             
+            web_path = f"/static/assets/{self.session_id}/{filename}"
+            
+            # Serve fresh entries straight from the shared cache
+            cached = self._cache.lookup(url) if self._cache else None
+            if cached and cached['fresh'] and self._cache.link_into(url, local_path):
+                logger.debug(f"Asset cache hit: {url} -> {filename}")
+                self.download_stats['cached'] += 1
+                return self._create_cached_result(asset, cached, local_path, web_path)
+            
             logger.debug(f"Downloading asset: {url} -> {filename}")
             
-            # Download with retries
-            content, content_type = await self._download_with_retries(url)
+            # Download with retries, revalidating stale cache entries
+            conditional_headers = AssetCache.conditional_headers(cached) if cached else None
+            content, content_type, headers = await self._download_with_retries(url, conditional_headers)
+            
+            if content is None:
+                # 304 Not Modified: the cached payload is still current
+                if self._cache.revalidate(url, cached, headers) and self._cache.link_into(url, local_path):
+                    logger.debug(f"Asset revalidated: {url} -> {filename}")
+                    self.download_stats['revalidated'] += 1
+                    return self._create_cached_result(asset, cached, local_path, web_path)
+                
+                content, content_type, headers = await self._download_with_retries(url)
             
             if not content:
                 return self._create_error_result("No content received", asset)
             
-            # Process content if needed
-            processed_content = self._process_asset_content(content, content_type, asset)
-            
-            # Save to file
-            if asset.asset_type == 'svg' or 'svg' in content_type:
-                # Save SVG as text
-                with open(local_path, "w", encoding='utf-8') as f:
-                    if isinstance(processed_content, bytes):
-                        f.write(processed_content.decode('utf-8'))
-                    else:
-                        f.write(processed_content)
+            # Process content if needed; image decoding runs in the process
+            # pool so the event loop keeps servicing downloads
+            if needs_image_processing(content, content_type, asset.asset_type):
+                loop = asyncio.get_running_loop()
+                processed_content = await loop.run_in_executor(
+                    get_image_pool(), process_asset_content, content, content_type, asset.asset_type
+                )
             else:
-                # Save binary content
-                with open(local_path, "wb") as f:
-                    if isinstance(processed_content, bytes):
-                        f.write(processed_content)
-                    else:
-                        f.write(processed_content.encode())
+                processed_content = self._process_asset_content(content, content_type, asset)
             
-            web_path = f"/static/assets/{self.session_id}/{filename}"
+            await self._save_content(url, processed_content, content_type, headers, local_path)
             
             result = {
                 "original_url": asset.url,
@@ -190,7 +945,7 @@ class AssetDownloaderService:
                 "local_file_path": str(local_path),
                 "asset_type": asset.asset_type,
                 "content_type": content_type,
-                "file_size": len(processed_content) if isinstance(processed_content, bytes) else len(processed_content.encode()),
+                "file_size": len(processed_content),
                 "success": True,
                 "original_asset": asset
             }
@@ -203,94 +958,132 @@ class AssetDownloaderService:
             self.download_stats['failed'] += 1
             return self._create_error_result(str(e), asset)
 
-    async def _download_with_retries(self, url: str, max_retries: int = 3) -> tuple[bytes, str]:
-        """Download content with retries."""
+    def _create_cached_result(self, asset: ExtractedAssetModel, cached: Dict[str, Any],
+                              local_path: Path, web_path: str) -> Dict[str, Any]:
+        """Create a success result for an asset served from the shared cache."""
+        self.download_stats['successful'] += 1
+        return {
+            "original_url": asset.url,
+            "local_path": web_path,
+            "local_file_path": str(local_path),
+            "asset_type": asset.asset_type,
+            "content_type": cached['content_type'],
+            "file_size": cached['size'],
+            "from_cache": True,
+            "success": True,
+            "original_asset": asset
+        }
+
+    async def _save_content(self, url: str, content: bytes, content_type: str,
+                            headers: Dict[str, str], local_path: Path) -> None:
+        """Write processed content into the session directory and the shared cache."""
+        # Link to an identical file if one was already written this session
+        if self._link_duplicate_content(content, local_path):
+            return
+        
+        # Cache the payload once and hardlink it into the session directory
+        if self._cache is not None:
+            stored = await asyncio.to_thread(self._cache.store, url, content, content_type, headers)
+            if stored and self._cache.link_into(url, local_path):
+                return
+        
+        if len(content) <= SMALL_FILE_THRESHOLD:
+            self._writer.write_nowait(local_path, content)
+        else:
+            with open(local_path, "wb") as f:
+                f.write(content)
+
+    def _link_duplicate_content(self, content: bytes, local_path: Path) -> bool:
+        """
+        Link local_path to a previously written file with identical content.
+        
+        Returns:
+            True if the file was linked and no write is needed
+        """
+        digest = hashlib.blake2b(content).hexdigest()
+        existing_path = self._content_paths.get(digest)
+        
+        if existing_path is None or not existing_path.exists():
+            self._content_paths[digest] = local_path
+            return False
+        
+        if existing_path == local_path:
+            return True
+        
+        try:
+            if local_path.exists():
+                local_path.unlink()
+            os.link(existing_path, local_path)
+            logger.debug(f"Linked duplicate content {local_path.name} -> {existing_path.name}")
+            return True
+        except OSError as e:
+            logger.debug(f"Hardlink failed, writing duplicate content instead: {e}")
+            return False
+
+    async def _download_with_retries(self, url: str, conditional_headers: Optional[Dict[str, str]] = None,
+                                     max_retries: int = 3) -> tuple[Optional[bytes], str, Dict[str, str]]:
+        """
+        Download content with retries. Returns body, content type and response headers.
+        
+        When conditional_headers are given and the server answers 304 Not Modified,
+        the body is None.
+        """
         last_error = None
+        total_wait = 0.0
         
         for attempt in range(max_retries):
+            retry_after = None
             try:
-                response = await self.client.get(url)
-                response.raise_for_status()
-                
-                content_type = response.headers.get('content-type', '').lower()
-                return response.content, content_type
+                client = self._client or await get_shared_client()
+                async with client.stream("GET", url, headers=conditional_headers) as response:
+                    if response.status_code == 304 and conditional_headers:
+                        return None, response.headers.get('content-type', '').lower(), dict(response.headers)
+                    
+                    response.raise_for_status()
+                    
+                    content = await read_response_body(response)
+                    content_type = response.headers.get('content-type', '').lower()
+                    return content, content_type, dict(response.headers)
                 
             except httpx.TimeoutException as e:
                 last_error = f"Timeout on attempt {attempt + 1}: {e}"
                 logger.warning(last_error)
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
                     
             except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    raise  # Don't retry 404s
-                last_error = f"HTTP {e.response.status_code} on attempt {attempt + 1}"
+                status_code = e.response.status_code
+                if 400 <= status_code < 500 and status_code not in RETRIABLE_CLIENT_ERRORS:
+                    raise  # Don't retry client errors like 404/403
+                last_error = f"HTTP {status_code} on attempt {attempt + 1}"
                 logger.warning(last_error)
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
+                if status_code in (429, 503):
+                    retry_after = parse_retry_after(e.response.headers.get('retry-after'))
                     
             except Exception as e:
                 last_error = f"Request failed on attempt {attempt + 1}: {e}"
                 logger.warning(last_error)
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
+            
+            if attempt < max_retries - 1:
+                # Honor Retry-After, otherwise full-jitter exponential backoff
+                if retry_after is not None:
+                    delay = retry_after
+                else:
+                    delay = random.uniform(0, min(2 ** attempt, RETRY_BACKOFF_CAP))
+                
+                if total_wait + delay > RETRY_TOTAL_WAIT_CAP:
+                    last_error = f"{last_error} (retry budget of {RETRY_TOTAL_WAIT_CAP}s exhausted)"
+                    break
+                total_wait += delay
+                await asyncio.sleep(delay)
         
         raise Exception(f"Failed to download after {max_retries} attempts. Last error: {last_error}")
 
     def _process_asset_content(self, content: bytes, content_type: str, asset: ExtractedAssetModel) -> bytes:
         """Process and validate asset content."""
-        try:
-            # SVG processing
-            if 'svg' in content_type or asset.asset_type == 'svg':
-                svg_content = content.decode('utf-8')
-                # Basic SVG sanitization
-                svg_content = self._sanitize_svg(svg_content)
-                return svg_content.encode('utf-8')
-            
-            # Image processing (only if PIL is available)
-            elif PIL_AVAILABLE and (content_type.startswith('image/') or asset.asset_type == 'image'):
-                try:
-                    img = Image.open(BytesIO(content))
-                    
-                    # Resize if too large (max 2048px)
-                    max_size = 2048
-                    if max(img.size) > max_size:
-                        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                        
-                        # Save back to bytes
-                        output = BytesIO()
-                        # Convert to RGB if needed for JPEG
-                        if img.mode in ('RGBA', 'LA', 'P'):
-                            background = Image.new('RGB', img.size, (255, 255, 255))
-                            if img.mode == 'P':
-                                img = img.convert('RGBA')
-                            if img.mode in ('RGBA', 'LA'):
-                                background.paste(img, mask=img.split()[-1])
-                            else:
-                                background.paste(img)
-                            img = background
-                        
-                        img.save(output, format='JPEG', quality=85, optimize=True)
-                        return output.getvalue()
-                    
-                except Exception as e:
-                    logger.warning(f"Image processing failed: {e}")
-                    # Return original content if processing fails
-                    pass
-            
-            return content
-            
-        except Exception as e:
-            logger.warning(f"Content processing failed: {e}")
-            return content
+        return process_asset_content(content, content_type, asset.asset_type)
 
     def _sanitize_svg(self, svg_content: str) -> str:
         """Basic SVG sanitization."""
-        # Remove script tags and event handlers
-        svg_content = re.sub(r'<script[^>]*>.*?</script>', '', svg_content, flags=re.DOTALL | re.IGNORECASE)
-        svg_content = re.sub(r'on\w+\s*=\s*["\'][^"\']*["\']', '', svg_content, flags=re.IGNORECASE)
-        svg_content = re.sub(r'javascript:', '', svg_content, flags=re.IGNORECASE)
-        return svg_content
+        return sanitize_svg(svg_content)
 
     async def _handle_data_url_asset(self, asset: ExtractedAssetModel) -> Dict[str, Any]:
         """Handle data URL assets."""
@@ -303,20 +1096,18 @@ class AssetDownloaderService:
             mime_type = header.split(';')[0].split(':')[1] if ':' in header else 'application/octet-stream'
             is_base64 = 'base64' in header
             
-            # Decode content
-            if is_base64:
-                content = base64.b64decode(data)
-            else:
-                content = unquote(data).encode('utf-8')
+            # Decode content off the event loop; large sprites can take tens of ms
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, decode_data_url_payload, data, is_base64)
             
             # Generate filename
             ext = mimetypes.guess_extension(mime_type) or '.bin'
-            filename = f"data_{hashlib.md5(asset.url.encode()).hexdigest()[:8]}{ext}"
+            filename = f"data_{short_hash(asset.url.encode('utf-8', 'ignore'))}{ext}"
             local_path = self.output_dir / filename
             
             # Save content
-            with open(local_path, "wb") as f:
-                f.write(content)
+            async with aiofiles.open(local_path, "wb") as f:
+                await f.write(content)
             
             web_path = f"/static/assets/{self.session_id}/{filename}"
             
@@ -346,13 +1137,15 @@ class AssetDownloaderService:
                 svg_content = self._sanitize_svg(asset.content)
                 
                 # Generate filename
-                content_hash = hashlib.md5(svg_content.encode()).hexdigest()[:8]
+                svg_bytes = svg_content.encode('utf-8')
+                content_hash = short_hash(svg_bytes)
                 filename = f"inline_svg_{content_hash}.svg"
                 local_path = self.output_dir / filename
                 
-                # Save SVG
-                with open(local_path, "w", encoding='utf-8') as f:
-                    f.write(svg_content)
+                # Save SVG through the batched writer, once per unique icon
+                if filename not in self._inline_paths:
+                    self._inline_paths.add(filename)
+                    self._writer.write_nowait(local_path, svg_bytes)
                 
                 web_path = f"/static/assets/{self.session_id}/{filename}"
                 
@@ -365,7 +1158,7 @@ class AssetDownloaderService:
                     "content": svg_content,
                     "asset_type": "svg",
                     "content_type": "image/svg+xml",
-                    "file_size": len(svg_content.encode()),
+                    "file_size": len(svg_bytes),
                     "is_inline": True,
                     "success": True,
                     "original_asset": asset
@@ -382,22 +1175,23 @@ class AssetDownloaderService:
         if not url:
             return None
         
+        url_kind = classify_url(url)
+        
         # Handle protocol-relative URLs
-        if url.startswith('//'):
-            url = 'https:' + url
+        if url_kind == _URL_PROTOCOL_RELATIVE:
+            return 'https:' + url
         
         # Handle relative URLs - CONVERT TO ABSOLUTE
-        if url.startswith('/') and not url.startswith('//'):
-            if base_url:
-                from urllib.parse import urljoin
-                url = urljoin(base_url, url)
-                logger.info(f"Converted relative URL to absolute: {url}")
-            else:
+        if url_kind == _URL_RELATIVE:
+            if not base_url:
                 logger.warning(f"Relative URL found but no base_url provided: {url}")
                 return None
+            url = urljoin(base_url, url)
+            logger.info(f"Converted relative URL to absolute: {url}")
+            url_kind = classify_url(url)
         
         # Basic URL validation
-        if not url.startswith(('http://', 'https://', 'data:')):
+        if url_kind not in (_URL_ABSOLUTE, _URL_DATA):
             logger.warning(f"Invalid URL scheme: {url}")
             return None
         
@@ -405,7 +1199,7 @@ class AssetDownloaderService:
 
     def _generate_filename(self, url: str, asset: ExtractedAssetModel) -> str:
         """Generate filename with proper extension detection."""
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
+        url_hash = short_hash(url.encode('utf-8', 'ignore'))
         
         # Try to determine extension from URL
         parsed_url = urlparse(url)
@@ -492,10 +1286,6 @@ class AssetDownloaderService:
         
         return None
 
-    async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
-
     def get_stats(self) -> Dict[str, Any]:
         """Get download statistics."""
         return self.download_stats.copy()
\ No newline at end of file
@@ -1,8 +1,12 @@
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Tuple, Union
 import asyncio
+import functools
 import logging
-from contextlib import asynccontextmanager
+import random
+import threading
+import time
 from enum import Enum
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from ..config import settings
 from ..core.exceptions import (
@@ -11,11 +15,14 @@ from ..core.exceptions import (
     ConfigurationError
 )
 from ..utils.logger import get_logger
-from .browser_service import BrowserService
+from .browser_service import BrowserService, settle_network
 from .cloud_browser import CloudBrowserService
 
 logger = get_logger(__name__)
 
+# Base delay in seconds for backing off between cloud browser attempts
+RETRY_BASE_DELAY = 0.2
+
 
 class BrowserType(str, Enum):
     """Enumeration of browser types."""
@@ -24,6 +31,37 @@ class BrowserType(str, Enum):
     AUTO = "auto"
 
 
+@functools.lru_cache(maxsize=8)
+def _select_browser_type(
+    preferred: BrowserType,
+    use_cloud: bool,
+    api_key: Optional[str],
+    project_id: Optional[str]
+) -> BrowserType:
+    """
+    Resolve the browser type for a preference and configuration snapshot.
+    
+    Memoized so repeated (re)initialization does not redo the selection or
+    repeat its log lines.
+    """
+    # If explicitly set to local or cloud, respect that choice
+    if preferred in [BrowserType.LOCAL, BrowserType.CLOUD]:
+        return preferred
+    
+    # Auto selection based on configuration
+    if use_cloud:
+        # Check if cloud browser is properly configured
+        if api_key and project_id:
+            logger.info("Auto-selecting cloud browser (Browserbase configured)")
+            return BrowserType.CLOUD
+        else:
+            logger.warning("Cloud browser requested but not properly configured, falling back to local")
+            return BrowserType.LOCAL
+    else:
+        logger.info("Auto-selecting local browser")
+        return BrowserType.LOCAL
+
+
 class BrowserManager:
     """
     Manages browser services with automatic fallback between cloud and local browsers.
@@ -40,6 +78,12 @@ class BrowserManager:
         self._current_service: Optional[Union[BrowserService, CloudBrowserService]] = None
         self._service_type: Optional[BrowserType] = None
         self._is_initialized = False
+        self._caps: Dict[str, bool] = {}
+        self._health_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._health_ttl: float = settings.BROWSER_HEALTH_CACHE_TTL
+        self._health_lock = asyncio.Lock()
+        self._last_deep_probe: Optional[float] = None
+        self._prewarm_task: Optional[asyncio.Task] = None
         
     def _determine_browser_type(self) -> BrowserType:
         """
@@ -48,23 +92,12 @@ class BrowserManager:
         Returns:
             BrowserType to use
         """
-        # If explicitly set to local or cloud, respect that choice
-        if self.preferred_type in [BrowserType.LOCAL, BrowserType.CLOUD]:
-            return self.preferred_type
-        
-        # Auto selection based on configuration
-        if getattr(settings, 'USE_CLOUD_BROWSER', False):
-            # Check if cloud browser is properly configured
-            if (hasattr(settings, 'BROWSERBASE_API_KEY') and settings.BROWSERBASE_API_KEY and
-                hasattr(settings, 'BROWSERBASE_PROJECT_ID') and settings.BROWSERBASE_PROJECT_ID):
-                logger.info("Auto-selecting cloud browser (Browserbase configured)")
-                return BrowserType.CLOUD
-            else:
-                logger.warning("Cloud browser requested but not properly configured, falling back to local")
-                return BrowserType.LOCAL
-        else:
-            logger.info("Auto-selecting local browser")
-            return BrowserType.LOCAL
+        return _select_browser_type(
+            self.preferred_type,
+            getattr(settings, 'USE_CLOUD_BROWSER', False),
+            getattr(settings, 'BROWSERBASE_API_KEY', None),
+            getattr(settings, 'BROWSERBASE_PROJECT_ID', None)
+        )
     
     async def initialize(self, force_type: Optional[BrowserType] = None) -> None:
         """
@@ -76,9 +109,17 @@ class BrowserManager:
         Raises:
             BrowserConnectionError: If initialization fails
         """
-        if self._is_initialized and not force_type:
-            logger.warning("Browser manager already initialized")
-            return
+        await self._await_prewarm()
+        
+        if self._is_initialized:
+            if not force_type:
+                logger.warning("Browser manager already initialized")
+                return
+            if force_type == self._service_type:
+                logger.debug("Browser manager already using %s browser", force_type.value)
+                return
+            # Switching browser types: release the old service rather than leak it
+            await self.cleanup()
         
         # Determine browser type
         browser_type = force_type or self._determine_browser_type()
@@ -92,11 +133,18 @@ class BrowserManager:
             else:
                 self._current_service = BrowserService()
             
-            # Initialize the service
-            await self._current_service.initialize()
+            self._caps = self._probe_capabilities(self._current_service)
+            
+            # Initialize the service, retrying transient cloud failures before falling back
+            if browser_type == BrowserType.CLOUD:
+                await self._retry(self._current_service.initialize)
+            else:
+                await self._current_service.initialize()
             
             self._service_type = browser_type
             self._is_initialized = True
+            self._health_cache = None
+            self._last_deep_probe = None
             
             logger.info(f"Browser manager initialized successfully with {browser_type.value} browser")
             
@@ -117,6 +165,75 @@ class BrowserManager:
             else:
                 raise BrowserConnectionError(f"Browser initialization failed: {str(e)}")
     
+    def start_prewarm(self) -> asyncio.Task:
+        """
+        Start initializing the browser in the background.
+        
+        Called at application startup so the first request finds a warm browser
+        instead of paying the launch cost itself.
+        
+        Returns:
+            The background prewarm task
+        """
+        if self._prewarm_task is None or self._prewarm_task.done():
+            self._prewarm_task = asyncio.create_task(self.prewarm())
+        return self._prewarm_task
+    
+    async def prewarm(self) -> None:
+        """Initialize the browser, logging rather than raising on failure."""
+        try:
+            await self.initialize()
+            logger.info("Browser manager prewarmed successfully")
+        except Exception as e:
+            logger.warning(f"Browser prewarm failed: {str(e)}")
+            logger.info("Browser will be initialized on first use")
+    
+    async def _await_prewarm(self) -> None:
+        """Wait for a pending prewarm so callers do not launch a second browser."""
+        task = self._prewarm_task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            await asyncio.shield(task)
+    
+    async def _retry(self, coro_factory, retries: Optional[int] = None, base: float = RETRY_BASE_DELAY):
+        """
+        Await coro_factory() with jittered exponential backoff on transient errors.
+        
+        Inputs:
+            coro_factory: Zero-argument callable returning a fresh awaitable per attempt
+            retries: Total attempts, defaults to BROWSER_INIT_RETRIES
+            base: Base delay in seconds, doubled after each failed attempt
+            
+        Returns:
+            Result of the first successful attempt
+            
+        Raises:
+            The last error once all attempts are exhausted
+        """
+        attempts = max(1, retries if retries is not None else settings.BROWSER_INIT_RETRIES)
+        
+        for attempt in range(attempts):
+            try:
+                return await coro_factory()
+            except (BrowserError, PlaywrightTimeoutError) as e:
+                if attempt == attempts - 1:
+                    raise
+                delay = base * 2 ** attempt + random.uniform(0, base)
+                logger.warning(
+                    f"Cloud browser attempt {attempt + 1}/{attempts} failed: {str(e)}; "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _probe_capabilities(service) -> Dict[str, bool]:
+        """Record which optional methods a service implements, once per service."""
+        return {
+            "navigate": hasattr(service, 'navigate_to_url'),
+            "wait": hasattr(service, 'wait_for_page_load'),
+            "browser_info": hasattr(service, 'get_browser_info'),
+            "session_info": hasattr(service, 'get_session_info'),
+        }
+    
     async def _fallback_to_local(self) -> None:
         """Fallback to local browser service."""
         logger.info("Falling back to local browser")
@@ -130,9 +247,12 @@ class BrowserManager:
         
         # Initialize local service
         self._current_service = BrowserService()
+        self._caps = self._probe_capabilities(self._current_service)
         await self._current_service.initialize()
         self._service_type = BrowserType.LOCAL
         self._is_initialized = True
+        self._health_cache = None
+        self._last_deep_probe = None
         
         logger.info("Successfully fell back to local browser")
     
@@ -146,10 +266,14 @@ class BrowserManager:
         Returns:
             BrowserContext from the active service
         """
+        await self._await_prewarm()
+        
         if not self._is_initialized or not self._current_service:
             raise BrowserError("Browser manager not initialized")
         
         try:
+            if self._service_type == BrowserType.CLOUD:
+                return await self._retry(lambda: self._current_service.create_context(**context_options))
             return await self._current_service.create_context(**context_options)
         except Exception as e:
             logger.error(f"Failed to create context with {self._service_type.value} browser: {str(e)}")
@@ -181,52 +305,72 @@ class BrowserManager:
         
         return await self._current_service.create_page(context)
     
-    @asynccontextmanager
-    async def page_context(self, **context_options):
+    def page_context(self, **context_options):
         """
         Context manager for browser pages with automatic cleanup.
         
+        Returns the active service's own context manager so callers bind to it
+        directly without an extra wrapping layer.
+        
         Inputs:
             **context_options: Context configuration options
             
-        Yields:
-            Page instance from the active service
+        Returns:
+            Async context manager yielding a Page from the active service
+            
+        Raises:
+            BrowserError: If the manager is not initialized
         """
         if not self._is_initialized or not self._current_service:
             raise BrowserError("Browser manager not initialized")
         
-        async with self._current_service.page_context(**context_options) as page:
-            yield page
+        return self._current_service.page_context(**context_options)
     
-    async def navigate_to_url(self, page, url: str, wait_for: str = "networkidle") -> None:
+    async def navigate_to_url(
+        self,
+        page,
+        url: str,
+        wait_for: str = "domcontentloaded",
+        settle_ms: int = 0
+    ) -> None:
         """
         Navigate to URL using the current service.
         
         Inputs:
             page: Browser page instance
             url: URL to navigate to
-            wait_for: Wait condition
+            wait_for: Wait condition; pass 'networkidle' for full network quiescence
+            settle_ms: Optional soft wait for networkidle after navigation, in milliseconds
         """
-        if hasattr(self._current_service, 'navigate_to_url'):
-            await self._current_service.navigate_to_url(page, url, wait_for)
+        if self._caps.get("navigate"):
+            await self._current_service.navigate_to_url(page, url, wait_for, settle_ms=settle_ms)
         else:
             # Fallback to direct page navigation
             await page.goto(url, wait_until=wait_for)
+            await settle_network(page, settle_ms)
     
-    async def wait_for_page_load(self, page, timeout: Optional[int] = None) -> None:
+    async def wait_for_page_load(
+        self,
+        page,
+        timeout: Optional[int] = None,
+        settle_selector: Optional[str] = None
+    ) -> None:
         """
         Wait for page load using the current service.
         
         Inputs:
             page: Browser page instance
             timeout: Optional timeout in seconds
+            settle_selector: Optional selector that marks dynamic content as rendered
         """
-        if hasattr(self._current_service, 'wait_for_page_load'):
-            await self._current_service.wait_for_page_load(page, timeout)
+        if self._caps.get("wait"):
+            await self._current_service.wait_for_page_load(page, timeout, settle_selector=settle_selector)
         else:
             # Fallback to basic page load waiting
             timeout_ms = (timeout or 30) * 1000
             await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+            if settle_selector:
+                await page.wait_for_selector(settle_selector, state="attached", timeout=timeout_ms)
     
     async def get_service_info(self) -> Dict[str, Any]:
         """
@@ -242,9 +386,9 @@ class BrowserManager:
             }
         
         # Get service-specific info
-        if hasattr(self._current_service, 'get_browser_info'):
+        if self._caps.get("browser_info"):
             service_info = await self._current_service.get_browser_info()
-        elif hasattr(self._current_service, 'get_session_info'):
+        elif self._caps.get("session_info"):
             service_info = await self._current_service.get_session_info()
         else:
             service_info = {"status": "unknown"}
@@ -255,20 +399,88 @@ class BrowserManager:
             "service_info": service_info
         }
     
-    async def health_check(self) -> Dict[str, Any]:
+    async def health_check(self, force: bool = False) -> Dict[str, Any]:
         """
         Perform a health check on the current browser service.
         
+        Probe results are cached for BROWSER_HEALTH_CACHE_TTL seconds so that
+        frequent polling does not open a context and page on every call.
+        
+        Inputs:
+            force: Bypass the cached result and run a fresh full page probe
+            
         Returns:
             Dict containing health status
         """
-        try:
-            if not self._is_initialized or not self._current_service:
-                return {
-                    "healthy": False,
-                    "error": "Browser manager not initialized"
-                }
+        if not self._is_initialized or not self._current_service:
+            return {
+                "healthy": False,
+                "error": "Browser manager not initialized"
+            }
+        
+        if not force:
+            cached = self._cached_health()
+            if cached is not None:
+                return cached
+        
+        async with self._health_lock:
+            # Another caller may have refreshed the cache while we waited
+            if not force:
+                cached = self._cached_health()
+                if cached is not None:
+                    return cached
             
+            result = await self._probe_health(deep=force)
+            self._health_cache = (time.monotonic(), result)
+            return result
+    
+    def _cached_health(self) -> Optional[Dict[str, Any]]:
+        """Return the cached health result if it is still within its TTL."""
+        if self._health_cache is None:
+            return None
+        
+        checked_at, result = self._health_cache
+        if time.monotonic() - checked_at < self._health_ttl:
+            return result
+        return None
+    
+    async def _probe_health(self, deep: bool = False) -> Dict[str, Any]:
+        """
+        Check the current service, preferring a cheap connection check.
+        
+        A full page probe runs when forced, when the service exposes no browser
+        handle, when the browser reports it is disconnected, or once every
+        BROWSER_DEEP_HEALTH_INTERVAL seconds.
+        """
+        browser = getattr(self._current_service, '_browser', None)
+        now = time.monotonic()
+        deep_due = (
+            deep
+            or self._last_deep_probe is None
+            or now - self._last_deep_probe >= settings.BROWSER_DEEP_HEALTH_INTERVAL
+        )
+        
+        if browser is not None and not deep_due:
+            try:
+                if browser.is_connected():
+                    return {
+                        "healthy": True,
+                        "service_type": self._service_type.value,
+                        "test_result": "connected",
+                        "probe": "shallow",
+                        "browser_version": browser.version
+                    }
+            except Exception as e:
+                logger.warning(f"Shallow browser health check failed, running full probe: {str(e)}")
+        
+        result = await self._probe_page()
+        if result["healthy"]:
+            self._last_deep_probe = now
+        return result
+    
+    async def _probe_page(self) -> Dict[str, Any]:
+        """Open a page on the current service to verify it works end to end."""
+        try:
             # Test basic functionality
             async with self.page_context() as page:
                 # Try to navigate to a simple test page
@@ -279,6 +491,7 @@ class BrowserManager:
                 "healthy": True,
                 "service_type": self._service_type.value,
                 "test_result": "success",
+                "probe": "deep",
                 "title_retrieved": bool(title)
             }
             
@@ -294,6 +507,15 @@ class BrowserManager:
         """Clean up browser manager resources."""
         logger.info("Cleaning up browser manager")
         
+        task = self._prewarm_task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._prewarm_task = None
+        
         if self._current_service:
             try:
                 await self._current_service.cleanup()
@@ -305,6 +527,9 @@ class BrowserManager:
         
         self._is_initialized = False
         self._service_type = None
+        self._caps = {}
+        self._health_cache = None
+        self._last_deep_probe = None
         logger.info("Browser manager cleanup completed")
     
     async def __aenter__(self):
@@ -317,5 +542,23 @@ class BrowserManager:
         await self.cleanup()
 
 
-# Global browser manager instance
-browser_manager = BrowserManager()
\ No newline at end of file
+# Global instance, created lazily on first use so importing this module stays cheap
+_browser_manager: Optional[BrowserManager] = None
+_browser_manager_lock = threading.Lock()
+
+
+def get_browser_manager() -> BrowserManager:
+    """Return the global BrowserManager instance, creating it on first call."""
+    global _browser_manager
+    if _browser_manager is None:
+        with _browser_manager_lock:
+            if _browser_manager is None:
+                _browser_manager = BrowserManager()
+    return _browser_manager
+
+
+def __getattr__(name: str):
+    # PEP 562 shim so `from .browser_manager import browser_manager` keeps working
+    if name == "browser_manager":
+        return get_browser_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
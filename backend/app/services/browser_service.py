@@ -1,7 +1,9 @@
 from typing import Optional, Dict, Any, List, Union
 import asyncio
+import functools
 import logging
-from contextlib import asynccontextmanager
+import threading
+import weakref
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright_stealth import stealth_async
@@ -13,6 +15,110 @@ from ..utils.browser import get_random_user_agent
 
 logger = get_logger(__name__)
 
+# Chromium flags that trim memory and background work irrelevant to scraping
+CHROMIUM_LEAN_ARGS = (
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-breakpad",
+    "--disable-component-update",
+    "--disable-features=TranslateUI,BlinkGenPropertyTrees,IsolateOrigins,site-per-process",
+    "--disable-ipc-flooding-protection",
+    "--disable-renderer-backgrounding",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--mute-audio",
+)
+
+
+async def _block_router(blocked_types: frozenset, route, request) -> None:
+    """Abort requests for blocked resource types before any bytes are fetched."""
+    if request.resource_type in blocked_types:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def settle_network(page: Page, settle_ms: int) -> None:
+    """Give the network up to settle_ms to go idle, without failing if it never does."""
+    if settle_ms <= 0:
+        return
+    
+    try:
+        await page.wait_for_load_state("networkidle", timeout=settle_ms)
+    except PlaywrightTimeoutError:
+        logger.debug("Network did not settle within %d ms, continuing", settle_ms)
+
+
+class _PageContext:
+    """
+    Async context manager behind BrowserService.page_context.
+    
+    Written as a plain class rather than with @asynccontextmanager to avoid
+    building a generator per page on the hot page-open path.
+    """
+    
+    __slots__ = ("_service", "_options", "_context", "_page")
+    
+    def __init__(self, service: "BrowserService", options: Dict[str, Any]):
+        self._service = service
+        self._options = options
+        self._context: Optional[BrowserContext] = None
+        self._page: Optional[Page] = None
+    
+    async def __aenter__(self) -> Page:
+        try:
+            self._context = await self._service._acquire_context(**self._options)
+            self._page = await self._service.create_page(self._context)
+        except Exception as e:
+            await self._close()
+            raise self._translate_error(e) from e
+        except BaseException:
+            await self._close()
+            raise
+        return self._page
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
+        await self._close()
+        if isinstance(exc_val, Exception):
+            raise self._translate_error(exc_val) from exc_val
+        return False
+    
+    @staticmethod
+    def _translate_error(error: Exception) -> BrowserError:
+        """Map an error raised inside the page context to a browser exception."""
+        if isinstance(error, PlaywrightTimeoutError):
+            logger.error(f"Browser operation timed out: {str(error)}")
+            return BrowserTimeoutError(f"Operation timed out: {str(error)}")
+        
+        logger.error(f"Error in page context: {str(error)}")
+        return BrowserError(f"Page context error: {str(error)}")
+    
+    async def _close(self) -> None:
+        """Close the page, then recycle or close the context."""
+        page, context = self._page, self._context
+        self._page = None
+        self._context = None
+        
+        if context is None:
+            return
+        
+        if page is not None and not self._options:
+            # Pooled context: only the page goes away, the context is reused
+            try:
+                await page.close()
+                logger.debug("Page closed successfully")
+            except Exception as e:
+                logger.warning(f"Error closing page: {str(e)}")
+            else:
+                await self._service._release_context(context)
+                return
+        
+        # Closing the context also closes any page it still owns, so a separate
+        # page.close() round-trip is skipped here
+        await self._service._close_context(context)
+
 
 class BrowserService:
     """
@@ -25,9 +131,21 @@ class BrowserService:
     def __init__(self):
         self._playwright: Optional[Playwright] = None
         self._browser: Optional[Browser] = None
-        self._contexts: List[BrowserContext] = []
+        # Weak so a context that is never explicitly closed does not stay pinned here
+        self._contexts: "weakref.WeakSet[BrowserContext]" = weakref.WeakSet()
+        self._context_pool: asyncio.Queue = asyncio.Queue(maxsize=settings.BROWSER_POOL_SIZE)
+        self._pool_size = settings.BROWSER_POOL_SIZE
+        self._ctx_sem = asyncio.Semaphore(settings.BROWSER_MAX_CONCURRENT_CONTEXTS or 8)
+        self._inflight_creations = 0
+        self._version_cache: Optional[str] = None
         self._is_initialized = False
         
+        # Resolved once; these are read on every context, page and navigation
+        self._viewport_width = getattr(settings, 'BROWSER_VIEWPORT_WIDTH', 1920)
+        self._viewport_height = getattr(settings, 'BROWSER_VIEWPORT_HEIGHT', 1080)
+        self._timeout_ms = getattr(settings, 'BROWSER_TIMEOUT', 30) * 1000
+        self._navigation_timeout_ms = getattr(settings, 'BROWSER_NAVIGATION_TIMEOUT', 30) * 1000
+        
     async def initialize(self) -> None:
         """Initialize the browser service with Playwright."""
         if self._is_initialized:
@@ -41,8 +159,8 @@ class BrowserService:
             # Launch browser based on configuration
             browser_type = getattr(self._playwright, settings.BROWSER_TYPE)
             
-            launch_options = self._get_launch_options()
-            self._browser = await browser_type.launch(**launch_options)
+            self._browser = await browser_type.launch(**self._launch_options)
+            self._version_cache = self._browser.version
             
             self._is_initialized = True
             logger.info(f"Browser service initialized successfully with {settings.BROWSER_TYPE}")
@@ -52,6 +170,11 @@ class BrowserService:
             await self.cleanup()
             raise BrowserConnectionError(f"Browser initialization failed: {str(e)}")
     
+    @functools.cached_property
+    def _launch_options(self) -> Dict[str, Any]:
+        """Launch options built once per service; treat as read-only."""
+        return self._get_launch_options()
+    
     def _get_launch_options(self) -> Dict[str, Any]:
         """Get browser launch options based on configuration."""
         options = {
@@ -66,6 +189,12 @@ class BrowserService:
             ]
         }
         
+        # Switch off Chromium subsystems a scraping session never uses
+        if settings.BROWSER_TYPE == "chromium":
+            options["args"].extend(CHROMIUM_LEAN_ARGS)
+            if settings.BROWSER_BLOCK_IMAGES:
+                options["args"].append("--blink-settings=imagesEnabled=false")
+        
         # Add viewport size if specified
         if hasattr(settings, 'BROWSER_VIEWPORT_WIDTH') and hasattr(settings, 'BROWSER_VIEWPORT_HEIGHT'):
             options["args"].extend([
@@ -103,8 +232,8 @@ class BrowserService:
             # Default context options
             default_options = {
                 "viewport": {
-                    "width": getattr(settings, 'BROWSER_VIEWPORT_WIDTH', 1920),
-                    "height": getattr(settings, 'BROWSER_VIEWPORT_HEIGHT', 1080)
+                    "width": self._viewport_width,
+                    "height": self._viewport_height
                 },
                 # Use a random agent for sttealth
                 "user_agent": get_random_user_agent(settings.USER_AGENTS),
@@ -116,10 +245,24 @@ class BrowserService:
             # Merge with provided options
             options = {**default_options, **context_options}
             
-            context = await self._browser.new_context(**options)
-            self._contexts.append(context)
-            
-            logger.debug(f"Created new browser context (total: {len(self._contexts)}) using user agent: {options['user_agent']}")
+            # Bound concurrent creation so bursts queue instead of thrashing Chromium
+            async with self._ctx_sem:
+                self._inflight_creations += 1
+                try:
+                    context = await self._browser.new_context(**options)
+                    self._contexts.add(context)
+                    
+                    if settings.BROWSER_BLOCK_RESOURCES:
+                        blocked_types = frozenset(settings.BROWSER_BLOCK_RESOURCES)
+                        await context.route("**/*", functools.partial(_block_router, blocked_types))
+                finally:
+                    self._inflight_creations -= 1
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Created new browser context (total: %d) using user agent: %s",
+                    len(self._contexts), options['user_agent']
+                )
             return context
             
         except Exception as e:
@@ -143,95 +286,126 @@ class BrowserService:
             if context is None:
                 context = await self.create_context()
             
-            page = await context.new_page()
+            # Acquired after create_context so a single call never holds two slots
+            async with self._ctx_sem:
+                self._inflight_creations += 1
+                try:
+                    page = await context.new_page()
+                finally:
+                    self._inflight_creations -= 1
             
             # Set default timeouts
-            page.set_default_timeout(getattr(settings, 'BROWSER_TIMEOUT', 30) * 1000)
-            page.set_default_navigation_timeout(getattr(settings, 'BROWSER_NAVIGATION_TIMEOUT', 30) * 1000)
+            page.set_default_timeout(self._timeout_ms)
+            page.set_default_navigation_timeout(self._navigation_timeout_ms)
             
             # Apply playwright-stealth plugin
             if settings.USE_STEALTH_PLUGIN:
                 await stealth_async(page)
                 logger.debug("Applied playwright-stealth to new page")
 
-            logger.debug("Created new browser page")
             return page
             
         except Exception as e:
             logger.error(f"Failed to create browser page: {str(e)}")
             raise BrowserError(f"Page creation failed: {str(e)}")
     
-    @asynccontextmanager
-    async def page_context(self, **context_options):
+    async def _acquire_context(self, **context_options) -> BrowserContext:
         """
-        Context manager for creating and cleaning up browser pages.
+        Check out a browser context for a page.
+        
+        Contexts with default options are reused from the warm pool when one is
+        available; custom options always get a dedicated context.
         
         Inputs:
             **context_options: Browser context configuration options
             
-        Yields:
-            Page: Browser page instance
+        Returns:
+            BrowserContext: Pooled or newly created context
+        """
+        if not context_options:
+            try:
+                return self._context_pool.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        
+        return await self.create_context(**context_options)
+    
+    async def _release_context(self, context: BrowserContext) -> None:
         """
-        context = None
-        page = None
+        Return a default-options context to the pool, closing it if the pool is full.
         
+        Inputs:
+            context: Context previously obtained from _acquire_context
+        """
+        if self._is_initialized and not self._context_pool.full():
+            try:
+                await context.clear_cookies()
+                self._context_pool.put_nowait(context)
+                logger.debug("Context returned to pool")
+                return
+            except Exception as e:
+                logger.warning(f"Error resetting pooled context: {str(e)}")
+        
+        await self._close_context(context)
+    
+    async def _close_context(self, context: BrowserContext) -> None:
+        """Close a context and stop tracking it."""
         try:
-            context = await self.create_context(**context_options)
-            page = await self.create_page(context)
-            yield page
-            
-        except PlaywrightTimeoutError as e:
-            logger.error(f"Browser operation timed out: {str(e)}")
-            raise BrowserTimeoutError(f"Operation timed out: {str(e)}")
-            
+            await context.close()
+            self._contexts.discard(context)
+            logger.debug("Context closed successfully")
         except Exception as e:
-            logger.error(f"Error in page context: {str(e)}")
-            raise BrowserError(f"Page context error: {str(e)}")
-            
-        finally:
-            # Cleanup page and context
-            if page:
-                try:
-                    await page.close()
-                    logger.debug("Page closed successfully")
-                except Exception as e:
-                    logger.warning(f"Error closing page: {str(e)}")
+            logger.warning(f"Error closing context: {str(e)}")
+    
+    def page_context(self, **context_options) -> "_PageContext":
+        """
+        Context manager for creating and cleaning up browser pages.
+        
+        Only the page is closed on exit; default-options contexts go back to the
+        pool so the next caller skips context startup.
+        
+        Inputs:
+            **context_options: Browser context configuration options
             
-            if context:
-                try:
-                    await context.close()
-                    if context in self._contexts:
-                        self._contexts.remove(context)
-                    logger.debug("Context closed successfully")
-                except Exception as e:
-                    logger.warning(f"Error closing context: {str(e)}")
+        Returns:
+            _PageContext: Async context manager yielding a Page
+        """
+        return _PageContext(self, context_options)
     
-    async def navigate_to_url(self, page: Page, url: str, wait_for: str = "networkidle") -> None:
+    async def navigate_to_url(
+        self,
+        page: Page,
+        url: str,
+        wait_for: str = "domcontentloaded",
+        settle_ms: int = 0
+    ) -> None:
         """
         Navigate to a URL with error handling and wait conditions.
         
         Inputs:
             page: Browser page instance
             url: URL to navigate to
-            wait_for: Wait condition ('load', 'domcontentloaded', 'networkidle')
+            wait_for: Wait condition ('load', 'domcontentloaded', 'networkidle');
+                pass 'networkidle' explicitly when full network quiescence is needed
+            settle_ms: Optional soft wait for networkidle after navigation, in milliseconds
             
         Raises:
             BrowserTimeoutError: If navigation times out
             BrowserError: If navigation fails
         """
         try:
-            logger.info(f"Navigating to URL: {url}")
+            logger.info("Navigating to URL: %s", url)
 
             # Special handling for special URLs that don't return response objects
             if url.startswith(("about:", "data:", "file:")):
                 await page.goto(url, wait_until="load")  # Use 'load' instead of 'networkidle'
-                logger.info(f"Successfully navigated to special URL: {url}")
+                logger.info("Successfully navigated to special URL: %s", url)
                 return
             
             response = await page.goto(
                 url,
                 wait_until=wait_for,
-                timeout=getattr(settings, 'BROWSER_NAVIGATION_TIMEOUT', 30) * 1000
+                timeout=self._navigation_timeout_ms
             )
             
             if response is None:
@@ -240,7 +414,9 @@ class BrowserService:
             if not response.ok:
                 logger.warning(f"Navigation returned non-OK status: {response.status}")
             
-            logger.info(f"Successfully navigated to {url} (status: {response.status})")
+            logger.info("Successfully navigated to %s (status: %s)", url, response.status)
+            
+            await settle_network(page, settle_ms)
             
         except PlaywrightTimeoutError as e:
             logger.error(f"Navigation timeout for {url}: {str(e)}")
@@ -250,25 +426,32 @@ class BrowserService:
             logger.error(f"Navigation failed for {url}: {str(e)}")
             raise BrowserError(f"Navigation to {url} failed: {str(e)}")
     
-    async def wait_for_page_load(self, page: Page, timeout: Optional[int] = None) -> None:
+    async def wait_for_page_load(
+        self,
+        page: Page,
+        timeout: Optional[int] = None,
+        settle_selector: Optional[str] = None
+    ) -> None:
         """
         Wait for page to be fully loaded with custom timeout.
         
         Inputs:
             page: Browser page instance
             timeout: Optional timeout in seconds
+            settle_selector: Optional selector that marks dynamic content as rendered
             
         Raises:
             BrowserTimeoutError: If page load times out
         """
-        timeout_ms = (timeout or getattr(settings, 'BROWSER_TIMEOUT', 30)) * 1000
+        timeout_ms = timeout * 1000 if timeout else self._timeout_ms
         
         try:
             # Wait for network to be idle
             await page.wait_for_load_state("networkidle", timeout=timeout_ms)
             
-            # Additional wait for any dynamic content
-            await page.wait_for_timeout(1000)  # 1 second buffer
+            # Wait on an explicit signal for dynamic content instead of a fixed sleep
+            if settle_selector:
+                await page.wait_for_selector(settle_selector, state="attached", timeout=timeout_ms)
             
             logger.debug("Page fully loaded")
             
@@ -287,13 +470,16 @@ class BrowserService:
             return {"status": "not_initialized"}
         
         try:
-            version = self._browser.version
+            # The version never changes for a launched browser
+            if self._version_cache is None:
+                self._version_cache = self._browser.version
             return {
                 "status": "initialized",
                 "browser_type": settings.BROWSER_TYPE,
-                "version": version,
+                "version": self._version_cache,
                 "headless": settings.BROWSER_HEADLESS,
                 "contexts_count": len(self._contexts),
+                "inflight_creations": self._inflight_creations,
                 "is_connected": self._browser.is_connected()
             }
         except Exception as e:
@@ -304,13 +490,26 @@ class BrowserService:
         """Clean up browser resources."""
         logger.info("Cleaning up browser service")
         
-        # Close all contexts
-        for context in self._contexts[:]:  # Create a copy to iterate
+        # Drain the warm pool; pooled contexts are also tracked in self._contexts
+        while not self._context_pool.empty():
+            context = self._context_pool.get_nowait()
+            self._contexts.add(context)
+        
+        # Close all contexts concurrently; each close is an independent round-trip
+        contexts = list(self._contexts)
+        if contexts:
             try:
-                await context.close()
-                self._contexts.remove(context)
+                results = await asyncio.gather(
+                    *(context.close() for context in contexts),
+                    return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        logger.warning(f"Error closing context: {str(result)}")
             except Exception as e:
-                logger.warning(f"Error closing context: {str(e)}")
+                logger.warning(f"Error closing contexts: {str(e)}")
+            finally:
+                self._contexts.clear()
         
         # Close browser
         if self._browser:
@@ -332,6 +531,7 @@ class BrowserService:
             finally:
                 self._playwright = None
         
+        self._version_cache = None
         self._is_initialized = False
         logger.info("Browser service cleanup completed")
     
@@ -345,5 +545,23 @@ class BrowserService:
         await self.cleanup()
 
 
-# Singleton instance for global use
-browser_service = BrowserService()
\ No newline at end of file
+# Global instance, created lazily on first use so importing this module stays cheap
+_browser_service: Optional[BrowserService] = None
+_browser_service_lock = threading.Lock()
+
+
+def get_browser_service() -> BrowserService:
+    """Return the global BrowserService instance, creating it on first call."""
+    global _browser_service
+    if _browser_service is None:
+        with _browser_service_lock:
+            if _browser_service is None:
+                _browser_service = BrowserService()
+    return _browser_service
+
+
+def __getattr__(name: str):
+    # PEP 562 shim so `from .browser_service import browser_service` keeps working
+    if name == "browser_service":
+        return get_browser_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
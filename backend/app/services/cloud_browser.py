@@ -2,6 +2,7 @@ from typing import Optional, Dict, Any, List
 import asyncio
 import logging
 import json
+import random
 from contextlib import asynccontextmanager
 import httpx
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
@@ -15,9 +16,21 @@ from ..core.exceptions import (
 )
 from ..utils.logger import get_logger
 from ..utils.browser import get_random_user_agent
+from ..utils.http import HTTP2_AVAILABLE, decode_json, parse_retry_after
 
 logger = get_logger(__name__)
 
+BROWSERBASE_API_URL = "https://www.browserbase.com"
+
+# Retry policy for Browserbase API calls: throttling and transient gateway errors
+RETRIABLE_API_STATUSES = frozenset({429, 502, 503})
+API_MAX_ATTEMPTS = 5
+API_BACKOFF_MIN = 1.0
+API_BACKOFF_MAX = 30.0
+
+# Maximum number of released contexts closed together by the reaper
+CONTEXT_REAP_BATCH = 10
+
 
 class CloudBrowserService:
     """
@@ -33,6 +46,47 @@ class CloudBrowserService:
         self._playwright = None
         self._contexts: List[BrowserContext] = []
         self._is_connected = False
+        self._http: Optional[httpx.AsyncClient] = None
+        self._init_lock = asyncio.Lock()
+        # Contexts released by page_context, closed in batches off the request path
+        self._reap_queue: asyncio.Queue = asyncio.Queue()
+        self._context_reaper: Optional[asyncio.Task] = None
+        
+        # Resolved once; these are read on every session, context and page
+        self._viewport_width = getattr(settings, 'BROWSER_VIEWPORT_WIDTH', 1920)
+        self._viewport_height = getattr(settings, 'BROWSER_VIEWPORT_HEIGHT', 1080)
+        self._user_agent = getattr(settings, 'BROWSER_USER_AGENT', None)
+        self._timeout_ms = getattr(settings, 'BROWSER_TIMEOUT', 30) * 1000
+        self._navigation_timeout_ms = getattr(settings, 'BROWSER_NAVIGATION_TIMEOUT', 30) * 1000
+        
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        Return the Browserbase API client, creating it on first use.
+        
+        One client per service keeps the HTTPS connection alive across the
+        create, info and stop calls of a session instead of re-handshaking,
+        multiplexed over HTTP/2 when h2 is installed.
+        """
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                base_url=BROWSERBASE_API_URL,
+                timeout=30.0,
+                headers={"x-bb-api-key": settings.BROWSERBASE_API_KEY or ""},
+                limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60.0)
+            )
+        return self._http
+    
+    async def _close_http_client(self) -> None:
+        """Close the Browserbase API client if one was opened."""
+        if self._http is None:
+            return
+        try:
+            await self._http.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing Browserbase API client: {str(e)}")
+        finally:
+            self._http = None
         
     def _validate_configuration(self) -> None:
         """Validate Browserbase configuration."""
@@ -48,6 +102,44 @@ class CloudBrowserService:
                 config_key="BROWSERBASE_PROJECT_ID"
             )
     
+    async def _request_with_backoff(
+        self,
+        send,
+        url: str,
+        max_attempts: int = API_MAX_ATTEMPTS,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a Browserbase API request, backing off on throttling and 5xx gateway errors.
+        
+        Args:
+            send: Bound client method to call, e.g. client.post
+            url: Request path relative to the API base URL
+            max_attempts: Total attempts before the last response is returned
+            **kwargs: Passed through to the client method
+            
+        Returns:
+            The first non-retriable response, or the last response once attempts run out
+        """
+        for attempt in range(max_attempts):
+            response = await send(url, **kwargs)
+            if response.status_code not in RETRIABLE_API_STATUSES or attempt == max_attempts - 1:
+                return response
+            
+            # Honour Retry-After when given, otherwise use full-jitter exponential backoff
+            delay = parse_retry_after(response.headers.get("retry-after"))
+            if delay is None:
+                delay = random.uniform(API_BACKOFF_MIN, API_BACKOFF_MIN * 2 ** (attempt + 1))
+            delay = min(delay, API_BACKOFF_MAX)
+            
+            logger.warning(
+                f"Browserbase request {url} returned {response.status_code}; "
+                f"retrying in {delay:.1f}s (attempt {attempt + 1}/{max_attempts})"
+            )
+            await asyncio.sleep(delay)
+        
+        return response
+    
     async def _create_session(self) -> tuple[str, str]:
         """
         Create a new Browserbase session.
@@ -71,13 +163,13 @@ class CloudBrowserService:
                 "projectId": settings.BROWSERBASE_PROJECT_ID,
                 "browserSettings": {
                     "viewport": {
-                        "width": getattr(settings, 'BROWSER_VIEWPORT_WIDTH', 1920),
-                        "height": getattr(settings, 'BROWSER_VIEWPORT_HEIGHT', 1080)
+                        "width": self._viewport_width,
+                        "height": self._viewport_height
                     },
                     "fingerprint": {
                         "screen": {
-                            "width": getattr(settings, 'BROWSER_VIEWPORT_WIDTH', 1920),
-                            "height": getattr(settings, 'BROWSER_VIEWPORT_HEIGHT', 1080)
+                            "width": self._viewport_width,
+                            "height": self._viewport_height
                         },
                         # Add the user agent to the fingerprint
                         "userAgent": user_agent
@@ -85,62 +177,53 @@ class CloudBrowserService:
                 }
             }
             
-            headers = {
-                "x-bb-api-key": settings.BROWSERBASE_API_KEY,
-                "Content-Type": "application/json"
-            }
+            client = self._get_http_client()
+            response = await self._request_with_backoff(client.post, "/v1/sessions", json=session_data)
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://www.browserbase.com/v1/sessions",
-                    json=session_data,
-                    headers=headers
-                )
-                
-                # Accept both 200 OK and 201 Created as success
-                if response.status_code not in [200, 201]:
-                    error_msg = f"Failed to create Browserbase session: {response.status_code}"
-                    
-                    if response.status_code == 401:
-                        error_msg = "Browserbase authentication failed - check API key"
-                    elif response.status_code == 403:
-                        error_msg = "Browserbase access forbidden - check project ID and permissions"
-                    elif response.status_code == 429:
-                        error_msg = f"Browserbase rate limit exceeded: {response.text}"
-                    
-                    logger.error(f"{error_msg} - Response: {response.text}")
-                    raise BrowserConnectionError(error_msg)
-                
-                session_info = response.json()
+            # Accept both 200 OK and 201 Created as success
+            if response.status_code not in [200, 201]:
+                error_msg = f"Failed to create Browserbase session: {response.status_code}"
                 
-                # DEBUG: Log the creation response
-                logger.info(f"Session creation response: {session_info}")
+                if response.status_code == 401:
+                    error_msg = "Browserbase authentication failed - check API key"
+                elif response.status_code == 403:
+                    error_msg = "Browserbase access forbidden - check project ID and permissions"
+                elif response.status_code == 429:
+                    error_msg = f"Browserbase rate limit exceeded: {response.text}"
                 
-                session_id = session_info.get("id")
-                
-                if not session_id:
-                    raise BrowserConnectionError("No session ID returned from Browserbase")
-                
-                # CRITICAL FIX: Get connectUrl from creation response
-                connect_url = (
-                    session_info.get("connectUrl") or 
-                    session_info.get("connect_url") or
-                    session_info.get("websocketUrl") or
-                    session_info.get("websocket_url")
+                logger.error(f"{error_msg} - Response: {response.text}")
+                raise BrowserConnectionError(error_msg)
+            
+            session_info = decode_json(response)
+            
+            # DEBUG: Log the creation response
+            logger.info(f"Session creation response: {session_info}")
+            
+            session_id = session_info.get("id")
+            
+            if not session_id:
+                raise BrowserConnectionError("No session ID returned from Browserbase")
+            
+            # CRITICAL FIX: Get connectUrl from creation response
+            connect_url = (
+                session_info.get("connectUrl") or 
+                session_info.get("connect_url") or
+                session_info.get("websocketUrl") or
+                session_info.get("websocket_url")
+            )
+            
+            if not connect_url:
+                available_fields = list(session_info.keys())
+                logger.error(f"No connection URL in creation response. Available fields: {available_fields}")
+                raise BrowserConnectionError(
+                    f"No connection URL returned in session creation. Available fields: {available_fields}"
                 )
-                
-                if not connect_url:
-                    available_fields = list(session_info.keys())
-                    logger.error(f"No connection URL in creation response. Available fields: {available_fields}")
-                    raise BrowserConnectionError(
-                        f"No connection URL returned in session creation. Available fields: {available_fields}"
-                    )
-                
-                logger.info(f"Created Browserbase session: {session_id}")
-                logger.info(f"Got connection URL from creation response")
-                
-                return session_id, connect_url
-                
+            
+            logger.info(f"Created Browserbase session: {session_id}")
+            logger.info(f"Got connection URL from creation response")
+            
+            return session_id, connect_url
+            
         except httpx.TimeoutException:
             logger.error("Timeout creating Browserbase session")
             raise BrowserConnectionError("Timeout connecting to Browserbase")
@@ -158,26 +241,40 @@ class CloudBrowserService:
             logger.warning("Cloud browser service already connected")
             return
         
-        try:
-            logger.info("Initializing cloud browser service")
+        # Concurrent callers queue here; only the first creates a session,
+        # the rest see it connected once they get the lock
+        async with self._init_lock:
+            if self._is_connected:
+                return
             
-            # Create Browserbase session and get connection URL in one call
-            self._session_id, self._connect_url = await self._create_session()
-            
-            # Initialize Playwright
-            self._playwright = await async_playwright().start()
-            
-            # Connect to remote browser using the URL from creation
-            logger.info(f"Connecting to browser with URL: {self._connect_url[:50]}...")
-            self._browser = await self._playwright.chromium.connect_over_cdp(self._connect_url)
-            
-            self._is_connected = True
-            logger.info(f"Successfully connected to cloud browser (session: {self._session_id})")
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize cloud browser: {str(e)}")
-            await self.cleanup()
-            raise BrowserConnectionError(f"Cloud browser initialization failed: {str(e)}")
+            try:
+                logger.info("Initializing cloud browser service")
+                
+                # Start Playwright while the session request (and its TLS
+                # handshake) is in flight; neither depends on the other
+                session, playwright = await asyncio.gather(
+                    self._create_session(), async_playwright().start(), return_exceptions=True
+                )
+                # Record whichever half succeeded so cleanup() can release it
+                if not isinstance(session, BaseException):
+                    self._session_id, self._connect_url = session
+                if not isinstance(playwright, BaseException):
+                    self._playwright = playwright
+                for result in (session, playwright):
+                    if isinstance(result, BaseException):
+                        raise result
+                
+                # Connect to remote browser using the URL from creation
+                logger.info(f"Connecting to browser with URL: {self._connect_url[:50]}...")
+                self._browser = await self._playwright.chromium.connect_over_cdp(self._connect_url)
+                
+                self._is_connected = True
+                logger.info(f"Successfully connected to cloud browser (session: {self._session_id})")
+                
+            except Exception as e:
+                logger.error(f"Failed to initialize cloud browser: {str(e)}")
+                await self.cleanup()
+                raise BrowserConnectionError(f"Cloud browser initialization failed: {str(e)}")
     
     
     async def create_context(self, **context_options) -> BrowserContext:
@@ -208,15 +305,15 @@ class CloudBrowserService:
                 "java_script_enabled": True,
                 "accept_downloads": False,
                 "ignore_https_errors": True,
-                "user_agent": getattr(settings, 'BROWSER_USER_AGENT', None)
+                "user_agent": self._user_agent
             }
             
             # Note: viewport is typically set at session level for Browserbase
             # but we can override if needed
             if 'viewport' not in context_options:
                 default_options['viewport'] = {
-                    "width": getattr(settings, 'BROWSER_VIEWPORT_WIDTH', 1920),
-                    "height": getattr(settings, 'BROWSER_VIEWPORT_HEIGHT', 1080)
+                    "width": self._viewport_width,
+                    "height": self._viewport_height
                 }
             
             # Merge with provided options
@@ -252,8 +349,8 @@ class CloudBrowserService:
             page = await context.new_page()
             
             # Set timeouts
-            page.set_default_timeout(getattr(settings, 'BROWSER_TIMEOUT', 30) * 1000)
-            page.set_default_navigation_timeout(getattr(settings, 'BROWSER_NAVIGATION_TIMEOUT', 30) * 1000)
+            page.set_default_timeout(self._timeout_ms)
+            page.set_default_navigation_timeout(self._navigation_timeout_ms)
             
             logger.debug("Created cloud browser page")
             return page
@@ -274,7 +371,6 @@ class CloudBrowserService:
             Page: Browser page instance
         """
         context = None
-        page = None
         
         try:
             context = await self.create_context(**context_options)
@@ -286,22 +382,49 @@ class CloudBrowserService:
             raise BrowserError(f"Cloud page context error: {str(e)}")
             
         finally:
-            # Cleanup page and context
-            if page:
-                try:
-                    await page.close()
-                    logger.debug("Cloud page closed successfully")
-                except Exception as e:
-                    logger.warning(f"Error closing cloud page: {str(e)}")
-            
+            # Closing the context also closes its pages; hand it to the reaper
+            # so the caller does not wait on the CDP round-trips
             if context:
-                try:
-                    await context.close()
-                    if context in self._contexts:
-                        self._contexts.remove(context)
-                    logger.debug("Cloud context closed successfully")
-                except Exception as e:
-                    logger.warning(f"Error closing cloud context: {str(e)}")
+                self._reap_queue.put_nowait(context)
+                self._ensure_context_reaper()
+    
+    def _ensure_context_reaper(self) -> None:
+        """Start the background context-closing task if it is not already running."""
+        if self._context_reaper is None or self._context_reaper.done():
+            self._context_reaper = asyncio.create_task(self._reap_contexts())
+    
+    async def _reap_contexts(self) -> None:
+        """Close released contexts in batches of up to CONTEXT_REAP_BATCH."""
+        while True:
+            batch = [await self._reap_queue.get()]
+            while len(batch) < CONTEXT_REAP_BATCH and not self._reap_queue.empty():
+                batch.append(self._reap_queue.get_nowait())
+            
+            results = await asyncio.gather(
+                *(asyncio.wait_for(context.close(), timeout=5.0) for context in batch),
+                return_exceptions=True
+            )
+            for context, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Error closing cloud context: {str(result)}")
+                if context in self._contexts:
+                    self._contexts.remove(context)
+                self._reap_queue.task_done()
+            logger.debug(f"Closed {len(batch)} released cloud contexts")
+    
+    async def _stop_context_reaper(self) -> None:
+        """Cancel the reaper and drop queued contexts; _close_contexts closes them."""
+        if self._context_reaper is not None:
+            self._context_reaper.cancel()
+            try:
+                await self._context_reaper
+            except asyncio.CancelledError:
+                pass
+            self._context_reaper = None
+        
+        while not self._reap_queue.empty():
+            self._reap_queue.get_nowait()
+            self._reap_queue.task_done()
     
     async def get_session_info(self) -> Dict[str, Any]:
         """
@@ -314,33 +437,28 @@ class CloudBrowserService:
             return {"status": "not_connected"}
         
         try:
-            headers = {
-                "x-bb-api-key": settings.BROWSERBASE_API_KEY
-            }
+            client = self._get_http_client()
+            response = await self._request_with_backoff(
+                client.get, f"/v1/sessions/{self._session_id}", max_attempts=3, timeout=10.0
+            )
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"https://www.browserbase.com/v1/sessions/{self._session_id}",
-                    headers=headers
-                )
+            if response.status_code == 200:
+                session_data = decode_json(response)
+                return {
+                    "status": "connected",
+                    "session_id": self._session_id,
+                    "session_data": session_data,
+                    "contexts_count": len(self._contexts),
+                    "browser_connected": self._browser.is_connected() if self._browser else False,
+                    "connect_url_available": bool(self._connect_url)  # Add this for debugging
+                }
+            else:
+                return {
+                    "status": "error",
+                    "session_id": self._session_id,
+                    "error": f"HTTP {response.status_code}"
+                }
                 
-                if response.status_code == 200:
-                    session_data = response.json()
-                    return {
-                        "status": "connected",
-                        "session_id": self._session_id,
-                        "session_data": session_data,
-                        "contexts_count": len(self._contexts),
-                        "browser_connected": self._browser.is_connected() if self._browser else False,
-                        "connect_url_available": bool(self._connect_url)  # Add this for debugging
-                    }
-                else:
-                    return {
-                        "status": "error",
-                        "session_id": self._session_id,
-                        "error": f"HTTP {response.status_code}"
-                    }
-                    
         except Exception as e:
             logger.error(f"Error getting session info: {str(e)}")
             return {
@@ -353,23 +471,17 @@ class CloudBrowserService:
         """Clean up cloud browser resources with improved error handling."""
         logger.info("Cleaning up cloud browser service")
         
-        # End Browserbase session FIRST (before closing browser)
-        if self._session_id:
-            try:
-                await self._end_session()
-            except Exception as e:
-                logger.warning(f"Error ending Browserbase session: {str(e)}")
+        # Contexts still queued for the reaper remain in _contexts and are
+        # closed together with the rest below
+        await self._stop_context_reaper()
         
-        # Close all contexts
-        for context in self._contexts[:]:
-            try:
-                await asyncio.wait_for(context.close(), timeout=5.0)
-                self._contexts.remove(context)
-                logger.debug("Cloud context closed successfully")
-            except asyncio.TimeoutError:
-                logger.warning("Context close timed out")
-            except Exception as e:
-                logger.warning(f"Error closing cloud context: {str(e)}")
+        # Stopping the remote session and closing local contexts are
+        # independent, so overlap them; the browser itself closes afterwards
+        end_result, _ = await asyncio.gather(
+            self._end_session(), self._close_contexts(), return_exceptions=True
+        )
+        if isinstance(end_result, Exception):
+            logger.warning(f"Error ending Browserbase session: {str(end_result)}")
         
         # Close browser connection
         if self._browser:
@@ -406,51 +518,61 @@ class CloudBrowserService:
             finally:
                 self._playwright = None
         
+        # The API client is only needed for the session calls above
+        await self._close_http_client()
+        
         self._is_connected = False
         self._session_id = None
         self._connect_url = None 
         logger.info("Cloud browser service cleanup completed")
 
+    async def _close_contexts(self) -> None:
+        """Close all contexts concurrently, each bounded by its own timeout."""
+        if not self._contexts:
+            return
+        
+        results = await asyncio.gather(
+            *(asyncio.wait_for(context.close(), timeout=5.0) for context in self._contexts),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning("Context close timed out")
+            elif isinstance(result, Exception):
+                logger.warning(f"Error closing cloud context: {str(result)}")
+        self._contexts.clear()
+
     async def _end_session(self) -> None:
         """End the Browserbase session with improved error handling."""
         if not self._session_id:
             return
         
         try:
-            headers = {
-                "x-bb-api-key": settings.BROWSERBASE_API_KEY,
-                "Content-Type": "application/json"
-            }
+            client = self._get_http_client()
             
             # Use a shorter timeout for cleanup operations
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Try the correct API endpoint format
-                response = await client.post(
-                    f"https://www.browserbase.com/v1/sessions/{self._session_id}/stop",
-                    headers=headers
-                )
+            response = await self._request_with_backoff(
+                client.post, f"/v1/sessions/{self._session_id}/stop", max_attempts=3, timeout=15.0
+            )
+            
+            if response.status_code in [200, 201, 204]:
+                logger.info(f"Browserbase session {self._session_id} stopped successfully")
+                return
+            elif response.status_code == 404:
+                logger.info(f"Browserbase session {self._session_id} already ended")
+                return
+            else:
+                # If POST /stop doesn't work, try DELETE
+                logger.warning(f"POST /stop failed with {response.status_code}, trying DELETE")
                 
-                if response.status_code in [200, 201, 204]:
-                    logger.info(f"Browserbase session {self._session_id} stopped successfully")
-                    return
-                elif response.status_code == 404:
-                    logger.info(f"Browserbase session {self._session_id} already ended")
-                    return
+                delete_response = await client.delete(f"/v1/sessions/{self._session_id}", timeout=15.0)
+                
+                if delete_response.status_code in [200, 204, 404]:
+                    logger.info(f"Browserbase session {self._session_id} deleted successfully")
                 else:
-                    # If POST /stop doesn't work, try DELETE
-                    logger.warning(f"POST /stop failed with {response.status_code}, trying DELETE")
-                    
-                    delete_response = await client.delete(
-                        f"https://www.browserbase.com/v1/sessions/{self._session_id}",
-                        headers=headers
-                    )
-                    
-                    if delete_response.status_code in [200, 204, 404]:
-                        logger.info(f"Browserbase session {self._session_id} deleted successfully")
-                    else:
-                        logger.warning(f"Failed to end session {self._session_id}: DELETE returned {delete_response.status_code}")
-                        logger.warning(f"Response: {delete_response.text}")
-                    
+                    logger.warning(f"Failed to end session {self._session_id}: DELETE returned {delete_response.status_code}")
+                    logger.warning(f"Response: {delete_response.text}")
+                
         except httpx.TimeoutException:
             logger.error(f"Timeout ending Browserbase session {self._session_id}")
         except Exception as e:
@@ -1,11 +1,27 @@
+import asyncio
+import bisect
+import functools
 import time
-from typing import List, Dict, Optional, Any, Set
+from typing import List, Dict, Optional, Any, Tuple
 from .dom_extraction_service import DOMExtractionResult, ExtractedElement
 from ..models.components import DetectedComponent, ComponentType, ComponentDetectionResult
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+INPUT_TAGS = frozenset({'input', 'textarea', 'select'})
+IMAGE_TAGS = frozenset({'img', 'svg', 'picture'})
+
+# Component type implied by the tag name alone; anything else can only match
+# the role- or class-based rules
+TAG_COMPONENT_TYPES: Dict[str, ComponentType] = {
+    'nav': ComponentType.NAVBAR,
+    'button': ComponentType.BUTTON,
+    'form': ComponentType.FORM,
+    **dict.fromkeys(INPUT_TAGS, ComponentType.INPUT),
+    **dict.fromkeys(IMAGE_TAGS, ComponentType.IMAGE),
+}
+
 class ComponentDetector:
     """
     Analyzes a DOM structure to detect UI components, including their raw HTML and associated assets.
@@ -15,66 +31,161 @@ class ComponentDetector:
         if not dom_result or not dom_result.success:
             raise ValueError("A successful DOMExtractionResult is required for component detection.")
         self.dom_result = dom_result
-        self.elements_map = {el.xpath: el for el in self.dom_result.elements if el.xpath}
         self.assets = self.dom_result.assets or []
+        self._result: Optional[ComponentDetectionResult] = None
+
+    def invalidate(self) -> None:
+        """
+        Drop the memoized detection result and every derived index.
+
+        Call this after mutating dom_result so the next detect_components
+        re-reads the elements and assets instead of returning stale results.
+        """
+        self._result = None
+        self.assets = self.dom_result.assets or []
+        for name in ('elements_map', '_xpath_slots', '_elements_by_url', '_asset_elements', '_assets_by_xpath'):
+            self.__dict__.pop(name, None)
+
+    @functools.cached_property
+    def elements_map(self) -> Dict[str, ExtractedElement]:
+        """XPath index of the extracted elements, built on first lookup."""
+        return {el.xpath: el for el in self.dom_result.elements if el.xpath}
+
+    @functools.cached_property
+    def _xpath_slots(self) -> Dict[Optional[str], int]:
+        """Integer slot per distinct xpath, for the processed-element bitmap."""
+        return {el.xpath: position for position, el in enumerate(self.dom_result.elements)}
+
+    @functools.cached_property
+    def _elements_by_url(self) -> Dict[str, ExtractedElement]:
+        """First element referencing each src/href URL, in document order."""
+        index: Dict[str, ExtractedElement] = {}
+        for element in self.dom_result.elements:
+            attributes = element.attributes
+            for url in (attributes.get('src'), attributes.get('href')):
+                if url:
+                    index.setdefault(url, element)
+        return index
+
+    @functools.cached_property
+    def _asset_elements(self) -> List[Optional[ExtractedElement]]:
+        """DOM element for each asset, parallel to self.assets, resolved once."""
+        return [self._find_element_for_asset(asset) for asset in self.assets]
+
+    @functools.cached_property
+    def _assets_by_xpath(self) -> Tuple[List[str], List[Tuple[str, int, Any]]]:
+        """
+        Assets sorted by their element's xpath, as (keys, rows).
+
+        All xpaths sharing a prefix are contiguous in sorted order, so the assets
+        under a component are one bisect plus a forward scan. Each row keeps the
+        asset's original position so results can be returned in asset order.
+        """
+        rows = sorted(
+            (element.xpath, position, asset)
+            for position, (asset, element) in enumerate(zip(self.assets, self._asset_elements))
+            if element and element.xpath
+        )
+        return [row[0] for row in rows], rows
 
     def detect_components(self) -> ComponentDetectionResult:
-        """Runs the full component detection and asset association process."""
+        """
+        Runs the full component detection and asset association process.
+
+        The result is memoized on the detector; see invalidate().
+        """
+        if self._result is not None:
+            return self._result
+
         start_time = time.time()
         
         detected_components: List[DetectedComponent] = []
-        processed_elements: Set[str] = set()
 
-        # Simple, tag-based detection loop (can be expanded with more rules)
-        for element in self.dom_result.elements:
-            if element.xpath in processed_elements:
+        # Bind the per-element lookups once; on large DOMs the loop body is
+        # dominated by attribute/method resolution rather than real work
+        classify = self._get_element_component_type
+        unknown = ComponentType.UNKNOWN
+
+        # Classify the whole element list in one map() pass and keep only the
+        # hits, so the component-building loop never visits the (majority of)
+        # elements that match no rule. Rules are simple and tag-based for now.
+        elements = self.dom_result.elements
+        hits = [
+            (element, component_type)
+            for element, component_type in zip(elements, map(classify, elements))
+            if component_type is not unknown
+        ]
+
+        # Elements sharing an xpath share a slot, so a byte per slot gives the
+        # same de-duplication as a set of xpaths without growing a set
+        slots = self._xpath_slots
+        processed = bytearray(len(elements))
+
+        for element, component_type in hits:
+            slot = slots[element.xpath]
+            if processed[slot]:
                 continue
 
-            component_type = self._get_element_component_type(element)
-            if component_type != ComponentType.UNKNOWN:
-                # Capture the raw HTML of the component's root element
-                raw_html = self._get_raw_html_for_element(element.xpath)
-                
-                # Find assets associated with this component
-                associated_assets = self._find_associated_assets(element)
-
-                detected_components.append(DetectedComponent(
-                    component_type=component_type,
-                    elements=[element],
-                    label=element.text_content or element.attributes.get('alt'),
-                    bounding_box=element.bounding_box,
-                    raw_html=raw_html,
-                    associated_assets=associated_assets
-                ))
-                processed_elements.add(element.xpath)
+            # Capture the raw HTML of the component's root element. The
+            # element is already in hand, so skip the xpath map (and the
+            # extra sweep over the DOM that building it would cost).
+            raw_html = self._render_raw_html(element)
+            
+            # Find assets associated with this component; the first one is
+            # the component's asset
+            associated_assets = self._find_associated_assets(element)
+
+            detected_components.append(DetectedComponent(
+                component_type=component_type,
+                html_snippet=raw_html,
+                label=element.text_content or element.attributes.get('alt'),
+                asset_url=associated_assets[0].url if associated_assets else None
+            ))
+            processed[slot] = 1
         
         detection_time = time.time() - start_time
         logger.info(f"Detected {len(detected_components)} components in {detection_time:.2f}s")
 
-        return ComponentDetectionResult(
+        self._result = ComponentDetectionResult(
             session_id=self.dom_result.session_id,
             components=detected_components,
             total_components=len(detected_components),
             detection_time_seconds=detection_time
         )
+        return self._result
+
+    async def detect_components_async(self) -> ComponentDetectionResult:
+        """
+        Run detect_components on a worker thread.
+
+        Classification is pure CPU work over the extracted elements; running it
+        off the event loop keeps large DOMs from stalling concurrent browser I/O.
+        """
+        return await asyncio.to_thread(self.detect_components)
 
     def _get_element_component_type(self, element: ExtractedElement) -> ComponentType:
         """Determine the component type for a single element."""
-        tag = element.tag_name.lower()
-        if tag == 'nav':
-            return ComponentType.NAVBAR
-        if tag == 'button' or element.attributes.get('role') == 'button':
+        # One dict probe replaces the tag comparison ladder. Precedence is
+        # nav, then role=button, then the tag's own type, then card classes.
+        component_type = TAG_COMPONENT_TYPES.get(element.tag_name)  # lowercased by ExtractedElementModel
+        if component_type is ComponentType.NAVBAR:
+            return component_type
+        if element.attributes.get('role') == 'button':
             return ComponentType.BUTTON
-        if tag == 'form':
-            return ComponentType.FORM
-        if tag in ['input', 'textarea', 'select']:
-            return ComponentType.INPUT
-        if tag == 'img' or tag == 'svg' or tag == 'picture':
-            return ComponentType.IMAGE
-        if 'card' in ' '.join(element.class_names):
+        if component_type is not None:
+            return component_type
+        if self._has_card_class(element):
             return ComponentType.CARD
         return ComponentType.UNKNOWN
 
+    @staticmethod
+    def _has_card_class(element: ExtractedElement) -> bool:
+        """Check whether any of the element's class names mentions 'card'."""
+        # Equivalent to searching the space-joined class string, since the
+        # needle has no spaces, but stops at the first hit and never builds
+        # the joined string for the (common) elements that have no match.
+        return any('card' in name for name in element.class_names)
+
     def _get_raw_html_for_element(self, xpath: str) -> Optional[str]:
         # This is a placeholder. A real implementation would need to
         # get the outerHTML during the initial browser extraction.
@@ -82,30 +193,35 @@ class ComponentDetector:
         element = self.elements_map.get(xpath)
         if not element:
             return None
-        
-        # Create a simplified HTML representation
+        return self._render_raw_html(element)
+
+    def _render_raw_html(self, element: ExtractedElement) -> str:
+        """Render a simplified HTML representation of a single element."""
         attrs = ' '.join([f'{k}="{v}"' for k, v in element.attributes.items()])
         return f"<{element.tag_name} {attrs}></{element.tag_name}>"
 
 
     def _find_associated_assets(self, component_element: ExtractedElement) -> List[Any]:
         """Finds assets that are children of the given component element."""
-        associated = []
         root_xpath = component_element.xpath
-        if not root_xpath:
+        keys, rows = self._assets_by_xpath
+        if not root_xpath or not keys:
             return []
             
-        # Find assets that are direct children in the DOM tree
-        for asset in self.assets:
-            # A more robust solution would use bounding boxes, but XPath is a good start.
-            asset_element = self._find_element_for_asset(asset)
-            if asset_element and asset_element.xpath and asset_element.xpath.startswith(root_xpath):
-                associated.append(asset)
-        return associated
+        # Find assets whose elements sit under this xpath. A more robust
+        # solution would use bounding boxes, but XPath is a good start.
+        matches = []
+        for index in range(bisect.bisect_left(keys, root_xpath), len(keys)):
+            if not keys[index].startswith(root_xpath):
+                break
+            _, position, asset = rows[index]
+            matches.append((position, asset))
+        
+        matches.sort(key=lambda match: match[0])
+        return [asset for _, asset in matches]
 
     def _find_element_for_asset(self, asset) -> Optional[ExtractedElement]:
         """Find the DOM element corresponding to a given asset."""
-        for element in self.dom_result.elements:
-            if asset.url and (asset.url == element.attributes.get('src') or asset.url == element.attributes.get('href')):
-                return element
-        return None
\ No newline at end of file
+        if not asset.url:
+            return None
+        return self._elements_by_url.get(asset.url)
\ No newline at end of file
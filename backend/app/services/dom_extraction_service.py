@@ -1,11 +1,5 @@
-from typing import Dict, List, Optional, Any, Set, Tuple
+from typing import Dict, List, Optional, Any
 import asyncio
-import json
-import logging
-from dataclasses import dataclass, asdict
-from pathlib import Path
-from urllib.parse import urljoin, urlparse
-import re
 import time
 
 from ..config import settings
@@ -21,17 +15,23 @@ from ..models.dom_extraction import (
     ExtractedStylesheetModel as ExtractedStylesheet,
     ExtractedAssetModel as ExtractedAsset,
     PageStructureModel as PageStructure,
-    DOMExtractionResultModel as DOMExtractionResult,
-    StyleAnalysisModel,
-    ColorPaletteModel,
-    TypographyAnalysisModel,
-    TypographyStyleModel
+    DOMExtractionResultModel as DOMExtractionResult
 )
 from ..models.components import DetectedComponent
 
 
 logger = get_logger(__name__)
 
+# Extractor asset types that come from CSS backgrounds rather than tags
+BACKGROUND_ASSET_TYPES = frozenset({'background-image', 'css-background'})
+
+# The extractor scripts are static, so they are assembled once at import and
+# shared by every service instance (the routes create one per request)
+JAVASCRIPT_EXTRACTORS: Dict[str, str] = {
+    "dom_extractor": extractors.get_dom_extractor_script(),
+    "combined": extractors.get_combined_extractor_script()
+}
+
 
 class DOMExtractionService:
     """
@@ -43,18 +43,19 @@ class DOMExtractionService:
     
     def __init__(self, browser_manager: Optional[BrowserManager] = None):
         self.browser_manager = browser_manager
-        self._javascript_extractors = {
-            "dom_extractor": extractors.get_dom_extractor_script()
-        }
+        self._javascript_extractors = JAVASCRIPT_EXTRACTORS
     
     async def _wait_for_dynamic_content(self, page, timeout: int = 8000):
         """Enhanced waiting for dynamic content including React/Vue apps."""
         # Wait for basic content
         await asyncio.sleep(2)
         
-        # Wait for React apps
-        try:
-            await page.wait_for_function("""
+        # The React, Vue and image checks are independent, so poll them
+        # concurrently: the wait is bounded by the slowest check rather than
+        # the sum of their timeouts
+        await asyncio.gather(
+            # Wait for React apps
+            self._wait_for_condition(page, """
                 () => {
                     // Check if React has finished rendering
                     if (window.React || document.querySelector('[data-reactroot]')) {
@@ -63,13 +64,9 @@ class DOMExtractionService:
                     }
                     return true; // Not a React app
                 }
-            """, timeout=timeout)
-        except Exception as e:
-            logger.debug(f"React wait timeout: {e}")
-        
-        # Wait for Vue apps
-        try:
-            await page.wait_for_function("""
+            """, timeout, "React"),
+            # Wait for Vue apps
+            self._wait_for_condition(page, """
                 () => {
                     if (window.Vue || document.querySelector('[data-v-]')) {
                         const vueElements = document.querySelectorAll('[data-v-]');
@@ -77,13 +74,9 @@ class DOMExtractionService:
                     }
                     return true; // Not a Vue app
                 }
-            """, timeout=timeout)
-        except Exception as e:
-            logger.debug(f"Vue wait timeout: {e}")
-        
-        # Wait for images to start loading
-        try:
-            await page.wait_for_function("""
+            """, timeout, "Vue"),
+            # Wait for images to start loading
+            self._wait_for_condition(page, """
                 () => {
                     const images = document.querySelectorAll('img');
                     if (images.length === 0) return true;
@@ -98,65 +91,41 @@ class DOMExtractionService:
                     // Consider it ready if at least 50% of images are loaded or started loading
                     return loadedCount >= Math.min(images.length * 0.5, 10);
                 }
-            """, timeout=timeout)
-        except Exception as e:
-            logger.debug(f"Image loading wait timeout: {e}")
+            """, timeout, "Image loading"),
+        )
 
-    async def _extract_page_structure(self, page, url: str) -> PageStructure:
-        """Enhanced page structure extraction."""
+    async def _wait_for_condition(self, page, script: str, timeout: int, label: str) -> None:
+        """Wait for a page condition, logging rather than raising if it times out."""
         try:
-            # Extract comprehensive page metadata
-            page_data = await page.evaluate("""
-                () => {
-                    const getMetaContent = (name) => {
-                        const meta = document.querySelector(`meta[name="${name}"], meta[property="${name}"]`);
-                        return meta ? meta.getAttribute('content') : null;
-                    };
-                    
-                    return {
-                        title: document.title,
-                        description: getMetaContent('description'),
-                        keywords: getMetaContent('keywords'),
-                        lang: document.documentElement.lang,
-                        charset: document.characterSet,
-                        viewport: getMetaContent('viewport'),
-                        favicon: document.querySelector('link[rel*="icon"]')?.href,
-                        canonical: document.querySelector('link[rel="canonical"]')?.href,
-                        og_title: getMetaContent('og:title'),
-                        og_description: getMetaContent('og:description'),
-                        og_image: getMetaContent('og:image'),
-                        og_url: getMetaContent('og:url'),
-                        twitter_card: getMetaContent('twitter:card'),
-                        twitter_title: getMetaContent('twitter:title'),
-                        twitter_description: getMetaContent('twitter:description'),
-                        twitter_image: getMetaContent('twitter:image')
-                    };
-                }
-            """)
-            
-            # Build Open Graph data
-            open_graph = {}
-            for key, value in page_data.items():
-                if key.startswith('og_') and value:
-                    open_graph[key[3:]] = value
-                elif key.startswith('twitter_') and value:
-                    open_graph[key] = value
-            
-            return PageStructure(
-                title=page_data.get('title'),
-                meta_description=page_data.get('description'),
-                meta_keywords=page_data.get('keywords'),
-                lang=page_data.get('lang'),
-                charset=page_data.get('charset'),
-                viewport=page_data.get('viewport'),
-                favicon_url=page_data.get('favicon'),
-                canonical_url=page_data.get('canonical'),
-                open_graph=open_graph
-            )
-            
+            await page.wait_for_function(script, timeout=timeout)
         except Exception as e:
-            logger.warning(f"Failed to extract page structure: {e}")
+            logger.debug(f"{label} wait timeout: {e}")
+
+    def _build_page_structure(self, page_data: Optional[Dict[str, Any]]) -> PageStructure:
+        """Build a PageStructure from the metadata returned by the page structure script."""
+        if not page_data:
+            logger.warning("Page structure script returned no data")
             return PageStructure(title="Unknown")
+        
+        # Build Open Graph data
+        open_graph = {}
+        for key, value in page_data.items():
+            if key.startswith('og_') and value:
+                open_graph[key[3:]] = value
+            elif key.startswith('twitter_') and value:
+                open_graph[key] = value
+        
+        return PageStructure(
+            title=page_data.get('title'),
+            meta_description=page_data.get('description'),
+            meta_keywords=page_data.get('keywords'),
+            lang=page_data.get('lang'),
+            charset=page_data.get('charset'),
+            viewport=page_data.get('viewport'),
+            favicon_url=page_data.get('favicon'),
+            canonical_url=page_data.get('canonical'),
+            open_graph=open_graph
+        )
 
     async def extract_dom_structure(
         self,
@@ -164,10 +133,20 @@ class DOMExtractionService:
         session_id: str,
         wait_for_load: bool = True,
         include_computed_styles: bool = True,
-        max_depth: int = 6
+        max_depth: int = 6,
+        max_components: int = 150,
+        snippet_attributes: Optional[List[str]] = None,
+        include_hidden: bool = False
     ) -> DOMExtractionResult:
         """
         Enhanced DOM extraction with better asset detection and modern web support.
+
+        max_depth and max_components bound the blueprint tree inside the page,
+        so very large DOMs never serialize more than that across CDP.
+        snippet_attributes overrides the extractor's default whitelist of
+        attributes kept when a component's HTML snippet is truncated.
+        Hidden and tiny elements are left out of the blueprint unless
+        include_hidden is set.
         """
         start_time = time.time()
         logger.info(f"Starting enhanced blueprint extraction for {url}")
@@ -194,12 +173,22 @@ class DOMExtractionService:
                     logger.warning(f"Image loading wait failed: {e}")
                     # Continue without failing the entire process
                 
-                page_structure = await self._extract_page_structure(page, url)
-
                 logger.info("Executing enhanced blueprint extraction script...")
                 
-                # Use the enhanced extractor script
-                extraction_data = await page.evaluate(self._javascript_extractors["dom_extractor"])
+                # Page metadata and the blueprint come back from one evaluate
+                # call, saving a CDP round-trip per extraction
+                combined = await page.evaluate(
+                    self._javascript_extractors["combined"],
+                    {
+                        "includeStyles": include_computed_styles,
+                        "maxDepth": max_depth,
+                        "maxComponents": max_components,
+                        "snippetAttributes": snippet_attributes,
+                        "includeHidden": include_hidden
+                    }
+                ) or {}
+                page_structure = self._build_page_structure(combined.get("page_structure"))
+                extraction_data = combined.get("extraction")
                 
                 logger.info("=== DOM EXTRACTION DEBUG ===")
                 logger.info(f"Extraction data type: {type(extraction_data)}")
@@ -271,42 +260,15 @@ class DOMExtractionService:
                 else:
                     logger.warning("No assets found in extraction")
 
-                # Convert blueprint to model
-                blueprint_model = DetectedComponent(**blueprint_dict) if blueprint_dict else None
+                # Convert blueprint to model; the tree comes from our own
+                # extractor script, so it is constructed without validation
+                blueprint_model = DetectedComponent.from_extractor(blueprint_dict) if blueprint_dict else None
 
                 # Enhanced asset conversion with better error handling
-                assets = []
-                for asset_data in assets_data:
-                    try:
-                        # Create asset model with all available fields
-                        asset_model = ExtractedAsset(
-                            url=asset_data.get('url'),
-                            content=asset_data.get('content'),
-                            asset_type=asset_data.get('asset_type', 'unknown'),
-                            mime_type=asset_data.get('content_type'),
-                            alt_text=asset_data.get('alt_text'),
-                            dimensions=asset_data.get('dimensions') or (
-                                (asset_data.get('width'), asset_data.get('height')) 
-                                if asset_data.get('width') and asset_data.get('height') 
-                                else None
-                            ),
-                            usage_context=asset_data.get('usage_context', []),
-                            is_background=asset_data.get('asset_type') in ['background-image', 'css-background'],
-                            size=asset_data.get('file_size')
-                        )
-                        assets.append(asset_model)
-                    except Exception as e:
-                        logger.warning(f"Failed to create asset model: {e}")
-                        # Create minimal asset model
-                        try:
-                            minimal_asset = ExtractedAsset(
-                                url=asset_data.get('url'),
-                                asset_type=asset_data.get('asset_type', 'unknown'),
-                                alt_text=asset_data.get('alt_text', 'asset')
-                            )
-                            assets.append(minimal_asset)
-                        except Exception as e2:
-                            logger.error(f"Failed to create minimal asset model: {e2}")
+                assets = [
+                    asset for asset in map(self._build_asset_model, assets_data)
+                    if asset is not None
+                ]
 
                 extraction_time = time.time() - start_time
                 
@@ -346,6 +308,45 @@ class DOMExtractionService:
                 error_message=f"Blueprint extraction failed: {str(e)}"
             )
 
+    @staticmethod
+    def _build_asset_model(asset_data: Dict[str, Any]) -> Optional[ExtractedAsset]:
+        """
+        Convert one asset from the extractor script into an ExtractedAsset.
+
+        Falls back to a minimal model when the full one fails validation (for
+        example, inline SVGs whose width/height attributes are percentages),
+        and returns None if even that fails.
+        """
+        get = asset_data.get
+        asset_type = get('asset_type', 'unknown')
+        try:
+            width, height = get('width'), get('height')
+            # Create asset model with all available fields
+            return ExtractedAsset(
+                url=get('url'),
+                content=get('content'),
+                asset_type=asset_type,
+                mime_type=get('content_type'),
+                alt_text=get('alt_text'),
+                dimensions=get('dimensions') or ((width, height) if width and height else None),
+                usage_context=get('usage_context', []),
+                is_background=asset_type in BACKGROUND_ASSET_TYPES,
+                size=get('file_size')
+            )
+        except Exception as e:
+            logger.warning(f"Failed to create asset model: {e}")
+        
+        # Create minimal asset model
+        try:
+            return ExtractedAsset(
+                url=get('url'),
+                asset_type=asset_type,
+                alt_text=get('alt_text', 'asset')
+            )
+        except Exception as e:
+            logger.error(f"Failed to create minimal asset model: {e}")
+            return None
+
     async def save_extraction_result(self, result: DOMExtractionResult, output_format: str = "json") -> str:
         return await storage.save_extraction_result(result, output_format)
 
@@ -1,26 +1,62 @@
 def get_dom_extractor_script() -> str:
     """
     Returns the enhanced JavaScript code for DOM extraction with better asset detection.
+
+    The script is an async function (page.evaluate awaits the promise, and
+    the stylesheet scan yields to the renderer between sheets) taking an
+    options object: ``includeStyles: false`` skips matching stylesheet rules
+    per component, ``maxDepth`` / ``maxComponents`` override the default
+    limits on the blueprint tree, ``includeHidden: true`` keeps hidden and
+    undersized elements, and ``snippetAttributes`` replaces the attribute
+    whitelist used when a large component's HTML snippet is cut down to its
+    opening tag.
     """
     return """
-    (() => {
+    async (options = {}) => {
         // Enhanced configuration for better asset detection
         const CONFIG = {
-            MAX_DEPTH: 6,
+            INCLUDE_CSS_RULES: options.includeStyles !== false,
+            MAX_DEPTH: options.maxDepth || 6,
             MAX_CHILDREN: 8,
             MAX_CSS_RULES: 3,
-            MAX_COMPONENTS: 150,
+            MAX_COMPONENTS: options.maxComponents || 150,
             MAX_HTML_LENGTH: 500,
+            MAX_CSS_TEXT_LENGTH: 4096,
             SKIP_SMALL_ELEMENTS: true,
+            INCLUDE_HIDDEN: options.includeHidden === true,
             MIN_ELEMENT_SIZE: 10,
             ASSET_TIMEOUT: 5000,
             MAX_ASSETS: 100
         };
+
+        // Attributes kept on the opening tag of a truncated snippet. Inline
+        // styles and arbitrary data-* blobs can dwarf the markup itself and
+        // nothing downstream reads them.
+        const SNIPPET_ATTRIBUTES = options.snippetAttributes || [
+            'id', 'class', 'href', 'src', 'srcset', 'alt', 'role', 'type', 'name',
+            'placeholder', 'title', 'aria-label', 'aria-labelledby', 'data-testid'
+        ];
         
         let componentCount = 0;
         let extractedAssets = new Map(); // Use Map for better deduplication
         let assetId = 0;
 
+        // Every url(...) in a CSS value; shared by the background scans so the
+        // pattern is compiled once, and used with matchAll so layered
+        // backgrounds yield all of their images, not just the first
+        const CSS_URL_RX = /url\\(["']?([^"')]+)["']?\\)/g;
+
+        // Resolve a URL natively against the document (or a stylesheet) so the
+        // same asset referenced relatively and absolutely is recorded once;
+        // values that do not parse as URLs resolve to null and are skipped
+        const resolveUrl = (value, base) => {
+            try {
+                return new URL(value, base || document.baseURI).href;
+            } catch (e) {
+                return null;
+            }
+        };
+
         // ENHANCED: Extract ALL images including IMG tags
         const extractAllImages = () => {
             const images = [];
@@ -37,7 +73,7 @@ def get_dom_extractor_script() -> str:
                     img.getAttribute('data-lazy-src'),
                     img.getAttribute('data-original'),
                     img.dataset?.src
-                ].filter(Boolean);
+                ].filter(Boolean).map(src => resolveUrl(src)).filter(Boolean);
                 
                 sources.forEach(src => {
                     if (src && !extractedAssets.has(src)) {
@@ -108,21 +144,22 @@ def get_dom_extractor_script() -> str:
                 const bgImage = style.backgroundImage;
                 
                 if (bgImage && bgImage !== 'none' && bgImage.includes('url(')) {
-                    const urlMatch = bgImage.match(/url\\(["']?([^"')]+)["']?\\)/);
-                    if (urlMatch && urlMatch[1] && !extractedAssets.has(urlMatch[1])) {
-                        const url = urlMatch[1];
-                        extractedAssets.set(url, ++assetId);
-                        
-                        backgrounds.push({
-                            id: assetId,
-                            url: url,
-                            asset_type: 'background-image',
-                            alt_text: el.getAttribute('aria-label') || el.title || 'background-image',
-                            element_tag: el.tagName,
-                            classes: Array.from(el.classList),
-                            usage_context: ['background-css'],
-                            element_location: `${el.tagName}[${index}]`
-                        });
+                    for (const urlMatch of bgImage.matchAll(CSS_URL_RX)) {
+                        const url = resolveUrl(urlMatch[1]);
+                        if (url && !extractedAssets.has(url)) {
+                            extractedAssets.set(url, ++assetId);
+                            
+                            backgrounds.push({
+                                id: assetId,
+                                url: url,
+                                asset_type: 'background-image',
+                                alt_text: el.getAttribute('aria-label') || el.title || 'background-image',
+                                element_tag: el.tagName,
+                                classes: Array.from(el.classList),
+                                usage_context: ['background-css'],
+                                element_location: `${el.tagName}[${index}]`
+                            });
+                        }
                     }
                 }
             });
@@ -131,8 +168,18 @@ def get_dom_extractor_script() -> str:
             return backgrounds;
         };
 
-        // ENHANCED: Extract assets from stylesheets
-        const extractAssetsFromStylesheets = () => {
+        // Let the renderer handle pending work between stylesheets, so a page
+        // with many large sheets does not hold its main thread in one go
+        const yieldToRenderer = () => new Promise(resolve => setTimeout(resolve, 0));
+
+        // Style rules flattened once per extraction, with the selector to
+        // match against already stripped of pseudo-classes. Each entry's
+        // essential CSS is filled in the first time a component matches it.
+        const cssRuleIndex = [];
+
+        // ENHANCED: Extract assets from stylesheets. The same pass over the
+        // rules fills cssRuleIndex, one sheet at a time.
+        const scanStylesheets = async () => {
             const assets = [];
             
             try {
@@ -140,34 +187,49 @@ def get_dom_extractor_script() -> str:
                 console.log(`Scanning ${sheets.length} stylesheets`);
                 
                 for (const sheet of sheets) {
+                    let rules;
                     try {
-                        const rules = sheet.cssRules || sheet.rules;
-                        if (!rules) continue;
+                        rules = sheet.cssRules || sheet.rules;
+                    } catch (e) {
+                        // Cross-origin stylesheet
+                        continue;
+                    }
+                    if (!rules) continue;
+                    
+                    for (const rule of rules) {
+                        if (!rule.style) continue;
+                        
+                        if (CONFIG.INCLUDE_CSS_RULES && rule.selectorText) {
+                            cssRuleIndex.push({
+                                selector: rule.selectorText,
+                                matchSelector: rule.selectorText.split(':')[0],
+                                style: rule.style,
+                                essential: undefined
+                            });
+                        }
                         
-                        for (const rule of rules) {
-                            if (rule.style) {
-                                // Check background-image
-                                const bgImage = rule.style.backgroundImage;
-                                if (bgImage && bgImage !== 'none') {
-                                    const urlMatch = bgImage.match(/url\\(["']?([^"')]+)["']?\\)/);
-                                    if (urlMatch && urlMatch[1] && !extractedAssets.has(urlMatch[1])) {
-                                        extractedAssets.set(urlMatch[1], ++assetId);
-                                        assets.push({
-                                            id: assetId,
-                                            url: urlMatch[1],
-                                            asset_type: 'css-background',
-                                            alt_text: 'css-background',
-                                            css_selector: rule.selectorText,
-                                            usage_context: ['stylesheet']
-                                        });
-                                    }
+                        // Check background-image
+                        const bgImage = rule.style.backgroundImage;
+                        if (bgImage && bgImage !== 'none') {
+                            for (const urlMatch of bgImage.matchAll(CSS_URL_RX)) {
+                                // Stylesheet URLs are relative to the sheet, not the page
+                                const url = resolveUrl(urlMatch[1], sheet.href);
+                                if (url && !extractedAssets.has(url)) {
+                                    extractedAssets.set(url, ++assetId);
+                                    assets.push({
+                                        id: assetId,
+                                        url: url,
+                                        asset_type: 'css-background',
+                                        alt_text: 'css-background',
+                                        css_selector: rule.selectorText,
+                                        usage_context: ['stylesheet']
+                                    });
                                 }
                             }
                         }
-                    } catch (e) {
-                        // Cross-origin or other stylesheet error
-                        continue;
                     }
+                    
+                    await yieldToRenderer();
                 }
             } catch (error) {
                 console.warn('Stylesheet asset extraction error:', error);
@@ -181,59 +243,71 @@ def get_dom_extractor_script() -> str:
         const getAppliedCssRules = (element) => {
             if (componentCount > CONFIG.MAX_COMPONENTS) return [];
             
-            const sheets = Array.from(document.styleSheets);
             const rules = [];
-            let ruleCount = 0;
-            
-            for (const sheet of sheets) {
+            for (const entry of cssRuleIndex) {
+                if (rules.length >= CONFIG.MAX_CSS_RULES) break;
+                
                 try {
-                    if (!sheet.cssRules || ruleCount >= CONFIG.MAX_CSS_RULES) break;
-                    
-                    for (const rule of sheet.cssRules) {
-                        if (ruleCount >= CONFIG.MAX_CSS_RULES) break;
-                        
-                        try {
-                            if (element.matches(rule.selectorText.split(':')[0])) {
-                                const essentialProps = extractEssentialCSS(rule.style);
-                                if (essentialProps) {
-                                    rules.push({
-                                        selector: rule.selectorText,
-                                        css_text: essentialProps
-                                    });
-                                    ruleCount++;
-                                }
-                            }
-                        } catch(e) { 
-                            // Ignore invalid selectors
-                        }
-                    }
-                } catch (e) { 
-                    // Ignore cross-origin errors
+                    if (!element.matches(entry.matchSelector)) continue;
+                } catch (e) {
+                    // Ignore invalid selectors
+                    continue;
+                }
+                
+                if (entry.essential === undefined) {
+                    entry.essential = extractEssentialCSS(entry.style);
+                }
+                if (entry.essential) {
+                    rules.push({
+                        selector: entry.selector,
+                        css_text: entry.essential
+                    });
                 }
             }
             return rules;
         };
 
+        // Properties worth sending back for a matched rule, and the values that
+        // carry no information over the default; built once, not per rule
+        const ESSENTIAL_CSS_PROPS = [
+            'display', 'position', 'flex', 'grid', 'width', 'height', 
+            'margin', 'padding', 'background', 'background-image', 'background-color',
+            'color', 'font-family', 'font-size', 'font-weight', 'text-align', 
+            'border', 'border-radius', 'opacity', 'transform'
+        ];
+        const DEFAULT_CSS_VALUES = new Set(['', 'initial', 'normal', 'none']);
+
+        // Declarations that would push a rule past MAX_CSS_TEXT_LENGTH (inline
+        // data URIs, huge gradients) are left out rather than cut mid-value
         const extractEssentialCSS = (style) => {
-            const importantProps = [
-                'display', 'position', 'flex', 'grid', 'width', 'height', 
-                'margin', 'padding', 'background', 'background-image', 'background-color',
-                'color', 'font-family', 'font-size', 'font-weight', 'text-align', 
-                'border', 'border-radius', 'opacity', 'transform'
-            ];
-            
             const essential = [];
-            for (const prop of importantProps) {
+            let length = 0;
+            for (const prop of ESSENTIAL_CSS_PROPS) {
                 const value = style.getPropertyValue(prop);
-                if (value && value !== 'initial' && value !== 'normal' && value !== 'none') {
-                    essential.push(prop + ': ' + value);
+                if (!DEFAULT_CSS_VALUES.has(value)) {
+                    const declaration = prop + ': ' + value;
+                    if (length + declaration.length > CONFIG.MAX_CSS_TEXT_LENGTH) continue;
+                    length += declaration.length + 2;
+                    essential.push(declaration);
                 }
             }
             
             return essential.length > 0 ? essential.join('; ') : null;
         };
 
-        const shouldSkipElement = (element) => {
+        const shouldSkipElement = (element, tagName) => {
+            if (CONFIG.INCLUDE_HIDDEN) {
+                return false;
+            }
+            
+            // offsetParent is null under display:none, and otherwise only for
+            // the root and fixed-position elements. That settles most hidden
+            // subtrees without forcing layout for a bounding box.
+            if (element.offsetParent === null && tagName !== 'body' && tagName !== 'html' &&
+                window.getComputedStyle(element).position !== 'fixed') {
+                return true;
+            }
+            
             if (CONFIG.SKIP_SMALL_ELEMENTS) {
                 const rect = element.getBoundingClientRect();
                 if (rect.width < CONFIG.MIN_ELEMENT_SIZE || rect.height < CONFIG.MIN_ELEMENT_SIZE) {
@@ -251,24 +325,41 @@ def get_dom_extractor_script() -> str:
 
         const getComponentType = (element) => {
             const tag = element.tagName.toLowerCase();
-            const classList = Array.from(element.classList);
 
             // Prioritize visual elements
             if (tag === 'img' || tag === 'picture') return 'image';
             if (tag === 'svg') return 'svg';
-            if (tag === 'header' || classList.some(c => c.includes('header'))) return 'header';
-            if (tag === 'nav' || classList.some(c => c.includes('nav'))) return 'navbar';
-            if (tag === 'main' || classList.some(c => c.includes('main'))) return 'section';
+
+            // Join the class list once for all the keyword probes below. None of
+            // the keywords contains a space, so a substring hit in the joined
+            // string is a hit in some single class name.
+            const classNames = Array.from(element.classList).join(' ');
+            if (tag === 'header' || classNames.includes('header')) return 'header';
+            if (tag === 'nav' || classNames.includes('nav')) return 'navbar';
+            if (tag === 'main' || classNames.includes('main')) return 'section';
             if (tag === 'button' || element.getAttribute('role') === 'button') return 'button';
             if (tag === 'a') return 'link';
             if (tag === 'form') return 'form';
             if (tag === 'input' || tag === 'textarea' || tag === 'select') return 'input';
-            if (classList.some(c => c.includes('card'))) return 'card';
+            if (classNames.includes('card')) return 'card';
             if (['section', 'article', 'aside'].includes(tag)) return 'section';
             
             return 'div';
         };
 
+        // Rebuild an element's opening tag from the whitelisted attributes
+        // only, looking each one up instead of walking element.attributes
+        const getOpeningTag = (element, tagName) => {
+            let tag = '<' + tagName;
+            for (const name of SNIPPET_ATTRIBUTES) {
+                const value = element.getAttribute(name);
+                if (value !== null) {
+                    tag += ` ${name}="${value.replace(/&/g, '&amp;').replace(/"/g, '&quot;')}"`;
+                }
+            }
+            return tag + '>';
+        };
+
         const buildComponentTree = (element, depth, allAssets) => {
             depth = depth || 0;
             allAssets = allAssets || [];
@@ -283,30 +374,27 @@ def get_dom_extractor_script() -> str:
                 return null;
             }
             
-            if (shouldSkipElement(element)) {
+            if (shouldSkipElement(element, tagName)) {
                 return null;
             }
 
             componentCount++;
 
             const componentType = getComponentType(element);
+            const isAsset = componentType === 'image' || componentType === 'svg';
             
-            // Create HTML snippet - preserve more for assets
+            // Create HTML snippet. Image and SVG components keep their full
+            // markup, so only the other types are truncated; reusing the type
+            // decided above also avoids serializing asset subtrees twice.
             let htmlSnippet = element.outerHTML;
-            if (htmlSnippet.length > CONFIG.MAX_HTML_LENGTH) {
-                if (['img', 'svg', 'picture'].includes(tagName)) {
-                    // For assets, keep more of the HTML
-                    htmlSnippet = htmlSnippet.substring(0, CONFIG.MAX_HTML_LENGTH * 2);
-                } else {
-                    const match = htmlSnippet.match(/^<[^>]+>/);
-                    htmlSnippet = match ? match[0] : '<' + tagName + '>';
-                }
+            if (!isAsset && htmlSnippet.length > CONFIG.MAX_HTML_LENGTH) {
+                htmlSnippet = getOpeningTag(element, tagName);
             }
 
             const componentData = {
                 component_type: componentType,
                 html_snippet: htmlSnippet,
-                relevant_css_rules: getAppliedCssRules(element),
+                relevant_css_rules: CONFIG.INCLUDE_CSS_RULES ? getAppliedCssRules(element) : [],
                 children: []
             };
 
@@ -315,12 +403,10 @@ def get_dom_extractor_script() -> str:
                 if (element.src) {
                     componentData.asset_url = element.src;
                 }
-                componentData.html_snippet = element.outerHTML;
                 if (element.alt) {
                     componentData.label = element.alt;
                 }
             } else if (componentType === 'svg') {
-                componentData.html_snippet = element.outerHTML;
                 componentData.asset_url = 'inline-svg';
                 componentData.label = element.getAttribute('aria-label') || 'svg-icon';
             } else if (['link', 'button'].includes(componentType)) {
@@ -362,8 +448,8 @@ def get_dom_extractor_script() -> str:
         const backgroundImages = extractBackgroundImages();
         allAssets.push(...backgroundImages);
         
-        // 4. Extract from stylesheets
-        const stylesheetAssets = extractAssetsFromStylesheets();
+        // 4. Extract from stylesheets (and index their rules for matching)
+        const stylesheetAssets = await scanStylesheets();
         allAssets.push(...stylesheetAssets);
         
         console.log(`Total assets found: IMG=${allImages.length}, SVG=${allSVGs.length}, BG=${backgroundImages.length}, CSS=${stylesheetAssets.length}`);
@@ -414,7 +500,7 @@ def get_dom_extractor_script() -> str:
                 }
             }
         };
-    })();
+    }
     """
    
 
@@ -506,3 +592,61 @@ def get_style_extractor_script() -> str:
         };
     })()
     """
+
+
+def get_page_structure_script() -> str:
+    """Returns the JavaScript function that reads page-level metadata."""
+    return """
+    () => {
+        const getMetaContent = (name) => {
+            const meta = document.querySelector(`meta[name="${name}"], meta[property="${name}"]`);
+            return meta ? meta.getAttribute('content') : null;
+        };
+        
+        return {
+            title: document.title,
+            description: getMetaContent('description'),
+            keywords: getMetaContent('keywords'),
+            lang: document.documentElement.lang,
+            charset: document.characterSet,
+            viewport: getMetaContent('viewport'),
+            favicon: document.querySelector('link[rel*="icon"]')?.href,
+            canonical: document.querySelector('link[rel="canonical"]')?.href,
+            og_title: getMetaContent('og:title'),
+            og_description: getMetaContent('og:description'),
+            og_image: getMetaContent('og:image'),
+            og_url: getMetaContent('og:url'),
+            twitter_card: getMetaContent('twitter:card'),
+            twitter_title: getMetaContent('twitter:title'),
+            twitter_description: getMetaContent('twitter:description'),
+            twitter_image: getMetaContent('twitter:image')
+        };
+    }
+    """
+
+
+def get_combined_extractor_script() -> str:
+    """
+    Returns JavaScript that collects page metadata and the blueprint extraction
+    in a single evaluate round-trip.
+
+    Takes the same options object as the DOM extractor script. A failure while
+    reading metadata yields a null page_structure rather than failing the
+    whole extraction.
+    """
+    page_structure = get_page_structure_script().strip()
+    blueprint = get_dom_extractor_script().strip()
+    return f"""
+    async (options = {{}}) => {{
+        let pageStructure = null;
+        try {{
+            pageStructure = ({page_structure})();
+        }} catch (e) {{
+            console.warn('Page structure extraction failed:', e);
+        }}
+        return {{
+            page_structure: pageStructure,
+            extraction: await ({blueprint})(options)
+        }};
+    }}
+    """
@@ -1,10 +1,9 @@
 # backend/app/services/extraction/storage.py
 
-import json
+import asyncio
 import time
 from pathlib import Path
 from typing import Dict, Any, List, Optional
-from dataclasses import asdict
 
 from ...config import settings
 from ...core.exceptions import ProcessingError
@@ -36,11 +35,11 @@ async def save_extraction_result(
     
     try:
         if output_format == "json":
-            # Convert to JSON-serializable format
-            data = result.model_dump()
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+            # Serialize straight from the model; model_dump() would first
+            # build a full copy of every nested element/asset dict. The bytes
+            # go to disk as-is, off the event loop.
+            data = result.to_bytes(indent=2)
+            await asyncio.to_thread(file_path.write_bytes, data)
                 
         elif output_format == "html":
             # Generate HTML report
@@ -1,4 +1,5 @@
 import re
+from itertools import chain
 from typing import List, Dict, Any, Optional, Tuple
 from bs4 import BeautifulSoup, Tag, NavigableString
 import json
@@ -7,6 +8,22 @@ from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Keyword patterns used while placing missing assets, compiled once
+LOGO_KEYWORDS_RE = re.compile(r'logo|brand', re.I)
+ICON_TARGET_CLASS_RE = re.compile(r'icon|btn|link', re.I)
+ICON_CONTAINER_CLASS_RE = re.compile(r'icon|svg', re.I)
+
+# Attributes that may carry an image URL, including common lazy-loading ones
+IMG_SRC_ATTRIBUTES = ('src', 'data-src', 'data-lazy-src', 'data-original')
+SVG_HREF_ATTRIBUTES = ('href', 'xlink:href')
+
+# Parents whose text is code, never an asset placeholder
+NON_TEXT_PARENT_TAGS = frozenset({'script', 'style'})
+
+# url() references in CSS, including data URLs, and custom properties holding one
+CSS_URL_RE = re.compile(r'url\s*\(\s*([^)]+)\s*\)')
+CSS_CUSTOM_PROP_URL_RE = re.compile(r'(--[\w-]+)\s*:\s*url\(["\']?([^"\')\s]+)["\']?\)')
+
 class HTMLRewriterService:
     """
     Enhanced HTML rewriter that handles modern web patterns including:
@@ -40,13 +57,18 @@ class HTMLRewriterService:
         try:
             soup = BeautifulSoup(html_content, 'html.parser')
             
+            # One walk over the tree serves every tag-based pass below; none of
+            # them adds or removes tags, so the index stays valid until the
+            # inline-asset pass, which may swap text nodes for new tags
+            tags = self._index_tags(soup)
+            
             # Enhanced asset rewriting
-            self._rewrite_img_tags(soup, asset_map)
-            self._rewrite_picture_elements(soup, asset_map)
-            self._rewrite_svg_tags(soup, asset_map)
-            self._rewrite_background_images(soup, asset_map)
-            self._rewrite_style_blocks(soup, asset_map)
-            self._rewrite_css_custom_properties(soup, asset_map)
+            self._rewrite_img_tags(soup, asset_map, tags.get('img', []))
+            self._rewrite_picture_elements(soup, asset_map, tags.get('picture', []))
+            self._rewrite_svg_tags(soup, asset_map, tags)
+            self._rewrite_background_images(soup, asset_map, tags)
+            self._rewrite_style_blocks(soup, asset_map, tags.get('style', []))
+            self._rewrite_css_custom_properties(soup, asset_map, tags.get('style', []))
             self._handle_inline_assets(soup, asset_map)
             self._handle_data_urls(soup, asset_map)
             self._handle_react_patterns(soup, asset_map)
@@ -58,33 +80,44 @@ class HTMLRewriterService:
             # Fallback to regex-based replacement
             return self._regex_asset_replacement(html_content, asset_map)
 
-    def _rewrite_img_tags(self, soup: BeautifulSoup, asset_map: Dict[str, str]) -> None:
+    @staticmethod
+    def _index_tags(soup: BeautifulSoup) -> Dict[str, List[Tag]]:
+        """Group every tag in the document by name, in document order."""
+        index: Dict[str, List[Tag]] = {}
+        for tag in soup.find_all(True):
+            index.setdefault(tag.name, []).append(tag)
+        return index
+
+    def _rewrite_img_tags(self, soup: BeautifulSoup, asset_map: Dict[str, str], img_tags: Optional[List[Tag]] = None) -> None:
         """Enhanced img tag rewriting with lazy loading and responsive handling."""
-        img_tags = soup.find_all('img')
+        if img_tags is None:
+            img_tags = soup.find_all('img')
         
         for img in img_tags:
-            # Handle multiple src attributes
-            src_attributes = ['src', 'data-src', 'data-lazy-src', 'data-original']
+            # Read the attribute dict directly; Tag.get() is a method call per lookup
+            attrs = img.attrs
             
-            for attr in src_attributes:
-                original_src = img.get(attr)
+            # Handle multiple src attributes
+            for attr in IMG_SRC_ATTRIBUTES:
+                original_src = attrs.get(attr)
                 if original_src and original_src in asset_map:
                     new_src = asset_map[original_src]
                     logger.debug(f"Rewriting img {attr}: {original_src} -> {new_src}")
-                    img[attr] = new_src
+                    attrs[attr] = new_src
                     self.rewrite_stats['img_tags_processed'] += 1
             
             # Handle srcset attributes
-            srcset = img.get('srcset')
+            srcset = attrs.get('srcset')
             if srcset:
                 new_srcset = self._rewrite_srcset(srcset, asset_map)
                 if new_srcset != srcset:
                     img['srcset'] = new_srcset
                     logger.debug(f"Rewriting img srcset")
 
-    def _rewrite_picture_elements(self, soup: BeautifulSoup, asset_map: Dict[str, str]) -> None:
+    def _rewrite_picture_elements(self, soup: BeautifulSoup, asset_map: Dict[str, str], picture_tags: Optional[List[Tag]] = None) -> None:
         """Rewrite picture elements and their source children."""
-        picture_tags = soup.find_all('picture')
+        if picture_tags is None:
+            picture_tags = soup.find_all('picture')
         
         for picture in picture_tags:
             # Handle source elements
@@ -121,13 +154,17 @@ class HTMLRewriterService:
         
         return ', '.join(srcset_parts)
 
-    def _rewrite_svg_tags(self, soup: BeautifulSoup, asset_map: Dict[str, str]) -> None:
+    def _rewrite_svg_tags(self, soup: BeautifulSoup, asset_map: Dict[str, str], tags: Optional[Dict[str, List[Tag]]] = None) -> None:
         """Enhanced SVG handling including use elements and symbol references."""
+        if tags is None:
+            tags = self._index_tags(soup)
+        
         # Handle SVG use elements
-        use_tags = soup.find_all('use')
+        use_tags = tags.get('use', [])
         for use in use_tags:
-            for attr in ['href', 'xlink:href']:
-                href = use.get(attr)
+            attrs = use.attrs
+            for attr in SVG_HREF_ATTRIBUTES:
+                href = attrs.get(attr)
                 if href and href in asset_map:
                     new_href = asset_map[href]
                     logger.debug(f"Rewriting SVG use {attr}: {href} -> {new_href}")
@@ -135,19 +172,25 @@ class HTMLRewriterService:
                     self.rewrite_stats['svg_elements_processed'] += 1
         
         # Handle SVG image elements
-        svg_images = soup.find_all('image')  # SVG image elements
+        svg_images = tags.get('image', [])  # SVG image elements
         for img in svg_images:
-            for attr in ['href', 'xlink:href']:
-                href = img.get(attr)
+            attrs = img.attrs
+            for attr in SVG_HREF_ATTRIBUTES:
+                href = attrs.get(attr)
                 if href and href in asset_map:
                     new_href = asset_map[href]
                     logger.debug(f"Rewriting SVG image {attr}: {href} -> {new_href}")
                     img[attr] = new_href
                     self.rewrite_stats['svg_elements_processed'] += 1
 
-    def _rewrite_background_images(self, soup: BeautifulSoup, asset_map: Dict[str, str]) -> None:
+    def _rewrite_background_images(self, soup: BeautifulSoup, asset_map: Dict[str, str], tags: Optional[Dict[str, List[Tag]]] = None) -> None:
         """Enhanced background image rewriting."""
-        elements_with_style = soup.find_all(style=True)
+        if tags is None:
+            tags = self._index_tags(soup)
+        elements_with_style = [
+            element for element in chain.from_iterable(tags.values())
+            if 'style' in element.attrs
+        ]
         
         for element in elements_with_style:
             style_str = element['style']
@@ -156,9 +199,10 @@ class HTMLRewriterService:
                 element['style'] = new_style
                 self.rewrite_stats['background_images_processed'] += 1
 
-    def _rewrite_style_blocks(self, soup: BeautifulSoup, asset_map: Dict[str, str]) -> None:
+    def _rewrite_style_blocks(self, soup: BeautifulSoup, asset_map: Dict[str, str], style_blocks: Optional[List[Tag]] = None) -> None:
         """Enhanced style block rewriting."""
-        style_blocks = soup.find_all('style')
+        if style_blocks is None:
+            style_blocks = soup.find_all('style')
         
         for block in style_blocks:
             if block.string:
@@ -168,17 +212,16 @@ class HTMLRewriterService:
                     block.string = new_css
                     self.rewrite_stats['css_rules_processed'] += 1
 
-    def _rewrite_css_custom_properties(self, soup: BeautifulSoup, asset_map: Dict[str, str]) -> None:
+    def _rewrite_css_custom_properties(self, soup: BeautifulSoup, asset_map: Dict[str, str], style_blocks: Optional[List[Tag]] = None) -> None:
         """Handle CSS custom properties (CSS variables) that might contain URLs."""
-        style_blocks = soup.find_all('style')
+        if style_blocks is None:
+            style_blocks = soup.find_all('style')
         
         for block in style_blocks:
             if block.string:
                 css_content = block.string
                 
                 # Find CSS custom properties with URLs
-                custom_prop_pattern = r'(--[\w-]+)\s*:\s*url\(["\']?([^"\')\s]+)["\']?\)'
-                
                 def replace_custom_prop(match):
                     prop_name = match.group(1)
                     url = match.group(2)
@@ -190,7 +233,7 @@ class HTMLRewriterService:
                     
                     return match.group(0)
                 
-                new_css = re.sub(custom_prop_pattern, replace_custom_prop, css_content)
+                new_css = CSS_CUSTOM_PROP_URL_RE.sub(replace_custom_prop, css_content)
                 if new_css != css_content:
                     block.string = new_css
 
@@ -202,7 +245,7 @@ class HTMLRewriterService:
                 parent = text_node.parent
                 
                 # Skip script and style tags
-                if parent and parent.name in ['script', 'style']:
+                if parent and parent.name in NON_TEXT_PARENT_TAGS:
                     continue
                 
                 # Look for asset references in text
@@ -264,6 +307,11 @@ class HTMLRewriterService:
 
     def _replace_urls_in_css(self, css_text: str, asset_map: Dict[str, str]) -> str:
         """Enhanced URL replacement in CSS with support for multiple backgrounds."""
+        # Most inline styles carry no url() at all; a substring probe skips
+        # the regex (and the per-match callback setup) for those
+        if 'url' not in css_text:
+            return css_text
+
         def replace_url(match):
             url = match.group(1).strip('\'"')
             if url in asset_map:
@@ -272,9 +320,7 @@ class HTMLRewriterService:
                 return f"url('{new_url}')"
             return match.group(0)
         
-        # Enhanced pattern to match url() in CSS, including data URLs
-        url_pattern = r'url\s*\(\s*([^)]+)\s*\)'
-        return re.sub(url_pattern, replace_url, css_text)
+        return CSS_URL_RE.sub(replace_url, css_text)
 
     def _regex_asset_replacement(self, html_content: str, asset_map: Dict[str, str]) -> str:
         """Enhanced fallback regex-based asset replacement."""
@@ -332,9 +378,9 @@ class HTMLRewriterService:
                     continue
                 
                 # Logo placement
-                if any(keyword in alt_text for keyword in ['logo', 'brand']):
+                if LOGO_KEYWORDS_RE.search(alt_text):
                     target = header or nav or main
-                    if target and not target.find('img', alt=re.compile(r'logo|brand', re.I)):
+                    if target and not target.find('img', alt=LOGO_KEYWORDS_RE):
                         logo_element = self._create_asset_element(soup, asset, 'logo')
                         if logo_element:
                             target.insert(0, logo_element)
@@ -344,7 +390,7 @@ class HTMLRewriterService:
                 elif asset_type == 'svg':
                     # Look for elements that might need icons
                     potential_targets = soup.find_all(['button', 'a', 'span'], 
-                                                    class_=re.compile(r'icon|btn|link', re.I))
+                                                    class_=ICON_TARGET_CLASS_RE)
                     
                     for target in potential_targets[:3]:
                         if not target.find(['img', 'svg']):
@@ -421,7 +467,7 @@ class HTMLRewriterService:
                 
                 # Check if this asset is mentioned in HTML
                 if asset_path and not (asset_path in html_content or asset.get('original_url', '') in html_content):
-                    if 'logo' in alt_text or 'brand' in alt_text:
+                    if LOGO_KEYWORDS_RE.search(alt_text):
                         missing_logos.append(asset)
                     elif 'icon' in alt_text or asset.get('asset_type') == 'svg':
                         missing_icons.append(asset)
@@ -444,7 +490,7 @@ class HTMLRewriterService:
             # Inject critical SVG icons
             if missing_icons:
                 # Look for potential icon containers
-                icon_containers = soup.find_all(['i', 'span', 'div'], class_=re.compile(r'icon|svg', re.I))
+                icon_containers = soup.find_all(['i', 'span', 'div'], class_=ICON_CONTAINER_CLASS_RE)
                 
                 for i, container in enumerate(icon_containers[:len(missing_icons)]):
                     if i < len(missing_icons):
@@ -15,6 +15,9 @@ from .image_resizer_service import image_resizer_service
 
 logger = get_logger(__name__)
 
+# CSS rule fields kept when summarizing a component for the prompt
+SUMMARY_CSS_RULE_KEYS = frozenset({'selector', 'css_text'})
+
 try:
     import anthropic
 except ImportError:
@@ -105,7 +108,7 @@ class LLMService:
                 # Include only the most important CSS rules
                 if comp.relevant_css_rules:
                     element_info["key_styles"] = [
-                        {k: v for k, v in rule.items() if k in ['selector', 'css_text']}
+                        {k: v for k, v in rule.items() if k in SUMMARY_CSS_RULE_KEYS}
                         for rule in comp.relevant_css_rules[:2]  # Only first 2 rules
                     ]
                 
@@ -220,8 +223,12 @@ class LLMService:
         if estimated_tokens > self.max_prompt_tokens:
             logger.warning(f"Blueprint too large ({estimated_tokens} tokens), creating summary instead")
             
-            # Create a component summary instead of full blueprint
-            if isinstance(blueprint_dict, dict) and 'blueprint' in blueprint_dict:
+            # Create a component summary instead of full blueprint. A
+            # DetectedComponent is summarized as-is; dumping it and validating
+            # the dump back into a model would copy the whole tree twice.
+            if isinstance(component_result, DetectedComponent):
+                component = component_result
+            elif isinstance(blueprint_dict, dict) and 'blueprint' in blueprint_dict:
                 component = DetectedComponent(**blueprint_dict['blueprint']) if blueprint_dict['blueprint'] else None
             else:
                 component = DetectedComponent(**blueprint_dict) if blueprint_dict else None
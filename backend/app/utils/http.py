@@ -0,0 +1,60 @@
+from datetime import datetime, UTC
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+import httpx
+
+# HTTP/2 needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# orjson decodes API payloads several times faster than the stdlib parser
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given as seconds or an HTTP date.
+
+    Args:
+        value: Raw header value, if any.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+def decode_json(response: httpx.Response) -> Any:
+    """
+    Decode a JSON response body, using orjson when it is installed.
+
+    Args:
+        response: Response whose body has been read.
+
+    Returns:
+        The decoded JSON value.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
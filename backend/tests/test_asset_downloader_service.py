@@ -0,0 +1,484 @@
+import pytest
+import asyncio
+import gzip
+import itertools
+import json
+import httpx
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+from PIL import Image
+
+from app.services.asset_downloader_service import (
+    AssetCache,
+    AssetDownloaderService,
+    AsyncArtifactWriter,
+    peek_image_size,
+    needs_resize,
+    parse_retry_after,
+    read_response_body
+)
+from app.models.dom_extraction import ExtractedAssetModel
+from app.config import settings
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    """Create an asset downloader writing into a temporary directory."""
+    with patch.object(settings, 'temp_storage_path', str(tmp_path)):
+        yield AssetDownloaderService("test-session")
+
+
+def make_asset(url: str, asset_type: str = "image") -> ExtractedAssetModel:
+    """Create a minimal extracted asset."""
+    return ExtractedAssetModel(url=url, asset_type=asset_type)
+
+
+class TestAssetDownloaderService:
+    """Test asset downloading behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_duplicate_urls_downloaded_once(self, downloader):
+        """Test that repeated URLs trigger a single download."""
+        assets = [make_asset("https://cdn.example.com/logo.png") for _ in range(3)]
+
+        with patch.object(downloader, '_download_with_retries',
+                          AsyncMock(return_value=(b"png-bytes", "image/png", {}))) as mock_download:
+            results = await downloader.download_assets(assets)
+
+        assert mock_download.await_count == 1
+        assert len(results) == 3
+        assert all(r["success"] for r in results)
+        assert [r["original_asset"] for r in results] == assets
+        assert downloader.get_stats()["deduplicated"] == 2
+
+    @pytest.mark.asyncio
+    async def test_identical_content_is_linked(self, downloader):
+        """Test that identical bytes from different URLs share one file."""
+        assets = [
+            make_asset("https://a.example.com/logo.png"),
+            make_asset("https://b.example.com/logo.png"),
+        ]
+
+        with patch.object(downloader, '_download_with_retries',
+                          AsyncMock(return_value=(b"same-bytes", "image/png", {}))):
+            results = await downloader.download_assets(assets)
+
+        paths = [r["local_file_path"] for r in results]
+        assert paths[0] != paths[1]
+        with open(paths[0], "rb") as f1, open(paths[1], "rb") as f2:
+            assert f1.read() == f2.read() == b"same-bytes"
+
+    @pytest.mark.asyncio
+    async def test_manifest_written_once_per_session(self, downloader):
+        """Test that a single manifest with every result is written."""
+        assets = [make_asset("https://x/a.png"), make_asset("https://x/b.png")]
+
+        with patch.object(downloader, '_download_with_retries',
+                          AsyncMock(return_value=(b"bytes", "image/png", {}))):
+            results = await downloader.download_assets(assets)
+
+        manifest = json.loads((downloader.output_dir / "manifest.json").read_bytes())
+        assert manifest["session_id"] == "test-session"
+        assert [a["original_url"] for a in manifest["assets"]] == [r["original_url"] for r in results]
+        assert "original_asset" not in manifest["assets"][0]
+
+    @pytest.mark.asyncio
+    async def test_data_urls_decoded_and_saved(self, downloader):
+        """Test that base64 and percent-encoded data URLs are written to disk."""
+        assets = [
+            make_asset("data:image/png;base64,aGVsbG8="),
+            make_asset("data:image/svg+xml,%3Csvg%2F%3E", "svg"),
+        ]
+
+        results = await downloader.download_assets(assets)
+
+        assert all(r["is_data_url"] for r in results)
+        with open(results[0]["local_file_path"], "rb") as f:
+            assert f.read() == b"hello"
+        with open(results[1]["local_file_path"], "rb") as f:
+            assert f.read() == b"<svg/>"
+        assert downloader.get_stats()["data_urls"] == 2
+
+    def test_clean_url(self, downloader):
+        """Test URL normalisation for absolute, protocol-relative and relative URLs."""
+        assert downloader._clean_url("https://x/a.png") == "https://x/a.png"
+        assert downloader._clean_url("//cdn.x/a.png") == "https://cdn.x/a.png"
+        assert downloader._clean_url("/img/a.png", "https://site.x/page") == "https://site.x/img/a.png"
+        assert downloader._clean_url("/img/a.png") is None
+        assert downloader._clean_url("ftp://x/a.png") is None
+
+    def test_sanitize_svg_strips_scripts_and_handlers(self, downloader):
+        """Test that scripts, event handlers and javascript: URLs are removed."""
+        svg = (
+            '<svg onload="alert(1)"><SCRIPT type="x">evil()</SCRIPT>'
+            '<a href="javascript:void(0)"><path d="M0 0"/></a></svg>'
+        )
+
+        sanitized = downloader._sanitize_svg(svg)
+
+        assert "script" not in sanitized.lower()
+        assert "onload" not in sanitized
+        assert "javascript:" not in sanitized
+        assert '<path d="M0 0"/>' in sanitized
+
+    def test_downloaded_svg_sanitized_as_bytes(self, downloader):
+        """Test that downloaded SVG bytes are sanitized without decoding."""
+        svg = b'<svg onclick="x()"><script>evil()</script><text>\xe2\x9c\x93</text></svg>'
+
+        processed = downloader._process_asset_content(svg, "image/svg+xml", make_asset("https://x/a.svg", "svg"))
+
+        assert processed == b'<svg ><text>\xe2\x9c\x93</text></svg>'
+
+    @pytest.mark.asyncio
+    async def test_repeated_inline_svg_written_once(self, downloader):
+        """Test that identical inline SVG icons share one file write."""
+        icon = '<svg viewBox="0 0 1 1"><path d="M0 0"/></svg>'
+        assets = [ExtractedAssetModel(content=icon, asset_type="svg") for _ in range(5)]
+
+        results = await downloader.download_assets(assets)
+
+        assert all(r["success"] for r in results)
+        assert len({r["local_file_path"] for r in results}) == 1
+        assert downloader._writer.files_written == 1
+        with open(results[0]["local_file_path"]) as f:
+            assert f.read() == icon
+
+    @pytest.mark.asyncio
+    async def test_fatal_failure_cancels_sibling_downloads(self, downloader):
+        """Test that an error escaping a download task cancels the others."""
+        async def fake_download(asset):
+            if asset.url.endswith("boom"):
+                raise RuntimeError("fatal")
+            await asyncio.sleep(30)
+
+        assets = [make_asset("https://x/boom")] + [make_asset(f"https://x/{i}.png") for i in range(2)]
+
+        with patch.object(downloader, '_download_single_asset', side_effect=fake_download):
+            results = await asyncio.wait_for(downloader.download_assets(assets), timeout=5)
+
+        errors = [r for r in results if not r.get("is_fallback")]
+        assert [r["error"] for r in errors] == ["fatal", "Download cancelled", "Download cancelled"]
+        assert downloader.get_stats()["failed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_fresh_cache_entry_skips_download(self, tmp_path):
+        """Test that a second session reuses the cached asset without a request."""
+        url = "https://cdn.example.com/logo.png"
+
+        with patch.object(settings, 'temp_storage_path', str(tmp_path)):
+            first = AssetDownloaderService("session-1")
+            second = AssetDownloaderService("session-2")
+
+        with patch.object(first, '_download_with_retries',
+                          AsyncMock(return_value=(b"logo", "image/png", {}))):
+            await first.download_assets([make_asset(url)])
+
+        with patch.object(second, '_download_with_retries', AsyncMock()) as mock_download:
+            results = await second.download_assets([make_asset(url)])
+
+        mock_download.assert_not_awaited()
+        assert results[0]["from_cache"] is True
+        assert results[0]["content_type"] == "image/png"
+        with open(results[0]["local_file_path"], "rb") as f:
+            assert f.read() == b"logo"
+
+    @pytest.mark.asyncio
+    async def test_no_store_response_not_cached(self, tmp_path):
+        """Test that Cache-Control: no-store responses are fetched every time."""
+        url = "https://cdn.example.com/private.png"
+        response = (b"private", "image/png", {"cache-control": "private, no-store"})
+
+        with patch.object(settings, 'temp_storage_path', str(tmp_path)):
+            first = AssetDownloaderService("session-1")
+            second = AssetDownloaderService("session-2")
+
+        for downloader in (first, second):
+            with patch.object(downloader, '_download_with_retries',
+                              AsyncMock(return_value=response)) as mock_download:
+                await downloader.download_assets([make_asset(url)])
+            mock_download.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stale_cache_entry_revalidated_with_etag(self, tmp_path):
+        """Test that stale entries send If-None-Match and reuse the cache on 304."""
+        url = "https://cdn.example.com/logo.png"
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"etag": '"v1"', "cache-control": "no-cache"})
+            return httpx.Response(200, content=b"logo", headers={
+                "content-type": "image/png", "etag": '"v1"', "cache-control": "no-cache"
+            })
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with patch.object(settings, 'temp_storage_path', str(tmp_path)):
+                first = AssetDownloaderService("session-1", client=client)
+                second = AssetDownloaderService("session-2", client=client)
+
+            await first.download_assets([make_asset(url)])
+            results = await second.download_assets([make_asset(url)])
+
+        assert [r.headers.get("if-none-match") for r in requests] == [None, '"v1"']
+        assert results[0]["from_cache"] is True
+        assert second.get_stats()["revalidated"] == 1
+        with open(results[0]["local_file_path"], "rb") as f:
+            assert f.read() == b"logo"
+
+
+
+class TestAssetCache:
+    """Test bounds on the cross-session asset cache."""
+
+    def test_oldest_entries_evicted_past_max_bytes(self, tmp_path):
+        """Test that storing past the size cap evicts the oldest entries first."""
+        cache = AssetCache(tmp_path, default_ttl=3600, max_bytes=10)
+
+        with patch('app.services.asset_downloader_service.time.time', side_effect=itertools.count(100.0, 100.0)):
+            cache.store("https://x/a.png", b"aaaa", "image/png", {})
+            cache.store("https://x/b.png", b"bbbb", "image/png", {})
+            cache.store("https://x/c.png", b"cccc", "image/png", {})
+
+        assert cache._total_bytes == 8
+        assert sorted(p.name for p in tmp_path.glob("*.bin")) == sorted(
+            cache._paths(url)[0].name for url in ("https://x/b.png", "https://x/c.png")
+        )
+
+    def test_startup_prune_applies_smaller_cap(self, tmp_path):
+        """Test that a cache left over a lowered cap is trimmed when it is opened."""
+        cache = AssetCache(tmp_path, default_ttl=3600, max_bytes=1024)
+        cache.store("https://x/a.png", b"aaaa", "image/png", {})
+        cache.store("https://x/b.png", b"bbbb", "image/png", {})
+
+        reopened = AssetCache(tmp_path, default_ttl=3600, max_bytes=4)
+
+        assert reopened._total_bytes == 4
+        assert len(list(tmp_path.glob("*.bin"))) == 1
+        assert len(list(tmp_path.glob("*.meta"))) == 1
+
+    def test_expired_entry_without_validators_removed_on_lookup(self, tmp_path):
+        """Test that an expired entry that cannot be revalidated is deleted, not kept."""
+        cache = AssetCache(tmp_path, default_ttl=3600, max_bytes=1024)
+        cache.store("https://x/a.png", b"aaaa", "image/png", {"cache-control": "max-age=0"})
+        cache.store("https://x/b.png", b"bbbb", "image/png", {"cache-control": "max-age=0", "etag": '"v1"'})
+
+        assert cache.lookup("https://x/a.png") is None
+        assert not any(path.exists() for path in cache._paths("https://x/a.png"))
+        assert cache.lookup("https://x/b.png")["fresh"] is False
+        assert cache._total_bytes == 4
+
+
+class TestDownloadRetries:
+    """Test retry and backoff behaviour."""
+
+    @staticmethod
+    def make_downloader(tmp_path, responses):
+        """Create a downloader whose client replays the given responses."""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return responses[min(len(requests), len(responses)) - 1]
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch.object(settings, 'temp_storage_path', str(tmp_path)):
+            return AssetDownloaderService("test-session", client=client), requests
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self, tmp_path):
+        """Test that non-retriable 4xx responses fail on the first attempt."""
+        downloader, requests = self.make_downloader(tmp_path, [httpx.Response(403)])
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await downloader._download_with_retries("https://x/a.png")
+
+        assert len(requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_honored_on_429(self, tmp_path):
+        """Test that 429 responses wait exactly Retry-After before retrying."""
+        downloader, requests = self.make_downloader(tmp_path, [
+            httpx.Response(429, headers={"retry-after": "2"}),
+            httpx.Response(200, content=b"ok", headers={"content-type": "image/png"}),
+        ])
+
+        with patch("app.services.asset_downloader_service.asyncio.sleep", AsyncMock()) as mock_sleep:
+            content, content_type, _ = await downloader._download_with_retries("https://x/a.png")
+
+        assert content == b"ok"
+        assert len(requests) == 2
+        mock_sleep.assert_awaited_once_with(2.0)
+
+    @pytest.mark.asyncio
+    async def test_retry_budget_caps_total_wait(self, tmp_path):
+        """Test that an oversized Retry-After stops retrying instead of sleeping."""
+        downloader, requests = self.make_downloader(tmp_path, [
+            httpx.Response(503, headers={"retry-after": "3600"}),
+        ])
+
+        with patch("app.services.asset_downloader_service.asyncio.sleep", AsyncMock()) as mock_sleep:
+            with pytest.raises(Exception, match="retry budget"):
+                await downloader._download_with_retries("https://x/a.png")
+
+        assert len(requests) == 1
+        mock_sleep.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("headers", [
+        {},
+        {"content-encoding": "gzip"},
+    ])
+    async def test_body_read_matches_payload(self, tmp_path, headers):
+        """Test that preallocated and fallback body reads return the full payload."""
+        payload = bytes(range(256)) * 64
+        body = gzip.compress(payload) if headers else payload
+        downloader, _ = self.make_downloader(tmp_path, [
+            httpx.Response(200, content=body, headers={"content-type": "image/png", **headers}),
+        ])
+
+        content, _, _ = await downloader._download_with_retries("https://x/a.png")
+
+        assert bytes(content) == payload
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("declared_length", ["10", "2"])
+    async def test_body_length_mismatch_handled(self, declared_length):
+        """Test that bodies shorter or longer than Content-Length are read intact."""
+        response = httpx.Response(200, headers={"content-length": declared_length},
+                                  stream=httpx.ByteStream(b"abcdef"))
+
+        assert await read_response_body(response) == b"abcdef"
+
+    def test_parse_retry_after(self):
+        """Test Retry-After parsing for seconds and invalid values."""
+        assert parse_retry_after("120") == 120.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+
+def encode_image(image_format: str, size=(321, 123), mode="RGB", **save_options) -> bytes:
+    """Encode a blank image in the given format."""
+    output = BytesIO()
+    Image.new(mode, size).save(output, format=image_format, **save_options)
+    return output.getvalue()
+
+
+class TestPeekImageSize:
+    """Test header-only image dimension parsing."""
+
+    @pytest.mark.parametrize("image_format,mode,save_options", [
+        ("PNG", "RGB", {}),
+        ("GIF", "P", {}),
+        ("JPEG", "RGB", {}),
+        ("JPEG", "RGB", {"progressive": True}),
+        ("WEBP", "RGB", {}),
+        ("WEBP", "RGBA", {"lossless": True}),
+        ("WEBP", "RGB", {"save_all": True, "append_images": [Image.new("RGB", (321, 123))]}),
+    ])
+    def test_matches_pil_dimensions(self, image_format, mode, save_options):
+        """Test that parsed dimensions match what PIL reports."""
+        content = encode_image(image_format, mode=mode, **save_options)
+
+        assert peek_image_size(content) == (321, 123)
+
+    def test_unknown_or_truncated_returns_none(self):
+        """Test that unrecognised or truncated headers are rejected."""
+        assert peek_image_size(b"not an image") is None
+        assert peek_image_size(encode_image("JPEG")[:20]) is None
+        assert peek_image_size(b"\x89PNG\r\n\x1a\n") is None
+
+
+class TestProcessAssetContent:
+    """Test image post-processing."""
+
+    def test_small_image_returned_unchanged(self, downloader):
+        """Test that images within the limit are passed through untouched."""
+        content = encode_image("PNG", size=(640, 480))
+
+        processed = downloader._process_asset_content(content, "image/png", make_asset("https://x/a.png"))
+
+        assert processed is content
+
+    def test_large_jpeg_downscaled(self, downloader):
+        """Test that oversized JPEGs are resized to fit within the limit."""
+        content = encode_image("JPEG", size=(4096, 1024))
+
+        processed = downloader._process_asset_content(content, "image/jpeg", make_asset("https://x/a.jpg"))
+
+        with Image.open(BytesIO(processed)) as img:
+            assert img.format == "JPEG"
+            assert img.size == (2048, 512)
+
+    @pytest.mark.asyncio
+    async def test_large_image_resized_in_process_pool(self, downloader):
+        """Test that oversized downloads are resized off the event loop."""
+        content = encode_image("PNG", size=(3000, 300))
+
+        with patch.object(downloader, '_download_with_retries',
+                          AsyncMock(return_value=(content, "image/png", {}))):
+            results = await downloader.download_assets([make_asset("https://x/big.png")])
+
+        with Image.open(results[0]["local_file_path"]) as img:
+            assert img.size == (2048, 205)
+
+
+class TestNeedsResize:
+    """Test the pre-PIL resize gate."""
+
+    def test_small_and_large_images(self):
+        """Test that only oversized images are sent to PIL."""
+        assert needs_resize(encode_image("WEBP", size=(800, 600))) is False
+        assert needs_resize(encode_image("PNG", size=(2049, 10))) is True
+
+    def test_avif_passed_through(self):
+        """Test that AVIF files skip PIL regardless of size."""
+        avif_header = b"\x00\x00\x00\x1cftypavif\x00\x00\x00\x00avifmif1miaf"
+
+        assert needs_resize(avif_header) is False
+
+    def test_unknown_format_goes_to_pil(self):
+        """Test that unrecognised formats are left for PIL to decide."""
+        assert needs_resize(b"BM\x00\x00") is True
+
+
+class TestAsyncArtifactWriter:
+    """Test the batched background file writer."""
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_queued_writes(self, tmp_path):
+        """Test that all queued files exist after close."""
+        writer = AsyncArtifactWriter(max_batch_size=4)
+        for i in range(10):
+            writer.write_nowait(tmp_path / f"icon_{i}.svg", f"<svg>{i}</svg>".encode())
+
+        await writer.close()
+
+        assert writer.files_written == 10
+        assert (tmp_path / "icon_7.svg").read_bytes() == b"<svg>7</svg>"
+
+    @pytest.mark.asyncio
+    async def test_close_returns_failed_writes(self, tmp_path):
+        """Test that writes which fail are reported rather than only logged."""
+        writer = AsyncArtifactWriter()
+        missing = tmp_path / "missing" / "icon.svg"
+        writer.write_nowait(tmp_path / "ok.svg", b"<svg/>")
+        writer.write_nowait(missing, b"<svg/>")
+
+        failed = await writer.close()
+
+        assert list(failed) == [missing]
+        assert writer.files_written == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_write_marks_result_failed(self, downloader):
+        """Test that an asset whose file could not be written is not reported as downloaded."""
+        icon = '<svg viewBox="0 0 1 1"><path d="M0 0"/></svg>'
+        downloader.output_dir.rmdir()
+
+        results = await downloader.download_assets([ExtractedAssetModel(content=icon, asset_type="svg")])
+
+        assert results[0]["success"] is False
+        assert results[0]["error"].startswith("Failed to write file")
+        assert downloader.download_stats["successful"] == sum(r["success"] for r in results)
@@ -0,0 +1,445 @@
+# backend/tests/test_browser_manager.py
+
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+
+from app.services.browser_manager import BrowserManager, BrowserType, _select_browser_type
+from app.core.exceptions import BrowserConnectionError, BrowserError, ConfigurationError
+from app.dependencies import get_ready_browser_manager
+
+
+def make_service():
+    """Build a mock browser service whose page_context yields a mock page."""
+    service = MagicMock()
+    service.cleanup = AsyncMock()
+    service._browser = None
+    page = AsyncMock()
+    page.title.return_value = "Health Check"
+    service.page = page
+    service.page_context_calls = 0
+
+    @asynccontextmanager
+    async def page_context(**context_options):
+        service.page_context_calls += 1
+        yield page
+
+    service.page_context = page_context
+    return service
+
+
+class TestBrowserManagerHealthCheck:
+    """Test suite for BrowserManager health check caching."""
+
+    @pytest.fixture
+    def manager(self):
+        manager_instance = BrowserManager(BrowserType.LOCAL)
+        manager_instance._current_service = make_service()
+        manager_instance._service_type = BrowserType.LOCAL
+        manager_instance._is_initialized = True
+        return manager_instance
+
+    @pytest.mark.asyncio
+    async def test_health_check_not_initialized(self):
+        """Test that an uninitialized manager reports unhealthy without caching."""
+        manager = BrowserManager(BrowserType.LOCAL)
+
+        health = await manager.health_check()
+
+        assert health["healthy"] is False
+        assert manager._health_cache is None
+
+    @pytest.mark.asyncio
+    async def test_health_check_result_is_cached(self, manager):
+        """Test that repeated health checks within the TTL reuse the probe result."""
+        first = await manager.health_check()
+        second = await manager.health_check()
+
+        assert first["healthy"] is True
+        assert second is first
+        assert manager._current_service.page_context_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_health_check_force_bypasses_cache(self, manager):
+        """Test that force=True always runs a fresh probe."""
+        await manager.health_check()
+        await manager.health_check(force=True)
+
+        assert manager._current_service.page_context_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_health_check_expires_after_ttl(self, manager):
+        """Test that the cached result is discarded once the TTL elapses."""
+        with patch('app.services.browser_manager.time.monotonic', return_value=100.0):
+            await manager.health_check()
+        with patch('app.services.browser_manager.time.monotonic',
+                   return_value=100.0 + manager._health_ttl):
+            await manager.health_check()
+
+        assert manager._current_service.page_context_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_cleanup_invalidates_health_cache(self, manager):
+        """Test that cleanup drops any cached health result."""
+        await manager.health_check()
+        assert manager._health_cache is not None
+
+        await manager.cleanup()
+
+        assert manager._health_cache is None
+
+
+class TestBrowserManagerHealthProbe:
+    """Test suite for shallow versus deep health probes."""
+
+    @pytest.fixture
+    def manager(self):
+        manager_instance = BrowserManager(BrowserType.LOCAL)
+        service = make_service()
+        service._browser = MagicMock()
+        service._browser.is_connected.return_value = True
+        service._browser.version = "120.0"
+        manager_instance._current_service = service
+        manager_instance._service_type = BrowserType.LOCAL
+        manager_instance._is_initialized = True
+        return manager_instance
+
+    @pytest.mark.asyncio
+    async def test_first_probe_is_deep_then_shallow(self, manager):
+        """Test that a deep probe runs first and connection checks follow."""
+        first = await manager._probe_health()
+        second = await manager._probe_health()
+
+        assert first["probe"] == "deep"
+        assert second["probe"] == "shallow"
+        assert second["browser_version"] == "120.0"
+        assert manager._current_service.page_context_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_deep_probe_repeats_after_interval(self, manager):
+        """Test that the page probe reruns once the deep interval elapses."""
+        with patch('app.services.browser_manager.time.monotonic', return_value=0.0):
+            await manager._probe_health()
+        with patch('app.services.browser_manager.time.monotonic', return_value=61.0), \
+             patch('app.services.browser_manager.settings.BROWSER_DEEP_HEALTH_INTERVAL', 60.0):
+            result = await manager._probe_health()
+
+        assert result["probe"] == "deep"
+        assert manager._current_service.page_context_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_disconnected_browser_triggers_deep_probe(self, manager):
+        """Test that a disconnected browser falls through to the page probe."""
+        await manager._probe_health()
+        manager._current_service._browser.is_connected.return_value = False
+
+        result = await manager._probe_health()
+
+        assert result["probe"] == "deep"
+        assert manager._current_service.page_context_calls == 2
+
+
+class TestBrowserManagerCapabilities:
+    """Test suite for capability flags cached at initialization."""
+
+    @pytest.mark.asyncio
+    async def test_initialize_records_capabilities(self):
+        """Test that capabilities are probed once when the service is created."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        service = MagicMock(spec=['initialize', 'navigate_to_url', 'get_session_info', 'cleanup'])
+        service.initialize = AsyncMock()
+        service.cleanup = AsyncMock()
+
+        with patch('app.services.browser_manager.BrowserService', return_value=service):
+            await manager.initialize()
+
+        assert manager._caps == {
+            "navigate": True,
+            "wait": False,
+            "browser_info": False,
+            "session_info": True,
+        }
+
+        await manager.cleanup()
+        assert manager._caps == {}
+
+    @pytest.mark.asyncio
+    async def test_navigate_falls_back_to_page_goto(self):
+        """Test that services without navigate_to_url use page.goto directly."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        manager._current_service = MagicMock(spec=[])
+        manager._caps = manager._probe_capabilities(manager._current_service)
+        page = AsyncMock()
+
+        await manager.navigate_to_url(page, "https://example.com", wait_for="load")
+
+        page.goto.assert_called_once_with("https://example.com", wait_until="load")
+
+
+class TestBrowserManagerPageContext:
+    """Test suite for BrowserManager.page_context delegation."""
+
+    def test_page_context_returns_service_context_manager(self):
+        """Test that the service's context manager is handed back unwrapped."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        manager._current_service = MagicMock()
+        manager._is_initialized = True
+
+        context_manager = manager.page_context(viewport={"width": 800, "height": 600})
+
+        assert context_manager is manager._current_service.page_context.return_value
+        manager._current_service.page_context.assert_called_once_with(
+            viewport={"width": 800, "height": 600}
+        )
+
+    def test_page_context_not_initialized(self):
+        """Test that page_context fails fast before initialization."""
+        manager = BrowserManager(BrowserType.LOCAL)
+
+        with pytest.raises(BrowserError, match="Browser manager not initialized"):
+            manager.page_context()
+
+
+class TestBrowserManagerForcedInitialize:
+    """Test suite for initialize(force_type=...) behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_force_same_type_is_noop(self):
+        """Test that forcing the current type does not relaunch the browser."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        current = MagicMock()
+        current.cleanup = AsyncMock()
+        manager._current_service = current
+        manager._service_type = BrowserType.LOCAL
+        manager._is_initialized = True
+
+        with patch('app.services.browser_manager.BrowserService') as service_cls:
+            await manager.initialize(force_type=BrowserType.LOCAL)
+
+        service_cls.assert_not_called()
+        current.cleanup.assert_not_called()
+        assert manager._current_service is current
+
+    @pytest.mark.asyncio
+    async def test_force_different_type_cleans_up_old_service(self):
+        """Test that switching types closes the previous service first."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        old_service = MagicMock()
+        old_service.cleanup = AsyncMock()
+        manager._current_service = old_service
+        manager._service_type = BrowserType.LOCAL
+        manager._is_initialized = True
+
+        cloud_service = MagicMock()
+        cloud_service.initialize = AsyncMock()
+
+        with patch('app.services.browser_manager.CloudBrowserService', return_value=cloud_service):
+            await manager.initialize(force_type=BrowserType.CLOUD)
+
+        old_service.cleanup.assert_called_once()
+        assert manager._current_service is cloud_service
+        assert manager._service_type == BrowserType.CLOUD
+
+
+class TestBrowserManagerRetries:
+    """Test suite for cloud browser retry with backoff."""
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self):
+        with patch('app.services.browser_manager.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            yield mock_sleep
+
+    @pytest.mark.asyncio
+    async def test_retry_recovers_from_transient_error(self, no_sleep):
+        """Test that a transient failure is retried before succeeding."""
+        manager = BrowserManager(BrowserType.CLOUD)
+        factory = AsyncMock(side_effect=[BrowserConnectionError("cold pool"), "ok"])
+
+        result = await manager._retry(factory, retries=3)
+
+        assert result == "ok"
+        assert factory.call_count == 2
+        no_sleep.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_retry_raises_after_exhausting_attempts(self, no_sleep):
+        """Test that the last error propagates once retries run out."""
+        manager = BrowserManager(BrowserType.CLOUD)
+        factory = AsyncMock(side_effect=BrowserConnectionError("rate limited"))
+
+        with pytest.raises(BrowserConnectionError, match="rate limited"):
+            await manager._retry(factory, retries=3)
+
+        assert factory.call_count == 3
+        assert no_sleep.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_retry_does_not_retry_configuration_errors(self, no_sleep):
+        """Test that non-transient errors fail immediately."""
+        manager = BrowserManager(BrowserType.CLOUD)
+        factory = AsyncMock(side_effect=ConfigurationError("missing API key"))
+
+        with pytest.raises(ConfigurationError):
+            await manager._retry(factory, retries=3)
+
+        factory.assert_called_once()
+        no_sleep.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_cloud_initialize_retries_before_fallback(self):
+        """Test that cloud initialization is retried instead of falling back at once."""
+        manager = BrowserManager(BrowserType.AUTO)
+        cloud_service = MagicMock()
+        cloud_service.initialize = AsyncMock(side_effect=[BrowserConnectionError("cold pool"), None])
+        cloud_service.cleanup = AsyncMock()
+
+        with patch('app.services.browser_manager.CloudBrowserService', return_value=cloud_service), \
+             patch('app.services.browser_manager.BrowserService') as local_service_cls:
+            await manager.initialize(force_type=BrowserType.CLOUD)
+
+        assert cloud_service.initialize.call_count == 2
+        assert manager._service_type == BrowserType.CLOUD
+        local_service_cls.assert_not_called()
+
+
+class TestBrowserManagerPrewarm:
+    """Test suite for background browser prewarming."""
+
+    @pytest.mark.asyncio
+    async def test_initialize_waits_for_pending_prewarm(self):
+        """Test that a request arriving mid-prewarm reuses the warm browser."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        launched = asyncio.Event()
+        service = MagicMock()
+        service.cleanup = AsyncMock()
+
+        async def slow_initialize():
+            await launched.wait()
+
+        service.initialize = AsyncMock(side_effect=slow_initialize)
+
+        with patch('app.services.browser_manager.BrowserService', return_value=service) as service_cls:
+            manager.start_prewarm()
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(manager.initialize())
+            await asyncio.sleep(0)
+            launched.set()
+            await waiter
+
+        assert manager._is_initialized is True
+        service_cls.assert_called_once()
+        service.initialize.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_route_dependency_waits_for_pending_prewarm(self):
+        """Test that page_context works for a request that arrives mid-prewarm."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        launched = asyncio.Event()
+        service = make_service()
+
+        async def slow_initialize():
+            await launched.wait()
+
+        service.initialize = AsyncMock(side_effect=slow_initialize)
+
+        with patch('app.services.browser_manager.BrowserService', return_value=service) as service_cls:
+            manager.start_prewarm()
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(get_ready_browser_manager(manager))
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            launched.set()
+            ready = await waiter
+
+            async with ready.page_context() as page:
+                assert page is service.page
+
+        service_cls.assert_called_once()
+        service.initialize.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_route_dependency_unavailable_when_launch_fails(self):
+        """Test that a browser that cannot start surfaces as a 503, not a page error."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        service = MagicMock()
+        service.initialize = AsyncMock(side_effect=Exception("no browser binary"))
+
+        with patch('app.services.browser_manager.BrowserService', return_value=service):
+            await manager.start_prewarm()
+            with pytest.raises(HTTPException) as exc_info:
+                await get_ready_browser_manager(manager)
+
+        assert exc_info.value.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_prewarm_failure_is_logged_not_raised(self):
+        """Test that a failed prewarm leaves the manager uninitialized without raising."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        service = MagicMock()
+        service.initialize = AsyncMock(side_effect=Exception("no browser binary"))
+
+        with patch('app.services.browser_manager.BrowserService', return_value=service):
+            await manager.start_prewarm()
+
+        assert manager._is_initialized is False
+
+    @pytest.mark.asyncio
+    async def test_cleanup_cancels_pending_prewarm(self):
+        """Test that shutdown cancels a prewarm that has not finished."""
+        manager = BrowserManager(BrowserType.LOCAL)
+        service = MagicMock()
+
+        async def hanging_initialize():
+            await asyncio.sleep(10)
+
+        service.initialize = AsyncMock(side_effect=hanging_initialize)
+        service.cleanup = AsyncMock()
+
+        with patch('app.services.browser_manager.BrowserService', return_value=service):
+            task = manager.start_prewarm()
+            await asyncio.sleep(0)
+            await manager.cleanup()
+
+        assert task.cancelled()
+        assert manager._prewarm_task is None
+
+
+class TestBrowserTypeSelection:
+    """Test suite for memoized browser type selection."""
+
+    def test_selection_is_memoized(self):
+        """Test that identical configuration snapshots reuse the cached decision."""
+        _select_browser_type.cache_clear()
+
+        first = _select_browser_type(BrowserType.AUTO, True, "key", "project")
+        second = _select_browser_type(BrowserType.AUTO, True, "key", "project")
+
+        assert first == second == BrowserType.CLOUD
+        assert _select_browser_type.cache_info().hits == 1
+
+    def test_selection_tracks_configuration_changes(self):
+        """Test that a different configuration produces a fresh decision."""
+        assert _select_browser_type(BrowserType.AUTO, True, None, "project") == BrowserType.LOCAL
+        assert _select_browser_type(BrowserType.AUTO, False, "key", "project") == BrowserType.LOCAL
+
+
+class TestBrowserManagerSingleton:
+    """Test suite for the lazily created global browser manager."""
+
+    def test_get_browser_manager_returns_shared_instance(self):
+        """Test that the accessor and the legacy module attribute agree."""
+        from app.services import browser_manager as browser_manager_module
+
+        manager = browser_manager_module.get_browser_manager()
+
+        assert manager is browser_manager_module.get_browser_manager()
+        assert browser_manager_module.browser_manager is manager
+
+    def test_unknown_module_attribute_raises(self):
+        """Test that the module __getattr__ shim only serves known names."""
+        from app.services import browser_manager as browser_manager_module
+
+        with pytest.raises(AttributeError):
+            browser_manager_module.not_a_real_attribute
@@ -2,7 +2,8 @@
 
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, MagicMock, patch
+import gc
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import os
 
@@ -84,6 +85,33 @@ class TestBrowserService:
             assert "proxy" in launch_kwargs
             assert launch_kwargs["proxy"]["server"] == proxy_url
 
+    def test_launch_options_disable_unused_chromium_features(self, service):
+        """Test that Chromium launches with the lean argument set."""
+        with patch.object(settings, 'BROWSER_TYPE', 'chromium'), \
+             patch.object(settings, 'BROWSER_BLOCK_IMAGES', False):
+            args = service._get_launch_options()["args"]
+        
+        assert "--disable-extensions" in args
+        assert "--mute-audio" in args
+        assert "--blink-settings=imagesEnabled=false" not in args
+    
+    def test_launch_options_block_images(self, service):
+        """Test that BROWSER_BLOCK_IMAGES disables image loading."""
+        with patch.object(settings, 'BROWSER_TYPE', 'chromium'), \
+             patch.object(settings, 'BROWSER_BLOCK_IMAGES', True):
+            args = service._get_launch_options()["args"]
+        
+        assert "--blink-settings=imagesEnabled=false" in args
+    
+    def test_launch_options_built_once(self, service):
+        """Test that launch options are memoized per service instance."""
+        with patch.object(service, '_get_launch_options', wraps=service._get_launch_options) as build:
+            first = service._launch_options
+            second = service._launch_options
+        
+        assert first is second
+        build.assert_called_once()
+    
     @pytest.mark.asyncio
     async def test_create_context_with_random_user_agent(self, service):
         """Test that a random user agent is used when creating a context."""
@@ -135,6 +163,83 @@ class TestBrowserService:
         assert len(service._contexts) == 1
         service._browser.new_context.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_create_context_installs_resource_blocker(self, service):
+        """Test that BROWSER_BLOCK_RESOURCES aborts matching requests."""
+        service._is_initialized = True
+        service._browser = AsyncMock()
+        mock_context = AsyncMock()
+        service._browser.new_context.return_value = mock_context
+        
+        with patch.object(settings, 'BROWSER_BLOCK_RESOURCES', ["image", "font"]):
+            await service.create_context()
+        
+        mock_context.route.assert_called_once()
+        pattern, handler = mock_context.route.call_args.args
+        assert pattern == "**/*"
+        
+        blocked_route, allowed_route = AsyncMock(), AsyncMock()
+        await handler(blocked_route, MagicMock(resource_type="image"))
+        await handler(allowed_route, MagicMock(resource_type="document"))
+        
+        blocked_route.abort.assert_called_once()
+        blocked_route.continue_.assert_not_called()
+        allowed_route.continue_.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_create_context_without_resource_blocker(self, service):
+        """Test that no route is installed when blocking is disabled."""
+        service._is_initialized = True
+        service._browser = AsyncMock()
+        mock_context = AsyncMock()
+        service._browser.new_context.return_value = mock_context
+        
+        with patch.object(settings, 'BROWSER_BLOCK_RESOURCES', None):
+            await service.create_context()
+        
+        mock_context.route.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_create_context_concurrency_is_bounded(self, service):
+        """Test that concurrent context creation never exceeds the semaphore limit."""
+        service._is_initialized = True
+        service._browser = AsyncMock()
+        service._ctx_sem = asyncio.Semaphore(2)
+        
+        active = 0
+        peak = 0
+        created = []
+        
+        async def slow_new_context(**options):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            context = AsyncMock()
+            created.append(context)
+            return context
+        
+        service._browser.new_context.side_effect = slow_new_context
+        
+        await asyncio.gather(*(service.create_context() for _ in range(6)))
+        
+        assert peak == 2
+        assert len(service._contexts) == 6
+        assert service._inflight_creations == 0
+    
+    @pytest.mark.asyncio
+    async def test_contexts_are_tracked_weakly(self, service):
+        """Test that dropped contexts do not stay pinned in the tracking set."""
+        service._is_initialized = True
+        service._browser = AsyncMock()
+        service._browser.new_context.side_effect = lambda **options: AsyncMock()
+        
+        await service.create_context()
+        gc.collect()
+        
+        assert len(service._contexts) == 0
+    
     @pytest.mark.asyncio
     async def test_create_context_not_initialized(self, service):
         """Test context creation when service not initialized."""
@@ -158,6 +263,24 @@ class TestBrowserService:
         mock_page.set_default_timeout.assert_called()
         mock_page.set_default_navigation_timeout.assert_called()
     
+    @pytest.mark.asyncio
+    async def test_create_page_uses_timeouts_resolved_at_init(self):
+        """Test that page timeouts come from settings captured at construction."""
+        with patch.object(settings, 'BROWSER_TIMEOUT', 12), \
+             patch.object(settings, 'BROWSER_NAVIGATION_TIMEOUT', 34):
+            service = BrowserService()
+        
+        mock_context = AsyncMock()
+        mock_page = AsyncMock()
+        mock_context.new_page.return_value = mock_page
+        mock_page.set_default_timeout = MagicMock()
+        mock_page.set_default_navigation_timeout = MagicMock()
+        
+        await service.create_page(mock_context)
+        
+        mock_page.set_default_timeout.assert_called_once_with(12000)
+        mock_page.set_default_navigation_timeout.assert_called_once_with(34000)
+    
     @pytest.mark.asyncio
     async def test_create_page_without_context(self, service):
         """Test page creation without providing context."""
@@ -190,9 +313,24 @@ class TestBrowserService:
         
         mock_page.goto.assert_called_once_with(
             "https://example.com",
-            wait_until="networkidle",
+            wait_until="domcontentloaded",
             timeout=30000
         )
+        mock_page.wait_for_load_state.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_navigate_to_url_settle_ms_soft_waits(self, service):
+        """Test that settle_ms waits for networkidle but tolerates a timeout."""
+        mock_page = AsyncMock()
+        mock_response = AsyncMock()
+        mock_response.ok = True
+        mock_response.status = 200
+        mock_page.goto.return_value = mock_response
+        mock_page.wait_for_load_state.side_effect = PlaywrightTimeoutError("still busy")
+        
+        await service.navigate_to_url(mock_page, "https://example.com", settle_ms=500)
+        
+        mock_page.wait_for_load_state.assert_called_once_with("networkidle", timeout=500)
     
     @pytest.mark.asyncio
     async def test_navigate_to_url_timeout(self, service):
@@ -222,7 +360,18 @@ class TestBrowserService:
         await service.wait_for_page_load(mock_page)
         
         mock_page.wait_for_load_state.assert_called_once_with("networkidle", timeout=30000)
-        mock_page.wait_for_timeout.assert_called_once_with(1000)
+        mock_page.wait_for_timeout.assert_not_called()
+        mock_page.wait_for_selector.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_page_load_with_settle_selector(self, service):
+        """Test that a settle selector replaces the fixed post-load sleep."""
+        mock_page = AsyncMock()
+        
+        await service.wait_for_page_load(mock_page, settle_selector="#app")
+        
+        mock_page.wait_for_selector.assert_called_once_with("#app", state="attached", timeout=30000)
+        mock_page.wait_for_timeout.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_wait_for_page_load_timeout(self, service):
@@ -253,8 +402,56 @@ class TestBrowserService:
             assert page is mock_page
         
         mock_page.close.assert_called_once()
+        mock_context.close.assert_not_called()
+        mock_context.clear_cookies.assert_called_once()
+        assert service._context_pool.qsize() == 1
+        
+        await service.cleanup()
         mock_context.close.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_page_context_reuses_pooled_context(self, service):
+        """Test that consecutive page contexts share one warm browser context."""
+        service._is_initialized = True
+        service._browser = AsyncMock()
+        
+        mock_context = AsyncMock()
+        service._browser.new_context.return_value = mock_context
+        mock_page = AsyncMock()
+        mock_page.set_default_timeout = MagicMock()
+        mock_page.set_default_navigation_timeout = MagicMock()
+        mock_context.new_page.return_value = mock_page
+        
+        async with service.page_context():
+            pass
+        async with service.page_context():
+            pass
+        
+        service._browser.new_context.assert_called_once()
+        assert mock_context.new_page.call_count == 2
+        assert service._context_pool.qsize() == 1
+    
+    @pytest.mark.asyncio
+    async def test_page_context_custom_options_not_pooled(self, service):
+        """Test that contexts created with custom options are closed, not pooled."""
+        service._is_initialized = True
+        service._browser = AsyncMock()
+        
+        mock_context = AsyncMock()
+        service._browser.new_context.return_value = mock_context
+        mock_page = AsyncMock()
+        mock_page.set_default_timeout = MagicMock()
+        mock_page.set_default_navigation_timeout = MagicMock()
+        mock_context.new_page.return_value = mock_page
+        
+        async with service.page_context(viewport={"width": 800, "height": 600}):
+            pass
+        
+        mock_context.close.assert_called_once()
+        mock_page.close.assert_not_called()
+        assert service._context_pool.empty()
+        assert len(service._contexts) == 0
+    
     @pytest.mark.asyncio
     async def test_page_context_manager_timeout_error(self, service):
         """Test page context manager with timeout error."""
@@ -272,6 +469,29 @@ class TestBrowserService:
         
         mock_context.close.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_page_context_maps_errors_raised_in_body(self, service):
+        """Test that errors inside the with-block are translated and the page is released."""
+        service._is_initialized = True
+        service._browser = AsyncMock()
+        
+        mock_context = AsyncMock()
+        mock_page = AsyncMock()
+        mock_page.set_default_timeout = MagicMock()
+        mock_page.set_default_navigation_timeout = MagicMock()
+        service._browser.new_context.return_value = mock_context
+        mock_context.new_page.return_value = mock_page
+        
+        with pytest.raises(BrowserTimeoutError, match="Operation timed out"):
+            async with service.page_context():
+                raise PlaywrightTimeoutError("goto timed out")
+        
+        with pytest.raises(BrowserError, match="Page context error: boom"):
+            async with service.page_context():
+                raise ValueError("boom")
+        
+        assert mock_page.close.call_count == 2
+    
     @pytest.mark.asyncio
     async def test_get_browser_info_initialized(self, service):
         """Test browser info when initialized."""
@@ -288,6 +508,23 @@ class TestBrowserService:
         assert info["contexts_count"] == 2
         assert info["is_connected"] is True
     
+    @pytest.mark.asyncio
+    async def test_get_browser_info_caches_version(self, service):
+        """Test that the browser version is read once and reused."""
+        service._browser = MagicMock()
+        service._browser.is_connected.return_value = True
+        version_property = PropertyMock(return_value="120.0")
+        type(service._browser).version = version_property
+        
+        await service.get_browser_info()
+        info = await service.get_browser_info()
+        
+        assert info["version"] == "120.0"
+        version_property.assert_called_once()
+        
+        await service.cleanup()
+        assert service._version_cache is None
+    
     @pytest.mark.asyncio
     async def test_get_browser_info_not_initialized(self, service):
         """Test browser info when not initialized."""
@@ -318,6 +555,21 @@ class TestBrowserService:
         assert service._playwright is None
         assert len(service._contexts) == 0
     
+    @pytest.mark.asyncio
+    async def test_cleanup_continues_after_context_close_error(self, service):
+        """Test that one failing context close does not block the others."""
+        service._is_initialized = True
+        failing_context = AsyncMock()
+        failing_context.close.side_effect = Exception("Target closed")
+        healthy_context = AsyncMock()
+        service._contexts = [failing_context, healthy_context]
+        
+        await service.cleanup()
+        
+        failing_context.close.assert_called_once()
+        healthy_context.close.assert_called_once()
+        assert len(service._contexts) == 0
+    
     @pytest.mark.asyncio
     async def test_async_context_manager(self, service):
         """Test browser service as async context manager."""
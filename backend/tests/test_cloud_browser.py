@@ -11,6 +11,7 @@ from app.core.exceptions import (
     ConfigurationError
 )
 from app.config import settings
+from app.utils.http import decode_json
 
 
 class TestCloudBrowserService:
@@ -47,22 +48,20 @@ class TestCloudBrowserService:
     @pytest.mark.asyncio
     async def test_create_session_sends_user_agent(self, service):
         """Test that session creation request includes a random user agent."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response = httpx.Response(200, json={
             "id": "test-session-ua",
             "connectUrl": "wss://test-ua-connect-url"
-        }
+        })
         
         with patch.object(settings, 'BROWSERBASE_API_KEY', 'test-key'), \
              patch.object(settings, 'BROWSERBASE_PROJECT_ID', 'test-project'), \
              patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(return_value=mock_response)
+            mock_client.return_value.post = AsyncMock(return_value=mock_response)
             
             await service._create_session()
 
-            mock_post = mock_client.return_value.__aenter__.return_value.post
+            mock_post = mock_client.return_value.post
             mock_post.assert_called_once()
             
             post_kwargs = mock_post.call_args.kwargs
@@ -80,18 +79,16 @@ class TestCloudBrowserService:
     async def test_create_session_success(self, service):
         """Test successful session creation."""
         # Fix: Mock response should include connectUrl like real Browserbase
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response = httpx.Response(200, json={
             "id": "test-session-123",
             "connectUrl": "wss://test-connect-url"  # Add the missing connectUrl
-        }
+        })
         
         with patch.object(settings, 'BROWSERBASE_API_KEY', 'test-key'), \
             patch.object(settings, 'BROWSERBASE_PROJECT_ID', 'test-project'), \
             patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(return_value=mock_response)
+            mock_client.return_value.post = AsyncMock(return_value=mock_response)
             
             # Fix: Method now returns tuple (session_id, connect_url)
             session_id, connect_url = await service._create_session()
@@ -102,19 +99,17 @@ class TestCloudBrowserService:
     @pytest.mark.asyncio
     async def test_create_session_with_connection_url(self, service):
         """Test that session creation returns both session ID and connection URL."""
-        mock_response = MagicMock()
-        mock_response.status_code = 201
-        mock_response.json.return_value = {
+        mock_response = httpx.Response(201, json={
             "id": "test-session-456",
             "connectUrl": "wss://test-connection-url",
             "status": "RUNNING"
-        }
+        })
         
         with patch.object(settings, 'BROWSERBASE_API_KEY', 'test-key'), \
             patch.object(settings, 'BROWSERBASE_PROJECT_ID', 'test-project'), \
             patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(return_value=mock_response)
+            mock_client.return_value.post = AsyncMock(return_value=mock_response)
             
             session_id, connect_url = await service._create_session()
             
@@ -125,18 +120,16 @@ class TestCloudBrowserService:
     @pytest.mark.asyncio
     async def test_create_session_missing_connect_url(self, service):
         """Test session creation failure when connectUrl is missing."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response = httpx.Response(200, json={
             "id": "test-session-789"
             # Missing connectUrl
-        }
+        })
         
         with patch.object(settings, 'BROWSERBASE_API_KEY', 'test-key'), \
             patch.object(settings, 'BROWSERBASE_PROJECT_ID', 'test-project'), \
             patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(return_value=mock_response)
+            mock_client.return_value.post = AsyncMock(return_value=mock_response)
             
             with pytest.raises(BrowserConnectionError, match="No connection URL returned"):
                 await service._create_session()
@@ -153,7 +146,7 @@ class TestCloudBrowserService:
              patch.object(settings, 'BROWSERBASE_PROJECT_ID', 'test-project'), \
              patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(return_value=mock_response)
+            mock_client.return_value.post = AsyncMock(return_value=mock_response)
             
             with pytest.raises(BrowserConnectionError, match="Browserbase authentication failed"):
                 await service._create_session()
@@ -165,7 +158,7 @@ class TestCloudBrowserService:
              patch.object(settings, 'BROWSERBASE_PROJECT_ID', 'test-project'), \
              patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            mock_client.return_value.post = AsyncMock(
                 side_effect=httpx.TimeoutException("Request timeout")
             )
             
@@ -179,7 +172,7 @@ class TestCloudBrowserService:
              patch.object(settings, 'BROWSERBASE_PROJECT_ID', 'test-project'), \
              patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            mock_client.return_value.post = AsyncMock(
                 side_effect=httpx.RequestError("Network error")
             )
             
@@ -219,6 +212,56 @@ class TestCloudBrowserService:
                 assert service._is_connected is False
                 assert service._session_id is None
     
+    @pytest.mark.asyncio
+    async def test_concurrent_initialize_creates_one_session(self, service):
+        """Test that racing initialize() calls share a single Browserbase session."""
+        async def slow_create():
+            await asyncio.sleep(0.05)
+            return ("test-session", "wss://test-url")
+        
+        with patch.object(service, '_create_session', side_effect=slow_create) as mock_create, \
+            patch('app.services.cloud_browser.async_playwright') as mock_playwright:
+            mock_playwright_instance = AsyncMock()
+            mock_playwright.return_value.start = AsyncMock(return_value=mock_playwright_instance)
+            mock_playwright_instance.chromium.connect_over_cdp = AsyncMock(return_value=AsyncMock())
+            
+            await asyncio.gather(*(service.initialize() for _ in range(3)))
+        
+        assert mock_create.call_count == 1
+        mock_playwright_instance.chromium.connect_over_cdp.assert_called_once()
+        assert service._is_connected is True
+    
+    @pytest.mark.asyncio
+    async def test_initialize_stops_playwright_when_session_fails(self, service):
+        """Test that Playwright started alongside a failed session request is stopped."""
+        with patch.object(service, '_create_session', side_effect=BrowserConnectionError("quota")), \
+            patch('app.services.cloud_browser.async_playwright') as mock_playwright:
+            mock_playwright_instance = AsyncMock()
+            mock_playwright.return_value.start = AsyncMock(return_value=mock_playwright_instance)
+            
+            with pytest.raises(BrowserConnectionError, match="quota"):
+                await service.initialize()
+        
+        mock_playwright_instance.stop.assert_called_once()
+        assert service._playwright is None
+        assert service._is_connected is False
+    
+    @pytest.mark.parametrize("orjson_available", [True, False])
+    def test_decode_json_matches_stdlib(self, orjson_available):
+        """Test that API payloads decode identically with and without orjson."""
+        payload = {"id": "sess", "connectUrl": "wss://connect", "region": "us-west-2", "nested": [1, None]}
+        
+        with patch('app.utils.http.ORJSON_AVAILABLE', orjson_available):
+            assert decode_json(httpx.Response(200, json=payload)) == payload
+    
+    def test_api_client_uses_http2_when_available(self, service):
+        """Test that the Browserbase client negotiates HTTP/2 only when h2 is installed."""
+        with patch('app.services.cloud_browser.HTTP2_AVAILABLE', True), \
+             patch('httpx.AsyncClient') as mock_client:
+            service._get_http_client()
+        
+        assert mock_client.call_args.kwargs['http2'] is True
+    
     @pytest.mark.asyncio
     async def test_create_context_success(self, service):
         """Test successful context creation."""
@@ -277,9 +320,59 @@ class TestCloudBrowserService:
         async with service.page_context() as page:
             assert page is mock_page
         
-        # Verify cleanup
-        mock_page.close.assert_called_once()
+        # Verify cleanup: the context (and with it the page) is closed by the reaper
+        await service._reap_queue.join()
         mock_context.close.assert_called_once()
+        assert mock_context not in service._contexts
+    
+    @pytest.mark.asyncio
+    async def test_page_context_exit_does_not_wait_for_close(self, service):
+        """Test that leaving page_context returns before slow context closes finish."""
+        service._is_connected = True
+        service._browser = AsyncMock()
+        service._browser.is_connected = MagicMock(return_value=True)
+        
+        closed = []
+        
+        def make_context():
+            context = AsyncMock()
+            context.new_page = AsyncMock(return_value=AsyncMock(
+                set_default_timeout=MagicMock(), set_default_navigation_timeout=MagicMock()
+            ))
+            
+            async def slow_close():
+                await asyncio.sleep(0.05)
+                closed.append(context)
+            
+            context.close.side_effect = slow_close
+            return context
+        
+        service._browser.new_context = AsyncMock(side_effect=lambda **kwargs: make_context())
+        
+        loop = asyncio.get_running_loop()
+        begin = loop.time()
+        for _ in range(3):
+            async with service.page_context():
+                pass
+        assert loop.time() - begin < 0.05
+        assert closed == []
+        
+        await service._reap_queue.join()
+        assert len(closed) == 3
+        assert service._contexts == []
+    
+    @pytest.mark.asyncio
+    async def test_cleanup_closes_contexts_still_queued_for_reaper(self, service):
+        """Test that cleanup closes released contexts the reaper has not reached yet."""
+        context = AsyncMock()
+        service._contexts = [context]
+        service._reap_queue.put_nowait(context)
+        
+        await service.cleanup()
+        
+        context.close.assert_called_once()
+        assert service._reap_queue.empty()
+        assert service._context_reaper is None
     
     @pytest.mark.asyncio
     async def test_get_session_info_success(self, service):
@@ -291,14 +384,12 @@ class TestCloudBrowserService:
         # Use MagicMock for sync method
         service._browser.is_connected = MagicMock(return_value=True)
         
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"status": "active", "id": "test-session"}
+        mock_response = httpx.Response(200, json={"status": "active", "id": "test-session"})
         
         with patch.object(settings, 'BROWSERBASE_API_KEY', 'test-key'), \
             patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
             
             info = await service.get_session_info()
             
@@ -345,6 +436,127 @@ class TestCloudBrowserService:
         assert service._connect_url is None  # Test cleanup of new attribute
         assert len(service._contexts) == 0
     
+    @pytest.mark.asyncio
+    async def test_cleanup_closes_contexts_concurrently(self, service):
+        """Test that slow or failing context closes do not serialize cleanup."""
+        started = 0
+        
+        async def slow_close():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0.05)
+        
+        slow_contexts = [AsyncMock() for _ in range(3)]
+        for context in slow_contexts:
+            context.close.side_effect = slow_close
+        failing_context = AsyncMock()
+        failing_context.close.side_effect = Exception("Target closed")
+        service._contexts = [*slow_contexts, failing_context]
+        
+        loop = asyncio.get_running_loop()
+        begin = loop.time()
+        await service.cleanup()
+        elapsed = loop.time() - begin
+        
+        assert started == 3
+        assert elapsed < 0.15
+        failing_context.close.assert_called_once()
+        assert len(service._contexts) == 0
+    
+    @pytest.mark.asyncio
+    async def test_cleanup_overlaps_session_stop_and_context_close(self, service):
+        """Test that ending the remote session does not wait on local context closes."""
+        async def slow(*args, **kwargs):
+            await asyncio.sleep(0.1)
+        
+        context = AsyncMock()
+        context.close.side_effect = slow
+        service._contexts = [context]
+        service._session_id = "test-session"
+        
+        loop = asyncio.get_running_loop()
+        with patch.object(service, '_end_session', side_effect=slow) as mock_end:
+            begin = loop.time()
+            await service.cleanup()
+            elapsed = loop.time() - begin
+        
+        mock_end.assert_awaited_once()
+        context.close.assert_called_once()
+        assert elapsed < 0.18
+        assert service._session_id is None
+    
+    @pytest.mark.asyncio
+    async def test_api_client_reused_across_calls(self, service):
+        """Test that session create and stop share one API client, closed on cleanup."""
+        requests_seen = []
+        
+        def handler(request):
+            requests_seen.append((request.method, request.url.path, request.headers.get("x-bb-api-key")))
+            if request.url.path == "/v1/sessions":
+                return httpx.Response(201, json={"id": "sess-1", "connectUrl": "wss://connect"})
+            return httpx.Response(204)
+        
+        real_client = httpx.AsyncClient
+        
+        with patch.object(settings, 'BROWSERBASE_API_KEY', 'test-key'), \
+             patch.object(settings, 'BROWSERBASE_PROJECT_ID', 'test-project'), \
+             patch('httpx.AsyncClient', side_effect=lambda **kwargs: real_client(
+                 transport=httpx.MockTransport(handler), **kwargs
+             )):
+            client = service._get_http_client()
+            
+            service._session_id, service._connect_url = await service._create_session()
+            assert service._get_http_client() is client
+            
+            await service.cleanup()
+        
+        assert requests_seen == [
+            ("POST", "/v1/sessions", "test-key"),
+            ("POST", "/v1/sessions/sess-1/stop", "test-key"),
+        ]
+        assert client.is_closed
+        assert service._http is None
+    
+    @pytest.mark.asyncio
+    async def test_request_with_backoff_retries_throttled_responses(self, service):
+        """Test that 429/503 responses are retried, honouring Retry-After."""
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(503),
+            httpx.Response(201, json={"id": "sess"}),
+        ]
+        send = AsyncMock(side_effect=responses)
+        
+        with patch('app.services.cloud_browser.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            response = await service._request_with_backoff(send, "/v1/sessions", json={})
+        
+        assert response.status_code == 201
+        assert send.call_count == 3
+        assert mock_sleep.call_args_list[0].args[0] == 2.0
+        assert 1.0 <= mock_sleep.call_args_list[1].args[0] <= 4.0
+    
+    @pytest.mark.asyncio
+    async def test_request_with_backoff_returns_last_response_when_exhausted(self, service):
+        """Test that the final throttled response is returned after the last attempt."""
+        send = AsyncMock(return_value=httpx.Response(429))
+        
+        with patch('app.services.cloud_browser.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            response = await service._request_with_backoff(send, "/v1/sessions", max_attempts=3)
+        
+        assert response.status_code == 429
+        assert send.call_count == 3
+        assert mock_sleep.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_request_with_backoff_does_not_retry_client_errors(self, service):
+        """Test that non-retriable statuses are returned immediately."""
+        send = AsyncMock(return_value=httpx.Response(401))
+        
+        response = await service._request_with_backoff(send, "/v1/sessions")
+        
+        assert response.status_code == 401
+        send.assert_called_once()
+    
     @pytest.mark.asyncio
     async def test_end_session_success(self, service):
         """Test successful session termination."""
@@ -356,9 +568,8 @@ class TestCloudBrowserService:
         with patch.object(settings, 'BROWSERBASE_API_KEY', 'test-key'), \
              patch('httpx.AsyncClient') as mock_client:
             
-            mock_client.return_value.__aenter__.return_value.delete = AsyncMock(return_value=mock_response)
+            mock_client.return_value.delete = AsyncMock(return_value=mock_response)
             
             await service._end_session()
             
             # Should not raise
-    
\ No newline at end of file
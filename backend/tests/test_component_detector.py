@@ -1,12 +1,15 @@
 import pytest
+import threading
 import time
 from dataclasses import asdict
 import urllib.parse
+from unittest.mock import MagicMock, patch
 
 from app.services.browser_manager import BrowserManager
 from app.services.dom_extraction_service import DOMExtractionService, DOMExtractionResult, ExtractedElement, PageStructure
+from app.models.dom_extraction import ExtractedAssetModel as ExtractedAsset
 from app.services.component_detector import ComponentDetector
-from app.models.components import ComponentType
+from app.models.components import ComponentType, ComponentDetectionResult
 
 
 @pytest.fixture
@@ -231,6 +234,156 @@ class TestComponentDetector:
         assert 'input' in component_types
 
 
+@pytest.mark.unit
+class TestComponentTypeClassification:
+    """Unit tests for per-element classification rules."""
+
+    @pytest.fixture
+    def detector(self):
+        return ComponentDetector(MagicMock(success=True, assets=[]))
+
+    @pytest.mark.parametrize("element, expected", [
+        (ExtractedElement(tag_name='NAV'), ComponentType.NAVBAR),
+        (ExtractedElement(tag_name='button'), ComponentType.BUTTON),
+        (ExtractedElement(tag_name='form', attributes={'role': 'button'}), ComponentType.BUTTON),
+        (ExtractedElement(tag_name='textarea'), ComponentType.INPUT),
+        (ExtractedElement(tag_name='picture'), ComponentType.IMAGE),
+        (ExtractedElement(tag_name='span', attributes={'role': 'button'}), ComponentType.BUTTON),
+        (ExtractedElement(tag_name='div', class_names=['product-card']), ComponentType.CARD),
+        (ExtractedElement(tag_name='div', class_names=['container']), ComponentType.UNKNOWN),
+        (ExtractedElement(tag_name='p'), ComponentType.UNKNOWN),
+    ])
+    def test_classification(self, detector, element, expected):
+        """Tag, role and class rules map each element to its component type."""
+        assert detector._get_element_component_type(element) == expected
+
+    @pytest.mark.asyncio
+    async def test_detect_components_async_runs_off_loop(self, detector):
+        """The async entry point delegates to detect_components on a worker thread."""
+        loop_thread = threading.get_ident()
+        seen = {}
+
+        def fake_detect():
+            seen['thread'] = threading.get_ident()
+            return 'result'
+
+        detector.detect_components = fake_detect
+        assert await detector.detect_components_async() == 'result'
+        assert seen['thread'] != loop_thread
+
+    def test_elements_sharing_an_xpath_emit_one_component(self):
+        """The processed-element bitmap de-duplicates components by xpath."""
+        elements = [
+            ExtractedElement(tag_name='button', text_content='First', xpath='/body/button[1]'),
+            ExtractedElement(tag_name='button', text_content='Again', xpath='/body/button[1]'),
+            ExtractedElement(tag_name='nav', text_content='Menu', xpath='/body/nav[1]'),
+        ]
+        detector = ComponentDetector(MagicMock(success=True, session_id='test-session', elements=elements, assets=[]))
+
+        result = detector.detect_components()
+
+        assert result.total_components == 2
+        assert [(c.component_type, c.label) for c in result.components] == [
+            (ComponentType.BUTTON, 'First'),
+            (ComponentType.NAVBAR, 'Menu'),
+        ]
+
+    def test_detect_components_result_is_memoized(self):
+        """Repeated calls return the cached result until invalidate() is called."""
+        elements = [ExtractedElement(tag_name='button', text_content='Go', xpath='/body/button[1]')]
+        dom_result = MagicMock(success=True, session_id='test-session', elements=elements, assets=[])
+        detector = ComponentDetector(dom_result)
+
+        with patch.object(detector, '_get_element_component_type', wraps=detector._get_element_component_type) as classify:
+            first = detector.detect_components()
+            assert detector.detect_components() is first
+            assert classify.call_count == 1
+
+        assert isinstance(first, ComponentDetectionResult)
+        assert first.total_components == 1
+        assert first.components[0].component_type is ComponentType.BUTTON
+        assert first.components[0].html_snippet == '<button ></button>'
+        assert first.components[0].label == 'Go'
+
+        dom_result.elements = elements + [ExtractedElement(tag_name='nav', xpath='/body/nav[1]')]
+        detector.invalidate()
+        refreshed = detector.detect_components()
+
+        assert refreshed is not first
+        assert refreshed.total_components == 2
+        assert [c.component_type for c in refreshed.components] == [ComponentType.BUTTON, ComponentType.NAVBAR]
+
+    def test_tag_name_is_normalized_on_ingestion(self):
+        """Elements store lowercased tag names so the detector never re-lowers them."""
+        assert ExtractedElement(tag_name='SECTION').tag_name == 'section'
+
+
+@pytest.mark.unit
+class TestAssetAssociation:
+    """Unit tests for associating extracted assets with detected components."""
+
+    @pytest.fixture
+    def detector(self):
+        elements = [
+            ExtractedElement(tag_name='div', class_names=['card'], xpath='/html/body/div[1]'),
+            ExtractedElement(tag_name='img', attributes={'src': 'https://example.com/a.png'}, xpath='/html/body/div[1]/img[1]'),
+            ExtractedElement(tag_name='nav', xpath='/html/body/nav[1]'),
+            ExtractedElement(tag_name='a', attributes={'href': 'https://example.com/b.svg'}, xpath='/html/body/nav[1]/a[1]'),
+        ]
+        assets = [
+            ExtractedAsset(url='https://example.com/a.png', asset_type='image'),
+            ExtractedAsset(url='https://example.com/b.svg', asset_type='svg'),
+            ExtractedAsset(url='https://example.com/orphan.png', asset_type='image'),
+        ]
+        return ComponentDetector(MagicMock(success=True, elements=elements, assets=assets))
+
+    def test_assets_grouped_under_their_component(self, detector):
+        """Each component gets the assets whose elements sit beneath its xpath."""
+        card, _, nav, _ = detector.dom_result.elements
+
+        assert [a.url for a in detector._find_associated_assets(card)] == ['https://example.com/a.png']
+        assert [a.url for a in detector._find_associated_assets(nav)] == ['https://example.com/b.svg']
+
+    def test_associated_assets_keep_asset_order(self):
+        """Assets found via the sorted xpath index come back in their original order."""
+        elements = [
+            ExtractedElement(tag_name='section', xpath='/body/section[1]'),
+            ExtractedElement(tag_name='img', attributes={'src': 'z.png'}, xpath='/body/section[1]/img[2]'),
+            ExtractedElement(tag_name='img', attributes={'src': 'a.png'}, xpath='/body/section[1]/img[1]'),
+            ExtractedElement(tag_name='img', attributes={'src': 'out.png'}, xpath='/body/section[2]/img[1]'),
+        ]
+        assets = [
+            ExtractedAsset(url='z.png', asset_type='image'),
+            ExtractedAsset(url='out.png', asset_type='image'),
+            ExtractedAsset(url='a.png', asset_type='image'),
+        ]
+        detector = ComponentDetector(MagicMock(success=True, elements=elements, assets=assets))
+
+        associated = detector._find_associated_assets(elements[0])
+
+        assert [a.url for a in associated] == ['z.png', 'a.png']
+
+    def test_find_element_for_asset_returns_first_match(self):
+        """The URL index keeps the first element in document order, by src or href."""
+        elements = [
+            ExtractedElement(tag_name='a', attributes={'href': 'https://example.com/x.png'}, xpath='/a[1]'),
+            ExtractedElement(tag_name='img', attributes={'src': 'https://example.com/x.png'}, xpath='/img[1]'),
+        ]
+        detector = ComponentDetector(MagicMock(success=True, elements=elements, assets=[]))
+
+        assert detector._find_element_for_asset(ExtractedAsset(url='https://example.com/x.png', asset_type='image')) is elements[0]
+        assert detector._find_element_for_asset(ExtractedAsset(url=None, content='<svg/>', asset_type='svg')) is None
+
+    def test_asset_elements_resolved_once(self, detector):
+        """Asset-to-element resolution is shared across every component lookup."""
+        elements = detector.dom_result.elements
+        with patch.object(detector, '_find_element_for_asset', wraps=detector._find_element_for_asset) as resolve:
+            for element in elements:
+                detector._find_associated_assets(element)
+
+        assert resolve.call_count == len(detector.assets)
+
+
 # Integration Tests (slower, require browser)
 @pytest.mark.integration
 @pytest.mark.browser
@@ -11,6 +11,7 @@ import json
 from app.api.routes.dom_extraction import router
 from app.models.dom_extraction import (
     DOMExtractionRequest,
+    DOMRegenerationRequest,
     OutputFormat
 )
 from app.services.dom_extraction_service import (
@@ -140,6 +141,35 @@ class TestDOMExtractionRoutes:
             mock_service.extract_dom_structure.return_value = mock_result
             mock_service.save_extraction_result.return_value = "/path/to/saved/file.json"
             
+    def test_extract_dom_structure_saves_service_result_as_is(self, client, mock_dependencies):
+        """The service's result model is saved directly, not rebuilt from its __dict__."""
+        with patch('app.api.routes.dom_extraction.DOMExtractionService') as mock_service_class, \
+             patch('app.api.routes.dom_extraction.storage.save_extraction_result', new_callable=AsyncMock) as mock_save:
+            mock_service = AsyncMock()
+            mock_service_class.return_value = mock_service
+
+            mock_result = DOMExtractionResult(
+                url="https://example.com",
+                session_id="test-session",
+                timestamp=time.time(),
+                extraction_time=1.0,
+                page_structure=PageStructure(title="Test Page"),
+                assets=[],
+                success=True
+            )
+            mock_service.extract_dom_structure.return_value = mock_result
+            mock_save.return_value = "/path/to/saved/file.json"
+
+            response = client.post("/api/v1/dom/extract", json={
+                "url": "https://example.com",
+                "session_id": "test-session",
+                "save_result": True,
+                "output_format": "json"
+            })
+
+            assert response.status_code == 200
+            assert mock_save.await_args.args[0] is mock_result
+    
     def test_extract_dom_structure_failure(self, client, mock_dependencies):
         """Test DOM extraction failure."""
         with patch('app.api.routes.dom_extraction.get_app_state', return_value=mock_dependencies["app_state"]), \
@@ -529,6 +559,11 @@ class TestDOMExtractionRoutes:
             assert response.status_code == 200
             assert not response.json()["success"]
 
+    def test_default_max_depth_matches_service_default(self):
+        """Default requests build the same depth-6 blueprint as the service default."""
+        assert DOMExtractionRequest(url="https://example.com", session_id="test").max_depth == 6
+        assert DOMRegenerationRequest().max_depth == 6
+
 
 @pytest.mark.integration
 class TestDOMExtractionAPIIntegration:
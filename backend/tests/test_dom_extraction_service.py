@@ -2,6 +2,8 @@ import pytest
 import asyncio
 import tempfile
 import json
+import shutil
+import subprocess
 import time
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch, Mock
@@ -16,6 +18,8 @@ from app.services.dom_extraction_service import (
     DOMExtractionResult
 )
 from app.services.browser_manager import BrowserManager
+from app.services.extraction import extractors
+from app.models.components import ComponentType, DetectedComponent
 from app.core.exceptions import BrowserError, ProcessingError
 
 
@@ -130,6 +134,212 @@ class TestDOMExtractionResult:
         assert len(result.color_palette) == 2
         assert len(result.font_families) == 2
 
+    def test_to_bytes_matches_model_dump_json(self):
+        """to_bytes() produces the same JSON as model_dump_json(), as bytes."""
+        result = DOMExtractionResult(
+            url="https://example.com",
+            session_id="test-session",
+            timestamp=1.0,
+            extraction_time=2.5,
+            page_structure=PageStructure(title="Test Page"),
+            assets=[ExtractedAsset(url="image.jpg", asset_type="image")],
+        )
+
+        data = result.to_bytes(indent=2)
+
+        assert isinstance(data, bytes)
+        assert data.decode("utf-8") == result.model_dump_json(indent=2)
+        assert json.loads(data)["assets"][0]["url"] == "image.jpg"
+
+
+class TestDetectedComponentFromExtractor:
+    """Test building blueprint trees from extractor output."""
+
+    def test_from_extractor_builds_nested_tree(self):
+        """Nested extractor dicts become components matching validated ones."""
+        blueprint = {
+            "component_type": "section",
+            "html_snippet": "<section>",
+            "relevant_css_rules": [{"selector": "section", "css_text": "padding: 0"}],
+            "children": [
+                {
+                    "component_type": "image",
+                    "html_snippet": '<img src="a.png">',
+                    "relevant_css_rules": [],
+                    "children": [],
+                    "asset_url": "https://example.com/a.png",
+                    "label": "logo"
+                }
+            ]
+        }
+
+        component = DetectedComponent.from_extractor(blueprint)
+
+        assert component.component_type is ComponentType.SECTION
+        assert isinstance(component.children[0], DetectedComponent)
+        assert component.children[0].component_type is ComponentType.IMAGE
+        assert component.label is None
+        assert component.model_dump() == DetectedComponent(**blueprint).model_dump()
+
+
+# Just enough of the DOM for the extractor scripts to run under node.
+# el(tag, {attrs, children, style, offsetParent}) builds an element; style
+# overrides what getComputedStyle reports and css() builds a rule's style.
+# Bounding-box reads are recorded so tests can check what forced layout.
+EXTRACTOR_DOM_STUB = r"""
+console.log = console.warn = () => {};
+const layoutReads = [];
+const el = (tag, {attrs = {}, children = [], style = {}, offsetParent = {}} = {}) => ({
+    tagName: tag.toUpperCase(),
+    classList: (attrs.class || '').split(' ').filter(Boolean),
+    children,
+    offsetParent,
+    computed: style,
+    textContent: '',
+    getAttribute: name => (name in attrs ? attrs[name] : null),
+    getBoundingClientRect() {
+        layoutReads.push(tag);
+        return {width: 100, height: 100};
+    },
+    matches(selector) {
+        return selector.startsWith('.') ? this.classList.includes(selector.slice(1)) : selector === tag;
+    },
+    get outerHTML() {
+        const attrText = Object.entries(attrs).map(([k, v]) => ` ${k}="${v}"`).join('');
+        return `<${tag}${attrText}>` + children.map(c => c.outerHTML).join('') + `</${tag}>`;
+    }
+});
+const css = props => ({
+    getPropertyValue: prop => props[prop] || '',
+    backgroundImage: props['background-image'] || ''
+});
+const baseStyle = {display: 'block', visibility: 'visible', opacity: '1', backgroundImage: 'none', position: 'static'};
+global.window = {getComputedStyle: element => ({...baseStyle, ...element.computed})};
+const makeDocument = (body, styleSheets = []) => ({
+    title: 'Test', body, styleSheets, baseURI: 'https://example.com/',
+    documentElement: {lang: 'en'}, characterSet: 'UTF-8',
+    querySelector: () => null, querySelectorAll: () => []
+});
+"""
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is needed to run the extractor scripts")
+
+
+def run_extractor(document_js: str, options: dict) -> dict:
+    """
+    Evaluate the combined extractor script under node against a stub document.
+
+    document_js is a JS expression building the document with makeDocument().
+    Returns the script's result, plus whether 'extraction' was still a Promise
+    and the tags whose bounding box was read, in order.
+    """
+    script = extractors.get_combined_extractor_script().strip()
+    program = EXTRACTOR_DOM_STUB + f"""
+global.document = {document_js};
+Promise.resolve(({script})({json.dumps(options)})).then(result => {{
+    result.extraction_is_promise = result.extraction instanceof Promise;
+    result.layout_reads = layoutReads;
+    process.stdout.write(JSON.stringify(result));
+}});
+"""
+    completed = subprocess.run(["node", "-e", program], capture_output=True, text=True, timeout=30, check=True)
+    return json.loads(completed.stdout)
+
+
+@requires_node
+class TestExtractorScripts:
+    """Run the in-page extractor scripts against a stub DOM."""
+
+    def test_truncated_snippet_keeps_whitelisted_attributes_only(self):
+        """Large components keep only whitelisted, escaped attributes on their opening tag."""
+        document = """makeDocument(el('body', {children: [
+            el('section', {attrs: {
+                style: 'x'.repeat(600), 'data-x': '1', id: 'a&b', class: 'hero "big"'
+            }}),
+            el('nav', {attrs: {style: 'color: red', 'data-x': '2'}})
+        ]}))"""
+
+        default = run_extractor(document, {})["extraction"]["blueprint"]["children"]
+        override = run_extractor(document, {"snippetAttributes": ["data-x"]})["extraction"]["blueprint"]["children"]
+
+        assert default[0]["html_snippet"] == '<section id="a&amp;b" class="hero &quot;big&quot;">'
+        assert override[0]["html_snippet"] == '<section data-x="1">'
+        # Snippets under the length limit keep their full markup
+        assert default[1]["html_snippet"] == '<nav style="color: red" data-x="2"></nav>'
+
+    def test_stylesheet_scan_resolves_and_caps_css_text(self):
+        """Rules from every readable sheet match, and oversized declarations are dropped whole."""
+        document = """makeDocument(
+            el('body', {children: [el('div', {attrs: {class: 'card'}})]}),
+            [
+                {href: null, cssRules: [
+                    {selectorText: 'div', style: css({display: 'flex', background: 'url(data:' + 'x'.repeat(5000) + ')'})}
+                ]},
+                {href: 'https://cdn.example.com/a.css', get cssRules() { throw new Error('cross-origin'); }},
+                {href: 'https://cdn.example.com/b.css', cssRules: [
+                    {selectorText: '.card', style: css({color: 'red', 'background-image': 'url(img/bg.png)'})}
+                ]}
+            ]
+        )"""
+
+        result = run_extractor(document, {})
+
+        assert result["extraction_is_promise"] is False
+        card = result["extraction"]["blueprint"]["children"][0]
+        assert card["relevant_css_rules"] == [
+            {"selector": "div", "css_text": "display: flex"},
+            {"selector": ".card", "css_text": "background-image: url(img/bg.png); color: red"},
+        ]
+        assets = result["extraction"]["assets"]
+        assert [asset["url"] for asset in assets] == ["https://cdn.example.com/img/bg.png"]
+
+    def test_page_structure_failure_keeps_extraction(self):
+        """A metadata read that throws yields a null page_structure, not a failed extraction."""
+        document = """Object.defineProperty(
+            makeDocument(el('body', {children: [el('nav')]})),
+            'title', {get() { throw new Error('no title'); }}
+        )"""
+
+        result = run_extractor(document, {})
+
+        assert result["page_structure"] is None
+        assert result["extraction"]["blueprint"]["children"][0]["component_type"] == "navbar"
+
+    def test_page_structure_read_with_extraction(self):
+        """Page metadata comes back next to the blueprint from the same evaluate."""
+        result = run_extractor("makeDocument(el('body'))", {})
+
+        assert result["page_structure"]["title"] == "Test"
+        assert result["page_structure"]["lang"] == "en"
+        assert result["page_structure"]["charset"] == "UTF-8"
+        assert result["extraction"]["blueprint"] is not None
+
+    def test_hidden_elements_skipped_unless_requested(self):
+        """display:none subtrees are pruned; body and fixed elements are kept."""
+        document = """makeDocument(el('body', {offsetParent: null, children: [
+            el('nav'),
+            el('aside', {offsetParent: null, style: {display: 'none'}, children: [el('button')]}),
+            el('header', {offsetParent: null, style: {position: 'fixed'}})
+        ]}))"""
+
+        result = run_extractor(document, {})
+        default = result["extraction"]["blueprint"]
+        with_hidden = run_extractor(document, {"includeHidden": True})["extraction"]["blueprint"]
+
+        assert default["html_snippet"].startswith("<body>")
+        assert [child["html_snippet"] for child in default["children"]] == [
+            "<nav></nav>",
+            "<header></header>",
+        ]
+        assert [child["html_snippet"] for child in with_hidden["children"]] == [
+            "<nav></nav>",
+            "<aside><button></button></aside>",
+            "<header></header>",
+        ]
+        # The hidden subtree is settled by offsetParent, without a layout read
+        assert "aside" not in result["layout_reads"]
+        assert "header" in result["layout_reads"]
+
 
 class TestDOMExtractionService:
     """Test suite for DOMExtractionService."""
@@ -193,7 +403,7 @@ class TestDOMExtractionService:
         ]
 
         # 3. Mock the page structure extraction to prevent its own `evaluate` call
-        with patch.object(service, '_extract_page_structure', return_value=PageStructure(title="Test")):
+        with patch.object(service, '_build_page_structure', return_value=PageStructure(title="Test")):
             # 4. Run the extraction
             result = await service.extract_dom_structure(
                 url=test_url,
@@ -216,6 +426,121 @@ class TestDOMExtractionService:
         assert svg_asset.url is None
         assert '<svg' in svg_asset.content
     
+    @pytest.mark.asyncio
+    async def test_extract_dom_structure_uses_single_evaluate(self, service, mock_browser_manager):
+        """Page metadata and the blueprint are read in one evaluate round-trip."""
+        service.browser_manager = mock_browser_manager
+        mock_page = AsyncMock()
+        mock_browser_manager.page_context = MagicMock()
+        mock_browser_manager.page_context.return_value.__aenter__.return_value = mock_page
+        mock_page.evaluate.return_value = {
+            "page_structure": {"title": "Test Page", "og_title": "Test OG"},
+            "extraction": {
+                "blueprint": {"component_type": "div", "html_snippet": "<body>", "children": []},
+                "assets": [{"url": "https://example.com/a.png", "asset_type": "image"}],
+                "metadata": {}
+            }
+        }
+
+        with patch.object(service, '_wait_for_dynamic_content', AsyncMock()):
+            result = await service.extract_dom_structure(
+                url="https://example.com",
+                session_id="test-session"
+            )
+
+        assert result.success is True
+        mock_page.evaluate.assert_awaited_once()
+        assert result.page_structure.title == "Test Page"
+        assert result.page_structure.open_graph == {"title": "Test OG"}
+        assert len(result.assets) == 1
+    
+    @pytest.mark.asyncio
+    async def test_extract_dom_structure_passes_options_to_script(self, service, mock_browser_manager):
+        """The style flag and blueprint limits reach the extractor script as options."""
+        service.browser_manager = mock_browser_manager
+        mock_page = AsyncMock()
+        mock_browser_manager.page_context = MagicMock()
+        mock_browser_manager.page_context.return_value.__aenter__.return_value = mock_page
+        mock_page.evaluate.return_value = {
+            "page_structure": {"title": "Test Page"},
+            "extraction": {"blueprint": None, "assets": [], "metadata": {}}
+        }
+
+        with patch.object(service, '_wait_for_dynamic_content', AsyncMock()):
+            await service.extract_dom_structure(
+                url="https://example.com",
+                session_id="test-session",
+                include_computed_styles=False
+            )
+
+        script, options = mock_page.evaluate.await_args_list[0].args
+        assert script == service._javascript_extractors["combined"]
+        assert options == {
+            "includeStyles": False,
+            "maxDepth": 6,
+            "maxComponents": 150,
+            "snippetAttributes": None,
+            "includeHidden": False
+        }
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_dynamic_content_polls_conditions_concurrently(self, service):
+        """The React, Vue and image waits overlap, and a timeout in one is swallowed."""
+        mock_page = AsyncMock()
+        in_flight = 0
+        peak = 0
+        yield_to_loop = asyncio.sleep  # captured before sleep is patched below
+
+        async def wait_for_function(script, timeout):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await yield_to_loop(0)
+            in_flight -= 1
+            if 'data-v-' in script:
+                raise TimeoutError("Vue wait timed out")
+
+        mock_page.wait_for_function.side_effect = wait_for_function
+
+        with patch('app.services.dom_extraction_service.asyncio.sleep', AsyncMock()):
+            await service._wait_for_dynamic_content(mock_page, timeout=100)
+
+        assert mock_page.wait_for_function.await_count == 3
+        assert peak == 3
+    
+    def test_extractor_scripts_shared_across_instances(self):
+        """Extractor scripts are built once at import, not per service instance."""
+        with patch('app.services.dom_extraction_service.extractors') as mock_extractors:
+            first = DOMExtractionService()
+            second = DOMExtractionService()
+
+        assert first._javascript_extractors is second._javascript_extractors
+        assert "combined" in first._javascript_extractors
+        mock_extractors.get_combined_extractor_script.assert_not_called()
+
+    def test_build_asset_model(self):
+        """Assets convert in one pass, falling back to a minimal model on bad data."""
+        full = DOMExtractionService._build_asset_model({
+            'url': 'https://example.com/bg.png',
+            'asset_type': 'background-image',
+            'width': 20,
+            'height': 10,
+        })
+        assert full.dimensions == (20, 10)
+        assert full.is_background is True
+
+        # Inline SVG attributes can be percentages, which fail the dimension check
+        minimal = DOMExtractionService._build_asset_model({
+            'url': 'https://example.com/icon.svg',
+            'asset_type': 'svg',
+            'width': '100%',
+            'height': '100%',
+        })
+        assert minimal.dimensions is None
+        assert minimal.alt_text == 'asset'
+
+        assert DOMExtractionService._build_asset_model({'asset_type': None}) is None
+
     def test_dom_extractor_script_structure(self, service):
         """Test DOM extractor script has required structure."""
         script = service._get_dom_extractor_script()
@@ -354,7 +679,7 @@ class TestDOMExtractionService:
         mock_browser_manager.wait_for_page_load = AsyncMock()
         
         # Mock page structure extraction method
-        with patch.object(service, '_extract_page_structure') as mock_extract_structure:
+        with patch.object(service, '_build_page_structure') as mock_extract_structure:
             mock_extract_structure.return_value = PageStructure(
                 title="Test Page",
                 meta_description="Test description",
@@ -418,33 +743,24 @@ class TestDOMExtractionService:
                 session_id="test-session"
             )
     
-    @pytest.mark.asyncio
-    async def test_extract_page_structure(self, service, mock_browser_manager):
-        """Test page structure extraction."""
-        mock_page = AsyncMock()
-        
-        # Mock page structure evaluation
+    def test_build_page_structure(self, service):
+        """Test building page structure from the page structure script's output."""
         structure_data = {
             "title": "Test Page Title",
-            "metaDescription": "Test page description",
-            "metaKeywords": "test, keywords",
+            "description": "Test page description",
+            "keywords": "test, keywords",
             "lang": "en-US",
             "charset": "UTF-8",
             "viewport": "width=device-width, initial-scale=1",
-            "faviconUrl": "https://example.com/favicon.ico",
-            "canonicalUrl": "https://example.com/canonical",
-            "openGraph": {
-                "og:title": "Test Page",
-                "og:description": "Test description"
-            },
-            "schemaOrg": [
-                {"@type": "WebPage", "name": "Test Page"}
-            ]
+            "favicon": "https://example.com/favicon.ico",
+            "canonical": "https://example.com/canonical",
+            "og_title": "Test Page",
+            "og_description": "Test description",
+            "og_image": None,
+            "twitter_card": "summary"
         }
         
-        mock_page.evaluate.return_value = structure_data
-        
-        result = await service._extract_page_structure(mock_page, "https://example.com")
+        result = service._build_page_structure(structure_data)
         
         assert result.title == "Test Page Title"
         assert result.meta_description == "Test page description"
@@ -454,19 +770,17 @@ class TestDOMExtractionService:
         assert result.viewport == "width=device-width, initial-scale=1"
         assert result.favicon_url == "https://example.com/favicon.ico"
         assert result.canonical_url == "https://example.com/canonical"
-        assert result.open_graph["og:title"] == "Test Page"
-        assert len(result.schema_org) == 1
+        assert result.open_graph == {
+            "title": "Test Page",
+            "description": "Test description",
+            "twitter_card": "summary"
+        }
     
-    @pytest.mark.asyncio
-    async def test_extract_page_structure_error(self, service, mock_browser_manager):
-        """Test page structure extraction with error."""
-        mock_page = AsyncMock()
-        mock_page.evaluate.side_effect = Exception("Evaluation failed")
-        
-        result = await service._extract_page_structure(mock_page, "https://example.com")
+    def test_build_page_structure_without_data(self, service):
+        """Test that a null page_structure from the script maps to an unknown page."""
+        result = service._build_page_structure(None)
         
-        # Should return empty structure on error
-        assert result.title is None
+        assert result.title == "Unknown"
         assert result.meta_description is None
         assert result.lang is None
     
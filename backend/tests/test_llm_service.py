@@ -257,6 +257,35 @@ body { margin: 0; }
                 )
 
 
+    async def test_oversized_blueprint_summarized_without_revalidation(self, mock_dom_result):
+        """An oversized DetectedComponent blueprint is summarized as passed in."""
+        blueprint = DetectedComponent(
+            component_type=ComponentType.NAVBAR,
+            html_snippet="<nav></nav>",
+            label="Main Navigation"
+        )
+
+        with patch('app.services.llm_service.settings') as mock_settings, \
+             patch('app.services.llm_service.anthropic', Mock()):
+            mock_settings.anthropic_api_key = "test-key"
+            service = LLMService()
+
+        service.max_prompt_tokens = 1
+        service._make_request_with_retry = AsyncMock(return_value={
+            "content": "```html\n<html><body></body></html>\n```",
+            "usage": Mock(input_tokens=1, output_tokens=1)
+        })
+
+        with patch.object(service, '_create_component_summary', wraps=service._create_component_summary) as summarize:
+            await service.generate_html_from_components(
+                component_result=blueprint,
+                dom_result=mock_dom_result,
+                original_url="https://example.com"
+            )
+
+        summarize.assert_called_once()
+        assert summarize.call_args.args[0] is blueprint
+
 # Integration test (optional - can be run separately)
 @pytest.mark.integration
 @pytest.mark.asyncio
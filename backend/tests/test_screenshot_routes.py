@@ -56,11 +56,16 @@ class TestScreenshotRoutes:
         mock_browser_manager = AsyncMock()
         mock_logger = MagicMock()
         
-        return {
+        # Capture routes need a running browser; serve the mock instead of launching one
+        app.dependency_overrides[get_browser_manager] = lambda: mock_browser_manager
+        
+        yield {
             "app_state": mock_app_state,
             "browser_manager": mock_browser_manager,
             "logger": mock_logger
         }
+        
+        app.dependency_overrides.pop(get_browser_manager, None)
     
     def test_get_viewport_presets(self, client):
         """Test getting viewport presets."""